@@ -0,0 +1,157 @@
+"""Stage checkpoints for resuming interrupted runs.
+
+The intermediate tables ``InitializeStatus``, ``InitializePairs`` and
+``ActivityInitializeStatus`` are expensive to recompute from the raw inputs.
+:class:`CheckpointStore` keeps a binary copy of each of them next to the
+outputs together with a ``manifest.yaml`` recording the SHA-256 of every
+checkpoint file and a fingerprint of the inputs they were derived from.
+
+Checkpoints are pickled frames, which reload an order of magnitude faster
+than parsing the CSV outputs.  Every file, including the manifest, is written
+to a temporary file in the same directory and moved into place with
+:func:`os.replace`, so a run killed at any point leaves either the previous or
+the new version behind, never a truncated file.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime
+import hashlib
+import logging
+import os
+from pathlib import Path
+import pickle
+from typing import Dict, Iterable, Optional
+
+import pandas as pd
+import yaml
+
+logger = logging.getLogger(__name__)
+
+# Sub-directory of an output directory holding its checkpoints.
+CHECKPOINT_DIR = ".checkpoints"
+
+MANIFEST_NAME = "manifest.yaml"
+
+# Stages checkpointed by :func:`main.classify_directory`, in pipeline order.
+STAGES = ("InitializeStatus", "InitializePairs", "ActivityInitializeStatus")
+
+_CHUNK = 1 << 20
+
+
+def file_sha256(path: Path) -> str:
+    """Return the SHA-256 of the file at ``path``."""
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    """Write ``data`` to ``path`` through a temporary file and rename."""
+
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "wb") as fh:
+            fh.write(data)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+def inputs_fingerprint(inputs: Iterable[Path], *extra: str) -> str:
+    """Return a digest identifying the contents of ``inputs``.
+
+    Parameters
+    ----------
+    inputs:
+        Input files of the run.
+    extra:
+        Further values the checkpoints depend on, e.g. the profile name.
+    """
+
+    digest = hashlib.sha256()
+    # Pickles are only guaranteed to load with the pandas that wrote them.
+    for part in (pd.__version__, *extra):
+        digest.update(part.encode("utf-8") + b"\0")
+    for path in inputs:
+        digest.update(file_sha256(Path(path)).encode("ascii"))
+    return digest.hexdigest()
+
+
+@dataclass
+class CheckpointStore:
+    """Checkpoints of one output directory.
+
+    Parameters
+    ----------
+    directory:
+        Directory receiving the checkpoint files and the manifest.
+    fingerprint:
+        Digest from :func:`inputs_fingerprint`.  Checkpoints written for a
+        different fingerprint are ignored.
+    """
+
+    directory: Path
+    fingerprint: str
+    stages: Dict[str, Dict[str, object]] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        manifest = self.directory / MANIFEST_NAME
+        if not manifest.exists():
+            return
+        data = yaml.safe_load(manifest.read_text()) or {}
+        if data.get("fingerprint") != self.fingerprint:
+            logger.info("ignoring checkpoints in %s: inputs changed", self.directory)
+            return
+        self.stages = dict(data.get("stages") or {})
+
+    def _write_manifest(self) -> None:
+        manifest = {"fingerprint": self.fingerprint, "stages": self.stages}
+        atomic_write_bytes(
+            self.directory / MANIFEST_NAME,
+            yaml.safe_dump(manifest, sort_keys=True).encode("utf-8"),
+        )
+
+    def save(self, stage: str, df: pd.DataFrame) -> Path:
+        """Checkpoint ``df`` as the result of ``stage``."""
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        data = pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL)
+        path = self.directory / f"{stage}.pkl"
+        atomic_write_bytes(path, data)
+        self.stages[stage] = {
+            "file": path.name,
+            "sha256": hashlib.sha256(data).hexdigest(),
+            "rows": int(df.shape[0]),
+            "created": datetime.utcnow().isoformat(),
+        }
+        self._write_manifest()
+        return path
+
+    def load(self, stage: str) -> Optional[pd.DataFrame]:
+        """Return the checkpointed result of ``stage`` if it is valid.
+
+        ``None`` is returned when the stage has no checkpoint for the current
+        fingerprint or its file does not match the recorded hash.
+        """
+
+        entry = self.stages.get(stage)
+        if entry is None:
+            return None
+        path = self.directory / str(entry["file"])
+        if not path.exists():
+            logger.warning("checkpoint %s is missing; recomputing %s", path, stage)
+            return None
+        data = path.read_bytes()
+        if hashlib.sha256(data).hexdigest() != entry["sha256"]:
+            logger.warning("checkpoint %s is corrupt; recomputing %s", path, stage)
+            return None
+        logger.info("resuming %s from %s", stage, path)
+        return pickle.loads(data)
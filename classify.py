@@ -6,9 +6,10 @@ import argparse
 import logging
 from pathlib import Path
 
+from compression import CODECS
 from constants import Cols
 from io_utils import read_activities, read_pairs, read_status, write_csv
-from pipeline import aggregate_entities, initialize_pairs, initialize_status
+from pipeline import aggregate_entities, initialize_pairs, initialize_status, sort_once
 from status_api import StatusAPI
 
 PLAN = [
@@ -32,6 +33,7 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--strict", action="store_true")
     parser.add_argument("--print-plan", action="store_true")
     parser.add_argument("--log-level", default="INFO")
+    parser.add_argument("--compression", choices=CODECS, default="none")
     return parser.parse_args()
 
 
@@ -50,6 +52,8 @@ def main() -> int:
     status_df = read_status(input_dir / "status.csv", strict=args.strict)
     activities_df = read_activities(input_dir / "activities.csv", strict=args.strict)
     pairs_df = read_pairs(input_dir / "pairs.csv", strict=args.strict)
+    activities_df = sort_once(activities_df, Cols.ACTIVITY_ID)
+    pairs_df = sort_once(pairs_df, [Cols.ACTIVITY_ID1, Cols.ACTIVITY_ID2])
 
     output_dir.mkdir(parents=True, exist_ok=True)
 
@@ -57,17 +61,17 @@ def main() -> int:
     logging.info("initialising statuses")
     init_act = initialize_status(activities_df, status, empty_fallback="GLOBAL_MIN")
     write_csv(
-        init_act.sort_values(Cols.ACTIVITY_ID).reset_index(drop=True),
+        sort_once(init_act, Cols.ACTIVITY_ID),
         output_dir / "InitializeStatus.csv",
+        args.compression,
     )
 
     logging.info("processing pairs")
     init_pairs = initialize_pairs(pairs_df, init_act, status)
     write_csv(
-        init_pairs.sort_values([Cols.ACTIVITY_ID1, Cols.ACTIVITY_ID2]).reset_index(
-            drop=True
-        ),
+        sort_once(init_pairs, [Cols.ACTIVITY_ID1, Cols.ACTIVITY_ID2]),
         output_dir / "InitializePairs.csv",
+        args.compression,
     )
 
     logging.info("aggregating entities")
@@ -75,7 +79,7 @@ def main() -> int:
 
     for name, df in entities.items():
         logging.debug("writing %s with %d rows", name, df.shape[0])
-        write_csv(df, output_dir / f"{name}.csv")
+        write_csv(df, output_dir / f"{name}.csv", args.compression)
 
     return 0
 
@@ -0,0 +1,202 @@
+"""Connected components of the activity pair graph.
+
+Every row of the pairs table links ``activity_chembl_id1`` with
+``activity_chembl_id2``.  Activities joined through non-independent pairs form
+clusters that are usually analysed together.  This module builds the sparse
+graph over integer-coded activity IDs, labels its connected components and
+derives the worst status of each cluster from the :class:`StatusAPI` order.
+
+SciPy's :func:`scipy.sparse.csgraph.connected_components` is used when SciPy
+is installed; otherwise a vectorised NumPy union-find with min-label hooking
+and pointer jumping is used.  Both scale to tens of millions of edges.
+"""
+
+from __future__ import annotations
+
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from constants import Cols
+from pipeline import as_bool
+from status_api import StatusAPI
+
+try:  # pragma: no cover - optional dependency
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import connected_components as _sp_components
+except ImportError:  # pragma: no cover - optional dependency
+    csr_matrix = None
+    _sp_components = None
+
+
+def edge_mask(pairs: pd.DataFrame, edge_column: Optional[str] = None) -> np.ndarray:
+    """Return the pairs that link their activities in the graph.
+
+    Parameters
+    ----------
+    pairs:
+        Pairs table.
+    edge_column:
+        Boolean-like column marking edges, e.g. ``not_ind_no_iss_graph``.
+        When omitted, non-independent pairs are used if the table has an
+        ``INDEPENDENT`` column, and every pair otherwise.
+    """
+
+    if edge_column is not None:
+        return as_bool(pairs[edge_column])
+    if Cols.INDEPENDENT in pairs.columns:
+        return ~as_bool(pairs[Cols.INDEPENDENT])
+    return np.ones(len(pairs), dtype=bool)
+
+
+def connected_components(src: np.ndarray, dst: np.ndarray, n: int) -> np.ndarray:
+    """Label the connected components of an undirected graph.
+
+    Parameters
+    ----------
+    src, dst:
+        Integer node codes of the edge endpoints.
+    n:
+        Number of nodes; codes must lie in ``range(n)``.
+
+    Returns
+    -------
+    numpy.ndarray
+        Component label per node.  Labels are the smallest node code of each
+        component.
+    """
+
+    # 32-bit codes halve the memory traffic of the gathers below.
+    dtype = np.int32 if n < 2**31 else np.int64
+    src = np.asarray(src, dtype=dtype)
+    dst = np.asarray(dst, dtype=dtype)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    if _sp_components is not None:
+        graph = csr_matrix((np.ones(len(src), dtype=np.int8), (src, dst)), shape=(n, n))
+        _, raw = _sp_components(graph, directed=False)
+        # Relabel to the smallest member so both paths agree.
+        first = np.full(raw.max() + 1, n, dtype=np.int64)
+        np.minimum.at(first, raw, np.arange(n))
+        return first[raw]
+
+    labels = np.arange(n, dtype=dtype)
+    while True:
+        lu = labels[src]
+        lv = labels[dst]
+        # Edges inside one tree stay there once the trees are flattened.
+        active = lu != lv
+        if not active.any():
+            return labels.astype(np.int64)
+        src, dst, lu, lv = src[active], dst[active], lu[active], lv[active]
+        low = np.minimum(lu, lv)
+        hooked = labels.copy()
+        # Hook every root onto the smallest label seen across its edges.
+        np.minimum.at(hooked, lu, low)
+        np.minimum.at(hooked, lv, low)
+        # Pointer jumping flattens the trees into stars.
+        while True:
+            jumped = hooked[hooked]
+            if np.array_equal(jumped, hooked):
+                break
+            hooked = jumped
+        labels = hooked
+
+
+def activity_clusters(
+    pairs: pd.DataFrame, edge_column: Optional[str] = None
+) -> pd.DataFrame:
+    """Assign a cluster ID to every activity referenced by ``pairs``.
+
+    Parameters
+    ----------
+    pairs:
+        Pairs table with ``activity_chembl_id1``/``activity_chembl_id2``.
+    edge_column:
+        See :func:`edge_mask`.
+
+    Returns
+    -------
+    pandas.DataFrame
+        ``activity_chembl_id``, ``cluster_id`` and ``cluster_size`` ordered by
+        activity ID.  Cluster IDs are numbered in order of their smallest
+        activity ID.  Activities that only take part in non-edge pairs form
+        singleton clusters.
+    """
+
+    id1 = pairs[Cols.ACTIVITY_ID1]
+    id2 = pairs[Cols.ACTIVITY_ID2]
+    valid = (id1.notna() & id2.notna()).to_numpy()
+    ids = pd.concat([id1[valid], id2[valid]], ignore_index=True)
+    codes, nodes = pd.factorize(ids, sort=True)
+    n = len(nodes)
+    src, dst = codes[: valid.sum()], codes[valid.sum() :]
+    mask = edge_mask(pairs, edge_column)[valid]
+    labels = connected_components(src[mask], dst[mask], n)
+    cluster, sizes = _dense_labels(labels)
+    return pd.DataFrame(
+        {
+            Cols.ACTIVITY_ID: nodes,
+            Cols.CLUSTER_ID: cluster,
+            Cols.CLUSTER_SIZE: sizes[cluster],
+        }
+    )
+
+
+def _dense_labels(labels: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    _, dense, sizes = np.unique(labels, return_inverse=True, return_counts=True)
+    return dense.reshape(-1).astype(np.int64), sizes
+
+
+def cluster_status(
+    clusters: pd.DataFrame,
+    activity_status: pd.DataFrame,
+    status: StatusAPI,
+    status_column: str = Cols.FILTERED_NEW,
+) -> pd.DataFrame:
+    """Return the worst status of each cluster.
+
+    The worst status is the one with the highest ``order``, matching
+    :meth:`StatusAPI.get_max`.  Statuses missing from the status table are
+    ignored; clusters without any known status get ``NaN``.
+
+    Parameters
+    ----------
+    clusters:
+        Output of :func:`activity_clusters`.
+    activity_status:
+        Table with ``activity_chembl_id`` and ``status_column``, e.g. the
+        ``activity`` table returned by :func:`pipeline.aggregate_entities`.
+    status:
+        :class:`StatusAPI` providing the order.
+    status_column:
+        Column of ``activity_status`` holding the status.
+
+    Returns
+    -------
+    pandas.DataFrame
+        ``cluster_id``, ``cluster_size`` and ``Filtered.new`` per cluster.
+    """
+
+    order = pd.Series(
+        activity_status[status_column].map(status.order_map).to_numpy(),
+        index=pd.Index(activity_status[Cols.ACTIVITY_ID]),
+    )
+    order = order.groupby(level=0).max()
+    per_activity = order.reindex(clusters[Cols.ACTIVITY_ID]).to_numpy()
+    worst = (
+        pd.Series(per_activity, index=clusters[Cols.CLUSTER_ID].to_numpy())
+        .groupby(level=0)
+        .max()
+    )
+    by_order = dict(zip(status.table["order"], status.table["status"]))
+    sizes = clusters.groupby(Cols.CLUSTER_ID)[Cols.CLUSTER_SIZE].first()
+    result = pd.DataFrame(
+        {
+            Cols.CLUSTER_ID: sizes.index.to_numpy(),
+            Cols.CLUSTER_SIZE: sizes.to_numpy(),
+        }
+    )
+    result[Cols.FILTERED_NEW] = worst.reindex(sizes.index).map(by_order).to_numpy()
+    return result
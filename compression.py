@@ -0,0 +1,150 @@
+"""Compressed CSV output and transparent decompression on read.
+
+Tables can be written as gzip or zstd.  Gzip output is produced by
+compressing fixed-size blocks in a thread pool and concatenating them as
+independent gzip members, which every gzip reader (including pandas) reads
+as one stream.  Zstd output relies on the multithreaded compressor of the
+optional ``zstandard`` package.
+
+Readers never rely on the file name: :func:`detect_compression` inspects the
+magic bytes, and :func:`resolve_table` finds ``<name>.csv.gz`` or
+``<name>.csv.zst`` when ``<name>.csv`` itself is absent, so the outputs of one
+run can be fed to the next without a decompression step.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+import gzip
+import os
+from pathlib import Path
+from typing import List, Optional
+
+import pandas as pd
+
+try:  # pragma: no cover - optional dependency
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+CODECS = ("none", "gzip", "zstd")
+
+SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+DEFAULT_LEVELS = {"gzip": 6, "zstd": 3}
+
+# Uncompressed bytes per gzip member.  Smaller blocks parallelise better but
+# cost a little ratio at every member boundary.
+BLOCK_SIZE = 4 * 1024 * 1024
+
+_MAGIC = {b"\x1f\x8b": "gzip", b"\x28\xb5\x2f\xfd": "zstd"}
+
+
+def _normalise_codec(codec: Optional[str]) -> Optional[str]:
+    if codec is None or codec == "none":
+        return None
+    if codec not in SUFFIXES:
+        raise ValueError(f"unknown compression {codec!r}; expected one of {CODECS}")
+    return codec
+
+
+def compressed_path(path: Path, codec: Optional[str]) -> Path:
+    """Return the file name used for ``path`` written with ``codec``."""
+
+    codec = _normalise_codec(codec)
+    if codec is None:
+        return path
+    return path.with_name(path.name + SUFFIXES[codec])
+
+
+def table_variants(path: Path) -> List[Path]:
+    """Return ``path`` and its compressed variants in lookup order."""
+
+    return [path] + [path.with_name(path.name + s) for s in SUFFIXES.values()]
+
+
+def resolve_table(path: Path) -> Path:
+    """Return the existing file for the logical table ``path``.
+
+    ``path`` is returned unchanged when none of its variants exist so the
+    caller's read raises the usual :class:`FileNotFoundError`.
+    """
+
+    for candidate in table_variants(path):
+        if candidate.exists():
+            return candidate
+    return path
+
+
+def detect_compression(path: Path) -> Optional[str]:
+    """Return ``"gzip"``, ``"zstd"`` or ``None`` from the magic bytes of ``path``."""
+
+    with open(path, "rb") as fh:
+        head = fh.read(4)
+    for magic, codec in _MAGIC.items():
+        if head.startswith(magic):
+            return codec
+    return None
+
+
+def read_table(path: Path, **kwargs: object) -> pd.DataFrame:
+    """Read a possibly compressed CSV table with :func:`pandas.read_csv`.
+
+    Parameters
+    ----------
+    path:
+        Logical table path, e.g. ``output/activity.csv``.  Compressed
+        variants are found through :func:`resolve_table`.
+    kwargs:
+        Extra arguments for :func:`pandas.read_csv`.
+    """
+
+    path = resolve_table(Path(path))
+    if "compression" not in kwargs and path.exists():
+        kwargs["compression"] = detect_compression(path)
+    return pd.read_csv(path, **kwargs)  # type: ignore[arg-type]
+
+
+def compress_bytes(
+    data: bytes,
+    codec: Optional[str],
+    *,
+    level: Optional[int] = None,
+    threads: Optional[int] = None,
+) -> bytes:
+    """Compress ``data`` with ``codec`` using several threads.
+
+    Parameters
+    ----------
+    data:
+        Uncompressed payload.
+    codec:
+        ``"gzip"``, ``"zstd"`` or ``None``/``"none"`` for no compression.
+    level:
+        Compression level; defaults to :data:`DEFAULT_LEVELS`.
+    threads:
+        Worker threads.  Defaults to the number of CPUs.
+    """
+
+    codec = _normalise_codec(codec)
+    if codec is None:
+        return data
+    level = DEFAULT_LEVELS[codec] if level is None else level
+    threads = threads or os.cpu_count() or 1
+
+    if codec == "zstd":
+        if zstandard is None:
+            raise ImportError("zstd compression requires the 'zstandard' package")
+        # ``threads=1`` would still spawn a worker; 0 compresses inline.
+        workers = threads if threads > 1 else 0
+        return zstandard.ZstdCompressor(level=level, threads=workers).compress(data)
+
+    blocks = [data[i : i + BLOCK_SIZE] for i in range(0, len(data), BLOCK_SIZE)]
+    if len(blocks) <= 1 or threads == 1:
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    # ``zlib`` releases the GIL, so the members compress concurrently.
+    with ThreadPoolExecutor(max_workers=min(threads, len(blocks))) as pool:
+        members = pool.map(
+            lambda block: gzip.compress(block, compresslevel=level, mtime=0), blocks
+        )
+        return b"".join(members)
@@ -30,3 +30,6 @@ class Cols:
     NO_ISSUE: str = "no_issue"
     SYSTEM_ID: str = "system_id"
     TYPE: str = "type"
+    INDEPENDENT: str = "INDEPENDENT"
+    CLUSTER_ID: str = "cluster_id"
+    CLUSTER_SIZE: str = "cluster_size"
@@ -0,0 +1,146 @@
+"""Independent and non-independent counts for any measurement type.
+
+The bundled inputs carry precomputed ``independent_IC50``,
+``non_independent_IC50``, ``independent_Ki`` and ``non_independent_Ki``
+columns.  :func:`pivot_counts` derives the same kind of counts for any set of
+measurement types directly from the pairs table: every pair contributes one
+to both of its activities in the column selected by its ``INDEPENDENT`` flag
+and its ``mesurement_type``.  All types are counted in a single pass: the
+activity IDs and the (type, flag) cells are integer coded and the flattened
+cell index of every pair end is counted with :func:`numpy.bincount`.
+
+:func:`attach_counts` adds the derived columns to the activity table.  The
+aggregation in :mod:`pipeline` sums every ``independent_<type>`` and
+``non_independent_<type>`` column, so the derived counts flow into all
+entity tables.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from constants import Cols
+from pipeline import COUNT_PREFIXES, PAIR_LEGACY_NAMES, _legacy_rename_map, as_bool
+
+logger = logging.getLogger(__name__)
+
+# Selects every measurement type found in the pairs.
+ALL_TYPES = "all"
+
+
+def count_columns(types: Iterable[str]) -> List[str]:
+    """Return the count columns of ``types``, both flags per type in turn."""
+
+    return [f"{prefix}_{t}" for t in types for prefix in COUNT_PREFIXES]
+
+
+def _normalise(pairs: pd.DataFrame) -> pd.DataFrame:
+    rename_map = _legacy_rename_map(pairs.columns, PAIR_LEGACY_NAMES)
+    if rename_map:
+        pairs = pairs.rename(columns=rename_map)
+    missing = [
+        c
+        for c in (
+            Cols.ACTIVITY_ID1,
+            Cols.ACTIVITY_ID2,
+            Cols.MEASUREMENT_TYPE,
+            Cols.INDEPENDENT,
+        )
+        if c not in pairs.columns
+    ]
+    if missing:
+        raise KeyError(f"required columns {missing} not found in pairs table")
+    return pairs
+
+
+def measurement_types(pairs: pd.DataFrame) -> List[str]:
+    """Return the sorted measurement types occurring in ``pairs``."""
+
+    types = _normalise(pairs)[Cols.MEASUREMENT_TYPE].dropna().astype(str)
+    return sorted(types.unique())
+
+
+def resolve_types(
+    pairs: pd.DataFrame, types: Optional[Iterable[str]] = None
+) -> List[str]:
+    """Return ``types`` in order, expanding :data:`ALL_TYPES` or ``None``."""
+
+    if types is None:
+        return measurement_types(pairs)
+    resolved: List[str] = []
+    for t in types:
+        resolved.extend(measurement_types(pairs) if t == ALL_TYPES else [t])
+    return list(dict.fromkeys(resolved))
+
+
+def pivot_counts(
+    pairs: pd.DataFrame, types: Optional[Iterable[str]] = None
+) -> pd.DataFrame:
+    """Count the independent and non-independent pairs of every activity.
+
+    Parameters
+    ----------
+    pairs:
+        Raw pairs table with ``INDEPENDENT`` and measurement type columns.
+    types:
+        Measurement types to count; ``None`` or :data:`ALL_TYPES` counts
+        every type found in ``pairs``.  Pairs of other types are ignored.
+
+    Returns
+    -------
+    pandas.DataFrame
+        One row per activity ID of the counted pairs, ordered by ID, with
+        the :func:`count_columns` of ``types`` as ``int64``.
+    """
+
+    pairs = _normalise(pairs)
+    types = resolve_types(pairs, types)
+    columns = count_columns(types)
+
+    # Cell of every pair: two columns per type, the independent one first.
+    type_codes = pd.Categorical(
+        pairs[Cols.MEASUREMENT_TYPE].astype(str), categories=types
+    ).codes.astype(np.int64)
+    independent = as_bool(pairs[Cols.INDEPENDENT])
+    cells = np.where(type_codes >= 0, 2 * type_codes + (~independent), -1)
+
+    # Both ends of a pair are counted.
+    ids = pd.concat(
+        [pairs[Cols.ACTIVITY_ID1], pairs[Cols.ACTIVITY_ID2]], ignore_index=True
+    )
+    cells = np.tile(cells, 2)
+    keep = (cells >= 0) & ids.notna().to_numpy()
+    codes, uniques = pd.factorize(ids[keep], sort=True)
+    flat = codes.astype(np.int64) * len(columns) + cells[keep]
+    matrix = np.bincount(flat, minlength=len(uniques) * len(columns))
+    result = pd.DataFrame(
+        matrix.reshape(len(uniques), len(columns)), columns=columns, dtype=np.int64
+    )
+    result.insert(0, Cols.ACTIVITY_ID, np.asarray(uniques))
+    return result
+
+
+def attach_counts(activities: pd.DataFrame, counts: pd.DataFrame) -> pd.DataFrame:
+    """Add the columns of ``counts`` to ``activities``.
+
+    Activities without counted pairs get zeros.  Count columns already
+    present in ``activities`` are kept as they are, so precomputed input
+    counts take precedence over derived ones.
+    """
+
+    present = [c for c in counts.columns[1:] if c in activities.columns]
+    if present:
+        logger.info("keeping input count columns %s", present)
+    added = [c for c in counts.columns[1:] if c not in activities.columns]
+    if not added:
+        return activities
+    lookup = counts.set_index(Cols.ACTIVITY_ID)
+    result = activities.copy(deep=False)
+    for col in added:
+        values = result[Cols.ACTIVITY_ID].map(lookup[col])
+        result[col] = values.fillna(0).astype(np.int64)
+    return result
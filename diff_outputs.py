@@ -0,0 +1,416 @@
+"""Compare the outputs of two classification runs.
+
+Between ChEMBL releases or status table changes the entity tables written by
+:mod:`main` shift in ``Filtered.new`` and in their counts.  This module
+compares two output directories table by table:
+
+* tables whose ``.meta.yaml``, or ``_manifest.yaml`` when partitioned (see
+  :mod:`partitioning`), records the same ``sha256`` are reported as
+  identical without being read;
+* all other tables are streamed in chunks, hash-partitioned on their key
+  into spill files, and joined one partition at a time, so memory use is
+  bounded by the partition size rather than the table size.
+
+The result is a compact report with per-table row, status and count change
+totals and the number of entities per ``Filtered.new`` transition, plus one
+``<table>.changes.csv`` listing every changed entity.
+
+Example
+-------
+::
+
+    python diff_outputs.py output/chembl_33 output/chembl_34 --report diff
+"""
+
+from __future__ import annotations
+
+import argparse
+from collections import Counter
+from dataclasses import dataclass, field
+import logging
+from pathlib import Path
+import tempfile
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from compression import read_table, resolve_table
+from constants import Cols
+from partitioning import (
+    MANIFEST_NAME,
+    load_manifest,
+    read_output,
+    table_dir,
+    table_exists,
+)
+from pipeline import count_columns_of
+
+logger = logging.getLogger(__name__)
+
+# Entity tables compared by default and their key columns.
+DIFF_KEYS: Dict[str, str] = {
+    "activity": Cols.ACTIVITY_ID,
+    "assay": Cols.ASSAY_ID,
+    "document": Cols.DOCUMENT_ID,
+    "system": Cols.SYSTEM_ID,
+    "testitem": Cols.TESTITEM_ID,
+    "target": Cols.TARGET_ID,
+}
+
+# Placeholder status of entities present in only one of the runs.
+ABSENT = "<absent>"
+
+REPORT_NAME = "diff_report.yaml"
+
+
+@dataclass
+class TableDiff:
+    """Summary of the differences of one table."""
+
+    name: str
+    identical: bool
+    rows_old: int = 0
+    rows_new: int = 0
+    added: int = 0
+    removed: int = 0
+    status_changed: int = 0
+    counts_changed: int = 0
+    transitions: Counter = field(default_factory=Counter)
+
+    @property
+    def changed(self) -> bool:
+        """Whether any entity was added, removed or changed."""
+
+        return bool(
+            self.added or self.removed or self.status_changed or self.counts_changed
+        )
+
+    def as_dict(self) -> Dict[str, object]:
+        """Return the summary in a YAML friendly form."""
+
+        return {
+            "identical": self.identical,
+            "rows_old": self.rows_old,
+            "rows_new": self.rows_new,
+            "added": self.added,
+            "removed": self.removed,
+            "status_changed": self.status_changed,
+            "counts_changed": self.counts_changed,
+            "transitions": [
+                {"from": old, "to": new, "count": count}
+                for (old, new), count in sorted(self.transitions.items())
+            ],
+        }
+
+
+def _partitioned(path: Path) -> bool:
+    return (table_dir(path) / MANIFEST_NAME).exists() and not resolve_table(
+        path
+    ).exists()
+
+
+def _read_meta(directory: Path, name: str) -> Dict[str, object]:
+    path = directory / f"{name}.csv"
+    if _partitioned(path):
+        return load_manifest(table_dir(path))
+    meta = directory / f"{name}.meta.yaml"
+    if not meta.exists():
+        return {}
+    return yaml.safe_load(meta.read_text()) or {}
+
+
+def _read_chunks(
+    path: Path, chunksize: int, **kwargs: object
+) -> Iterator[pd.DataFrame]:
+    """Yield the logical table ``path`` in chunks, one partition at a time."""
+
+    if not _partitioned(path):
+        yield from read_table(resolve_table(path), chunksize=chunksize, **kwargs)
+        return
+    directory = table_dir(path)
+    for part in load_manifest(directory)["partitions"]:  # type: ignore[union-attr]
+        yield from read_table(
+            directory / str(part["file"]), chunksize=chunksize, **kwargs
+        )
+
+
+def _partition(
+    path: Path,
+    key: str,
+    columns: List[str],
+    spill_dir: Path,
+    side: str,
+    partitions: int,
+    chunksize: int,
+) -> int:
+    """Spill ``path`` into ``partitions`` hash buckets of ``key``.
+
+    ``path`` is the logical table path; partitioned tables are read one
+    partition at a time.  Returns the number of rows read.
+    """
+
+    rows = 0
+    header = read_output(path, nrows=0).columns
+    usecols = [c for c in columns if c in header]
+    reader = _read_chunks(path, chunksize, usecols=usecols, dtype={key: str})
+    for number, chunk in enumerate(reader):
+        rows += len(chunk)
+        bucket = pd.util.hash_pandas_object(
+            chunk[key], index=False
+        ).to_numpy() % np.uint64(partitions)
+        for part, group in chunk.groupby(bucket, sort=False):
+            group.to_pickle(spill_dir / f"{side}-{part}-{number}.pkl")
+    return rows
+
+
+def _load_partition(spill_dir: Path, side: str, part: int) -> Optional[pd.DataFrame]:
+    files = sorted(spill_dir.glob(f"{side}-{part}-*.pkl"))
+    if not files:
+        return None
+    return pd.concat([pd.read_pickle(f) for f in files], ignore_index=True)
+
+
+def _join_partition(
+    old: Optional[pd.DataFrame],
+    new: Optional[pd.DataFrame],
+    key: str,
+    counts: List[str],
+) -> pd.DataFrame:
+    """Return the changed rows of one partition."""
+
+    columns = [key, Cols.FILTERED_NEW, *counts]
+    old = old if old is not None else pd.DataFrame(columns=columns)
+    new = new if new is not None else pd.DataFrame(columns=columns)
+    merged = old.merge(
+        new, on=key, how="outer", suffixes=(".old", ".new"), indicator=True
+    )
+    status_old = merged[f"{Cols.FILTERED_NEW}.old"].fillna(ABSENT)
+    status_new = merged[f"{Cols.FILTERED_NEW}.new"].fillna(ABSENT)
+    merged[f"{Cols.FILTERED_NEW}.old"] = status_old
+    merged[f"{Cols.FILTERED_NEW}.new"] = status_new
+    changed = (status_old != status_new).to_numpy()
+    for col in counts:
+        delta = merged[f"{col}.new"].fillna(0) - merged[f"{col}.old"].fillna(0)
+        merged[f"{col}.delta"] = delta
+        changed |= (delta != 0).to_numpy()
+    changed |= (merged["_merge"] != "both").to_numpy()
+    return merged.loc[changed]
+
+
+def diff_table(
+    old_dir: Path,
+    new_dir: Path,
+    name: str,
+    key: str,
+    *,
+    report_dir: Optional[Path] = None,
+    partitions: int = 16,
+    chunksize: int = 1_000_000,
+) -> TableDiff:
+    """Compare table ``name`` of two output directories.
+
+    Parameters
+    ----------
+    old_dir, new_dir:
+        Output directories of the two runs.
+    name:
+        Table name, e.g. ``"activity"``.
+    key:
+        Key column of the table.
+    report_dir:
+        Directory receiving ``<name>.changes.csv``; nothing is written when
+        omitted.
+    partitions:
+        Number of hash partitions joined one at a time.
+    chunksize:
+        Rows read per chunk while partitioning.
+    """
+
+    old_meta = _read_meta(old_dir, name)
+    new_meta = _read_meta(new_dir, name)
+    if old_meta.get("sha256") and old_meta.get("sha256") == new_meta.get("sha256"):
+        rows = int(old_meta.get("rows", 0))
+        return TableDiff(name, identical=True, rows_old=rows, rows_new=rows)
+
+    old_path = old_dir / f"{name}.csv"
+    new_path = new_dir / f"{name}.csv"
+    headers = [
+        read_output(path, nrows=0).columns
+        for path in (old_path, new_path)
+        if table_exists(path)
+    ]
+    count_cols = count_columns_of(c for header in headers for c in header)
+    columns = [key, Cols.FILTERED_NEW, *count_cols]
+    result = TableDiff(name, identical=False)
+    changes_path = report_dir / f"{name}.changes.csv" if report_dir else None
+    if changes_path is not None and changes_path.exists():
+        changes_path.unlink()
+    header = True
+
+    with tempfile.TemporaryDirectory(prefix=f"diff-{name}-") as tmp:
+        spill = Path(tmp)
+        if table_exists(old_path):
+            result.rows_old = _partition(
+                old_path, key, columns, spill, "old", partitions, chunksize
+            )
+        if table_exists(new_path):
+            result.rows_new = _partition(
+                new_path, key, columns, spill, "new", partitions, chunksize
+            )
+        for part in range(partitions):
+            old = _load_partition(spill, "old", part)
+            new = _load_partition(spill, "new", part)
+            if old is None and new is None:
+                continue
+            counts = [
+                c
+                for c in count_cols
+                if (old is None or c in old.columns)
+                and (new is None or c in new.columns)
+            ]
+            changed = _join_partition(old, new, key, counts)
+            if changed.empty:
+                continue
+            origin = changed["_merge"]
+            result.added += int((origin == "right_only").sum())
+            result.removed += int((origin == "left_only").sum())
+            status_old = changed[f"{Cols.FILTERED_NEW}.old"]
+            status_new = changed[f"{Cols.FILTERED_NEW}.new"]
+            moved = status_old != status_new
+            result.status_changed += int((moved & (origin == "both")).sum())
+            deltas = changed[[f"{c}.delta" for c in counts]]
+            result.counts_changed += int(
+                ((deltas != 0).any(axis=1) & (origin == "both")).sum()
+            )
+            result.transitions.update(
+                zip(status_old[moved].astype(str), status_new[moved].astype(str))
+            )
+            if changes_path is not None:
+                out = changed.drop(columns=["_merge"]).sort_values(key)
+                out.to_csv(
+                    changes_path,
+                    mode="w" if header else "a",
+                    header=header,
+                    index=False,
+                )
+                header = False
+    return result
+
+
+def diff_outputs(
+    old_dir: Path,
+    new_dir: Path,
+    *,
+    report_dir: Optional[Path] = None,
+    tables: Optional[Sequence[str]] = None,
+    partitions: int = 16,
+    chunksize: int = 1_000_000,
+) -> Dict[str, TableDiff]:
+    """Compare the entity tables of two output directories.
+
+    Parameters
+    ----------
+    old_dir, new_dir:
+        Output directories written by :func:`main.classify_directory`.
+    report_dir:
+        Optional directory receiving :data:`REPORT_NAME` and the per-table
+        ``<name>.changes.csv`` files.
+    tables:
+        Subset of :data:`DIFF_KEYS` to compare; defaults to all of them.
+    partitions, chunksize:
+        See :func:`diff_table`.
+
+    Returns
+    -------
+    dict
+        :class:`TableDiff` per table name.
+    """
+
+    names = list(tables) if tables is not None else list(DIFF_KEYS)
+    unknown = [n for n in names if n not in DIFF_KEYS]
+    if unknown:
+        raise KeyError(f"unknown entity tables {unknown}")
+    if report_dir is not None:
+        report_dir.mkdir(parents=True, exist_ok=True)
+
+    results: Dict[str, TableDiff] = {}
+    for name in names:
+        present = [table_exists(d / f"{name}.csv") for d in (old_dir, new_dir)]
+        if not any(present):
+            continue
+        logger.info("comparing %s", name)
+        results[name] = diff_table(
+            old_dir,
+            new_dir,
+            name,
+            DIFF_KEYS[name],
+            report_dir=report_dir,
+            partitions=partitions,
+            chunksize=chunksize,
+        )
+
+    if report_dir is not None:
+        report = {name: diff.as_dict() for name, diff in results.items()}
+        (report_dir / REPORT_NAME).write_text(yaml.safe_dump(report, sort_keys=False))
+    return results
+
+
+def _summary_lines(results: Dict[str, TableDiff]) -> Iterator[str]:
+    for name, diff in results.items():
+        if not diff.changed:
+            yield f"{name}: identical"
+            continue
+        yield (
+            f"{name}: {diff.rows_old} -> {diff.rows_new} rows, "
+            f"+{diff.added} -{diff.removed}, "
+            f"{diff.status_changed} status changes, "
+            f"{diff.counts_changed} count changes"
+        )
+        for (old, new), count in diff.transitions.most_common():
+            yield f"  {old} -> {new}: {count}"
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    """Return command line arguments."""
+
+    parser = argparse.ArgumentParser(description="Compare two output directories")
+    parser.add_argument("old", type=Path, help="output directory of the old run")
+    parser.add_argument("new", type=Path, help="output directory of the new run")
+    parser.add_argument(
+        "--report", type=Path, default=None, help="directory for the change report"
+    )
+    parser.add_argument(
+        "--table",
+        action="append",
+        choices=list(DIFF_KEYS),
+        default=None,
+        help="table to compare; may be given several times (default: all)",
+    )
+    parser.add_argument("--partitions", type=int, default=16)
+    parser.add_argument("--chunksize", type=int, default=1_000_000)
+    parser.add_argument("--log-level", default="WARNING")
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Script entry point.  Returns ``1`` when the outputs differ."""
+
+    args = parse_args(argv)
+    logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.WARNING))
+    results = diff_outputs(
+        args.old,
+        args.new,
+        report_dir=args.report,
+        tables=args.table,
+        partitions=args.partitions,
+        chunksize=args.chunksize,
+    )
+    for line in _summary_lines(results):
+        print(line)
+    return int(any(d.changed for d in results.values()))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -0,0 +1,369 @@
+"""Differential fuzz harness comparing the registered engines.
+
+:func:`random_case` generates a randomised status table with activities and
+pairs.  The generated data covers the corner cases of the Power Query
+semantics: statuses without conditions, activities and pairs with unknown
+statuses, missing activities, the ``"Error"`` branch of the final activity
+status and status tables shorter than the 22 entries ``GLOBAL_MIN`` reads.
+
+:func:`run_case` runs the stages of the :data:`engines.REFERENCE` engine one
+after another and feeds every other engine the same inputs per stage, so a
+divergence is reported for the stage that introduced it.  Results must be
+identical up to row order, except that the dtypes of empty tables are not
+compared (row-wise ``apply`` on no rows yields ``float64`` columns); failing
+stages must raise the same exception type with the same message.  The time
+spent in every stage is recorded per engine.
+
+Example
+-------
+Check 200 random cases and print the speed of every engine::
+
+    python differential.py --cases 200 --rows 500
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass, field
+import sys
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from constants import Cols
+from engines import REFERENCE, STAGES, get_engine, registered_engines
+from pipeline import COUNT_COLUMNS, STATUS_FLAGS
+from status_api import StatusAPI
+
+MEASUREMENT_TYPES = ("IC50", "Ki", "EC50")
+
+# Share of cases whose pairs only link activities with equal flags.
+MATCHED_SHARE = 0.9
+
+
+@dataclass
+class Case:
+    """Inputs of one differential test case."""
+
+    seed: int
+    status: StatusAPI
+    activities: pd.DataFrame
+    pairs: pd.DataFrame
+    empty_fallback: str = "GLOBAL_MIN"
+
+
+def _status_table(rng: np.random.Generator) -> pd.DataFrame:
+    # Short tables make ``GLOBAL_MIN`` fail, long ones resolve it.
+    n = int(rng.choice([5, 12, 22, 26, 30], p=[0.15, 0.15, 0.25, 0.25, 0.2]))
+    names = [f"S{i}" for i in range(n)]
+    if rng.random() < 0.9:
+        names[int(rng.integers(n))] = Cols.NO_ISSUE
+    fields = [*STATUS_FLAGS, "other"]
+    table = pd.DataFrame(
+        {
+            "status": names,
+            "condition_field": [
+                (
+                    Cols.NO_ISSUE
+                    if s == Cols.NO_ISSUE
+                    else fields[rng.integers(len(fields))]
+                )
+                for s in names
+            ],
+            "condition_value": np.where(rng.random(n) < 0.15, "null", "1"),
+            "order": rng.permutation(n) + 1,
+            "score": rng.integers(0, 10, n),
+        }
+    )
+    # A status may be triggered by several condition fields.
+    extra = table.sample(n=int(rng.integers(0, 3)), random_state=rng.integers(1 << 31))
+    extra = extra.assign(
+        condition_field=[fields[rng.integers(len(fields))] for _ in range(len(extra))]
+    )
+    return pd.concat([table, extra], ignore_index=True)
+
+
+def _counts(rng: np.random.Generator, n: int) -> Dict[str, np.ndarray]:
+    columns = {}
+    for col in COUNT_COLUMNS:
+        values = rng.integers(0, 5, n).astype(float)
+        if rng.random() < 0.3:
+            values[rng.random(n) < 0.2] = np.nan
+        columns[col] = values
+    return columns
+
+
+def random_case(seed: int, rows: int = 30) -> Case:
+    """Generate case ``seed`` with up to ``rows`` activities.
+
+    Pairs reference about twice as many activities.  In most cases they
+    only link activities with equal flags and none is unknown, so every
+    entity gets a known status and the aggregation produces tables.
+    """
+
+    rng = np.random.default_rng(seed)
+    table = _status_table(rng)
+    # Cases without activities raise in the aggregation; keep them rare.
+    n = 0 if rng.random() < 0.03 else int(rng.integers(1, rows + 1))
+    ids = [f"CHEMBL{i}" for i in rng.permutation(3 * rows + 3)[:n]]
+
+    def pick(prefix: str, k: int, size: int) -> List[str]:
+        return [f"{prefix}{i}" for i in rng.integers(0, k, size)]
+
+    activities = pd.DataFrame(
+        {
+            Cols.ACTIVITY_ID: ids,
+            Cols.ASSAY_ID: pick("A", 4, n),
+            Cols.DOCUMENT_ID: pick("D", 3, n),
+            Cols.TESTITEM_ID: pick("T", 5, n),
+            Cols.TARGET_ID: pick("TAR", 3, n),
+            Cols.MEASUREMENT_TYPE: rng.choice(MEASUREMENT_TYPES, n),
+            **_counts(rng, n),
+        }
+    )
+    rate = rng.choice([0.0, 0.1, 0.4])
+    for flag in STATUS_FLAGS:
+        activities[flag] = rng.random(n) < rate
+    if rng.random() < 0.2:
+        activities[Cols.NO_ISSUE] = rng.random(n) < 0.3
+
+    m = int(rng.integers(0, 2 * rows + 1))
+    known = ids or ["CHEMBL0"]
+    unknown = [f"X{i}" for i in range(3)]
+    # Orphans leave unresolvable activity rows, so only some cases have them.
+    orphan_rate = 0.05 if rng.random() < 0.3 else 0.0
+
+    def endpoints() -> List[str]:
+        orphan = rng.random(m) < orphan_rate
+        return [
+            unknown[rng.integers(3)] if o else known[rng.integers(len(known))]
+            for o in orphan
+        ]
+
+    first, second = endpoints(), endpoints()
+    # An activity paired with one of another initial status mostly resolves
+    # to ``"Error"``, which no aggregate can take.  Most cases therefore pair
+    # activities with equal flags, so aggregation runs on known statuses;
+    # the others pair freely and cover the error paths.
+    if n and rng.random() < MATCHED_SHARE:
+        flags = activities.filter(items=[*STATUS_FLAGS, Cols.NO_ISSUE])
+        group = pd.Series(
+            pd.factorize(pd.util.hash_pandas_object(flags, index=False))[0], ids
+        )
+        members = {g: list(v) for g, v in group.groupby(group).groups.items()}
+        second = [
+            (
+                b
+                if b in unknown or a in unknown
+                else members[group[a]][rng.integers(len(members[group[a]]))]
+            )
+            for a, b in zip(first, second)
+        ]
+
+    pairs = pd.DataFrame(
+        {
+            Cols.ACTIVITY_ID1: first,
+            Cols.ACTIVITY_ID2: second,
+            Cols.TESTITEM_ID: pick("T", 5, m),
+            Cols.TARGET_ID: pick("TAR", 3, m),
+            Cols.MEASUREMENT_TYPE: rng.choice(MEASUREMENT_TYPES, m),
+            **_counts(rng, m),
+        }
+    )
+    fallback = "GLOBAL_MIN" if rng.random() < 0.9 else "ERROR"
+    return Case(seed, StatusAPI(table), activities, pairs, fallback)
+
+
+# ---------------------------------------------------------------------------
+@dataclass
+class Outcome:
+    """Result or exception of one stage run."""
+
+    value: Any = None
+    error: Optional[BaseException] = None
+    seconds: float = 0.0
+
+
+def run_stage(func: Callable[..., Any], *args: Any) -> Outcome:
+    """Run ``func`` on copies of ``args`` and time it.
+
+    Any exception except an interrupt is recorded, including the Polars
+    ``PanicException``, which derives from :class:`BaseException`.
+    """
+
+    args = tuple(a.copy() if isinstance(a, pd.DataFrame) else a for a in args)
+    start = time.perf_counter()
+    try:
+        value = func(*args)
+    except (KeyboardInterrupt, SystemExit):
+        raise
+    except BaseException as exc:  # noqa: BLE001 - exceptions are compared
+        return Outcome(error=exc, seconds=time.perf_counter() - start)
+    return Outcome(value, seconds=time.perf_counter() - start)
+
+
+def _canonical(df: pd.DataFrame) -> pd.DataFrame:
+    """Return ``df`` with a default index and rows in a canonical order."""
+
+    df = df.reset_index(drop=True)
+    order = df.astype(str).sort_values(list(df.columns), kind="stable").index
+    return df.loc[order].reset_index(drop=True)
+
+
+def compare(expected: Outcome, actual: Outcome) -> Optional[str]:
+    """Describe how ``actual`` differs from ``expected``, or return ``None``."""
+
+    if expected.error is not None or actual.error is not None:
+        if expected.error is None or actual.error is None:
+            return f"raised {actual.error!r}, expected {expected.error!r}"
+        same_type = type(expected.error) is type(actual.error)
+        if not same_type or str(expected.error) != str(actual.error):
+            return f"raised {actual.error!r}, expected {expected.error!r}"
+        return None
+    expected_tables = expected.value
+    actual_tables = actual.value
+    if isinstance(expected_tables, pd.DataFrame):
+        expected_tables, actual_tables = {"": expected_tables}, {"": actual_tables}
+    if list(actual_tables) != list(expected_tables):
+        return f"tables {list(actual_tables)}, expected {list(expected_tables)}"
+    for name, df in expected_tables.items():
+        try:
+            pd.testing.assert_frame_equal(
+                _canonical(actual_tables[name]),
+                _canonical(df),
+                check_dtype=bool(len(df)),
+                check_index_type=bool(len(df)),
+            )
+        except AssertionError as exc:
+            return f"{name or 'table'}: {exc}".strip()
+    return None
+
+
+@dataclass
+class Mismatch:
+    """A stage whose output differs from the reference."""
+
+    seed: int
+    engine: str
+    stage: str
+    detail: str
+
+    def __str__(self) -> str:
+        return f"seed {self.seed}: {self.engine}.{self.stage} {self.detail}"
+
+
+@dataclass
+class Report:
+    """Outcome of a differential run."""
+
+    cases: int = 0
+    mismatches: List[Mismatch] = field(default_factory=list)
+    # Seconds per engine and stage.
+    timings: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    # Reference runs per stage and how many of them raised.
+    runs: Dict[str, int] = field(default_factory=lambda: dict.fromkeys(STAGES, 0))
+    errors: Dict[str, int] = field(default_factory=lambda: dict.fromkeys(STAGES, 0))
+
+    def add_time(self, engine: str, stage: str, seconds: float) -> None:
+        stages = self.timings.setdefault(engine, dict.fromkeys(STAGES, 0.0))
+        stages[stage] += seconds
+
+    def format(self) -> str:
+        """Return the mismatches and a speed table relative to the reference."""
+
+        lines = [f"{self.cases} cases, {len(self.mismatches)} mismatches"]
+        lines += [f"  {m}" for m in self.mismatches]
+        lines.append(
+            "reference runs (raised): "
+            + ", ".join(f"{s} {self.runs[s]} ({self.errors[s]})" for s in STAGES)
+        )
+        reference = self.timings.get(REFERENCE, {})
+        lines.append(f"{'engine':<12}" + "".join(f"{s:>22}" for s in STAGES))
+        for engine, stages in self.timings.items():
+            cells = []
+            for stage in STAGES:
+                base = reference.get(stage, 0.0)
+                ratio = f" ({base / stages[stage]:.1f}x)" if stages[stage] else ""
+                cells.append(f"{stages[stage]:>12.3f}s{ratio:>9}")
+            lines.append(f"{engine:<12}" + "".join(cells))
+        return "\n".join(lines)
+
+
+def run_case(
+    case: Case, engines: Optional[Sequence[str]] = None, report: Optional[Report] = None
+) -> Report:
+    """Compare ``engines`` (default: all registered) with the reference."""
+
+    report = report or Report()
+    report.cases += 1
+    names = [n for n in (engines or registered_engines()) if n != REFERENCE]
+    reference = get_engine(REFERENCE)
+    status = case.status
+
+    def check(stage: str, *args: Any) -> Outcome:
+        expected = run_stage(reference.stage(stage), *args)
+        report.add_time(REFERENCE, stage, expected.seconds)
+        report.runs[stage] += 1
+        report.errors[stage] += expected.error is not None
+        for name in names:
+            actual = run_stage(get_engine(name).stage(stage), *args)
+            report.add_time(name, stage, actual.seconds)
+            detail = compare(expected, actual)
+            if detail is not None:
+                report.mismatches.append(Mismatch(case.seed, name, stage, detail))
+        return expected
+
+    init = check("initialize_status", case.activities, status, case.empty_fallback)
+    if init.error is not None:
+        return report
+    pair_table = check("initialize_pairs", case.pairs, init.value, status)
+    if pair_table.error is not None:
+        return report
+    act_pairs = check("activity_from_pairs", pair_table.value, init.value, status)
+    if act_pairs.error is not None:
+        return report
+    check("aggregate_entities", pair_table.value, init.value, status, act_pairs.value)
+    return report
+
+
+def run_cases(
+    seeds: Iterable[int], rows: int = 30, engines: Optional[Sequence[str]] = None
+) -> Report:
+    """Run :func:`run_case` on :func:`random_case` of every seed."""
+
+    report = Report()
+    for seed in seeds:
+        run_case(random_case(seed, rows), engines, report)
+    return report
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    """Return command line arguments."""
+
+    parser = argparse.ArgumentParser(description="Differential engine tests")
+    parser.add_argument("--cases", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0, help="first seed")
+    parser.add_argument("--rows", type=int, default=30, help="activities per case")
+    parser.add_argument(
+        "--engine",
+        action="append",
+        default=None,
+        help="engine to compare; may be given several times (default: all)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Script entry point; returns 1 when any engine diverged."""
+
+    args = parse_args(argv)
+    seeds: Tuple[int, ...] = tuple(range(args.seed, args.seed + args.cases))
+    report = run_cases(seeds, args.rows, args.engine)
+    print(report.format())
+    return 1 if report.mismatches else 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""Registry of interchangeable implementations of the classification stages.
+
+Every engine provides the four stages ``initialize_status``,
+``initialize_pairs``, ``activity_from_pairs`` and ``aggregate_entities`` with
+the signatures of :mod:`pipeline`, taking and returning pandas DataFrames.
+The following engines are registered on import:
+
+``reference``
+    The frozen row-wise implementation in :mod:`reference_engine`, used as
+    the oracle of :mod:`differential`.
+``pandas``
+    The vectorised default implementation in :mod:`pipeline`.
+``polars``
+    The lazy queries of :mod:`polars_engine`, when Polars is installed.
+
+New fast paths are registered with :func:`register_engine` and are then
+checked against the reference by the differential tests automatically.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List
+
+import pandas as pd
+
+import pipeline
+import polars_engine
+import reference_engine
+
+STAGES = (
+    "initialize_status",
+    "initialize_pairs",
+    "activity_from_pairs",
+    "aggregate_entities",
+)
+
+REFERENCE = "reference"
+
+
+@dataclass(frozen=True)
+class Engine:
+    """One implementation of the classification stages."""
+
+    name: str
+    initialize_status: Callable[..., pd.DataFrame]
+    initialize_pairs: Callable[..., pd.DataFrame]
+    activity_from_pairs: Callable[..., pd.DataFrame]
+    aggregate_entities: Callable[..., Dict[str, pd.DataFrame]]
+    description: str = ""
+
+    def stage(self, name: str) -> Callable[..., Any]:
+        """Return the implementation of stage ``name``."""
+
+        if name not in STAGES:
+            raise KeyError(f"unknown stage {name!r}")
+        return getattr(self, name)
+
+
+_REGISTRY: Dict[str, Engine] = {}
+
+
+def register_engine(engine: Engine, *, replace: bool = False) -> Engine:
+    """Add ``engine`` to the registry and return it.
+
+    Raises ``ValueError`` when the name is taken, unless ``replace`` is set.
+    The reference engine can never be replaced.
+    """
+
+    if engine.name in _REGISTRY and (not replace or engine.name == REFERENCE):
+        raise ValueError(f"engine {engine.name!r} is already registered")
+    _REGISTRY[engine.name] = engine
+    return engine
+
+
+def unregister_engine(name: str) -> None:
+    """Remove engine ``name``; the reference engine cannot be removed."""
+
+    if name == REFERENCE:
+        raise ValueError("the reference engine cannot be removed")
+    _REGISTRY.pop(name, None)
+
+
+def get_engine(name: str) -> Engine:
+    """Return the registered engine ``name``."""
+
+    try:
+        return _REGISTRY[name]
+    except KeyError:
+        raise KeyError(
+            f"unknown engine {name!r}; registered: {sorted(_REGISTRY)}"
+        ) from None
+
+
+def registered_engines() -> List[str]:
+    """Return the names of all registered engines in registration order."""
+
+    return list(_REGISTRY)
+
+
+# ---------------------------------------------------------------------------
+def _eager(func: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap a lazy :mod:`polars_engine` stage to take and return pandas."""
+
+    def run(*args: Any, **kwargs: Any) -> Any:
+        def lazy(value: Any) -> Any:
+            if isinstance(value, pd.DataFrame):
+                return polars_engine.to_lazy(value)
+            return value
+
+        result = func(
+            *[lazy(a) for a in args], **{k: lazy(v) for k, v in kwargs.items()}
+        )
+        if isinstance(result, dict):
+            return polars_engine.collect(result)
+        return polars_engine.collect({"result": result})["result"]
+
+    return run
+
+
+register_engine(
+    Engine(
+        REFERENCE,
+        reference_engine.initialize_status,
+        reference_engine.initialize_pairs,
+        reference_engine.activity_from_pairs,
+        reference_engine.aggregate_entities,
+        "frozen row-wise implementation",
+    )
+)
+register_engine(
+    Engine(
+        "pandas",
+        pipeline.initialize_status,
+        pipeline.initialize_pairs,
+        pipeline.activity_from_pairs,
+        pipeline.aggregate_entities,
+        "vectorised pandas pipeline",
+    )
+)
+if polars_engine.available():  # pragma: no cover - optional dependency
+    register_engine(
+        Engine(
+            "polars",
+            _eager(polars_engine.initialize_status),
+            _eager(polars_engine.initialize_pairs),
+            _eager(polars_engine.activity_from_pairs),
+            _eager(polars_engine.aggregate_entities),
+            "Polars lazy queries",
+        )
+    )
@@ -0,0 +1,231 @@
+"""Attach reference attributes to the aggregated entity tables.
+
+Each dataset directory ships ``testitem.csv`` (molecule metadata) and
+``target.csv`` (organism, UniProt accession, isoforms) next to the activity
+inputs.  The tables produced by :func:`pipeline.aggregate_entities` only carry
+identifiers and counts.  This module loads the reference tables once into a
+keyed index with a fixed column projection and attaches the selected
+attributes to the ``testitem``, ``target`` and ``system`` outputs through
+indexed lookups.  The parsed index can optionally be cached on disk between
+runs.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import hashlib
+import logging
+from pathlib import Path
+import pickle
+from typing import Dict, List, Mapping, Optional, Sequence
+
+import pandas as pd
+
+from constants import Cols
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ReferenceSpec:
+    """Description of one reference table.
+
+    Parameters
+    ----------
+    name:
+        Entity the table describes, e.g. ``"testitem"``.
+    patterns:
+        File names tried in the dataset directory, in order.
+    key:
+        Canonical key column after loading.
+    key_aliases:
+        Alternative key column names found in the shipped files.
+    columns:
+        Attribute columns attached to the outputs.
+    """
+
+    name: str
+    patterns: Sequence[str]
+    key: str
+    key_aliases: Sequence[str]
+    columns: Sequence[str]
+
+
+REFERENCE_SPECS: Dict[str, ReferenceSpec] = {
+    "testitem": ReferenceSpec(
+        name="testitem",
+        patterns=("testitem.csv", "testitem_*.csv"),
+        key=Cols.TESTITEM_ID,
+        key_aliases=("molecule_chembl_id",),
+        columns=(
+            "molecule_type",
+            "mw_freebase",
+            "num_ro5_violations",
+            "chirality",
+            "standard_inchi_key",
+        ),
+    ),
+    "target": ReferenceSpec(
+        name="target",
+        patterns=("target.csv", "target_*.csv"),
+        key=Cols.TARGET_ID,
+        key_aliases=(),
+        columns=("organism", "target_uniprot_id", "isoforms"),
+    ),
+}
+
+# Output tables and the reference tables attached to each of them.
+ENRICHED_OUTPUTS: Dict[str, List[str]] = {
+    "testitem": ["testitem"],
+    "target": ["target"],
+    "system": ["testitem", "target"],
+}
+
+
+def find_reference(input_dir: Path, spec: ReferenceSpec) -> Optional[Path]:
+    """Return the reference file for ``spec`` in ``input_dir`` if present."""
+
+    for pattern in spec.patterns:
+        matches = sorted(p for p in input_dir.glob(pattern) if p.suffix == ".csv")
+        if matches:
+            return matches[0]
+    return None
+
+
+def _cache_path(cache_dir: Path, path: Path, spec: ReferenceSpec) -> Path:
+    stat = path.stat()
+    token = "|".join(
+        [
+            str(path.resolve()),
+            str(stat.st_size),
+            str(stat.st_mtime_ns),
+            spec.key,
+            *spec.columns,
+        ]
+    )
+    digest = hashlib.sha256(token.encode("utf-8")).hexdigest()[:16]
+    return cache_dir / f"{spec.name}.{digest}.pkl"
+
+
+def load_reference(
+    path: Path,
+    spec: ReferenceSpec,
+    *,
+    sep: str = ",",
+    encoding: str = "utf-8",
+    cache_dir: Optional[Path] = None,
+) -> pd.DataFrame:
+    """Load a reference table as a frame indexed by its key.
+
+    Only the key and :attr:`ReferenceSpec.columns` are parsed.  Duplicate keys
+    keep their first row.  With ``cache_dir`` the parsed index is pickled and
+    reused while the source file's size and modification time are unchanged.
+
+    Parameters
+    ----------
+    path:
+        Reference CSV file.
+    spec:
+        Table description from :data:`REFERENCE_SPECS`.
+    sep, encoding:
+        CSV options.  A UTF-8 byte order mark is ignored.
+    cache_dir:
+        Optional directory for the on-disk cache.
+    """
+
+    cache_file = None
+    if cache_dir is not None:
+        cache_file = _cache_path(cache_dir, path, spec)
+        if cache_file.exists():
+            logger.debug("using cached reference index %s", cache_file)
+            return pd.read_pickle(cache_file)
+
+    if encoding.lower().replace("-", "") == "utf8":
+        encoding = "utf-8-sig"
+    header = pd.read_csv(path, sep=sep, encoding=encoding, nrows=0).columns
+    key = next((c for c in (spec.key, *spec.key_aliases) if c in header), None)
+    if key is None:
+        raise KeyError(f"reference table {path} lacks a {spec.key!r} column")
+    columns = [c for c in spec.columns if c in header]
+    df = pd.read_csv(
+        path,
+        sep=sep,
+        encoding=encoding,
+        usecols=[key, *columns],
+        dtype={key: str},
+    )
+    index = (
+        df.drop_duplicates(key)
+        .set_index(key)
+        .rename_axis(spec.key)
+        .reindex(columns=columns)
+    )
+
+    if cache_file is not None:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache_file.with_suffix(".tmp")
+        with tmp.open("wb") as fh:
+            pickle.dump(index, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp.replace(cache_file)
+    return index
+
+
+def load_references(
+    input_dir: Path,
+    *,
+    sep: str = ",",
+    encoding: str = "utf-8",
+    cache_dir: Optional[Path] = None,
+) -> Dict[str, pd.DataFrame]:
+    """Load every reference table available in ``input_dir``."""
+
+    references: Dict[str, pd.DataFrame] = {}
+    for name, spec in REFERENCE_SPECS.items():
+        path = find_reference(input_dir, spec)
+        if path is None:
+            logger.info("no %s reference table in %s", name, input_dir)
+            continue
+        references[name] = load_reference(
+            path, spec, sep=sep, encoding=encoding, cache_dir=cache_dir
+        )
+    return references
+
+
+def _system_keys(df: pd.DataFrame) -> pd.DataFrame:
+    """Split ``system_id`` into its test item and target identifiers."""
+
+    parts = df[Cols.SYSTEM_ID].astype(str).str.split("_", n=2, expand=True)
+    return pd.DataFrame(
+        {Cols.TESTITEM_ID: parts[0], Cols.TARGET_ID: parts[1]}, index=df.index
+    )
+
+
+def enrich_entity(
+    name: str, df: pd.DataFrame, references: Mapping[str, pd.DataFrame]
+) -> pd.DataFrame:
+    """Return ``df`` with reference attributes appended.
+
+    Parameters
+    ----------
+    name:
+        Output table name; see :data:`ENRICHED_OUTPUTS`.  Other tables are
+        returned unchanged.
+    df:
+        Aggregated entity table.
+    references:
+        Indexed reference tables from :func:`load_references`.
+    """
+
+    wanted = [r for r in ENRICHED_OUTPUTS.get(name, []) if r in references]
+    if not wanted:
+        return df
+    keys = _system_keys(df) if name == "system" else df
+    attrs = {}
+    for ref_name in wanted:
+        reference = references[ref_name]
+        lookup = keys[reference.index.name].astype(str)
+        found = reference.reindex(lookup.to_numpy())
+        for col in reference.columns:
+            if col not in df.columns:
+                attrs[col] = found[col].to_numpy()
+    return df.assign(**attrs)
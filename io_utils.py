@@ -8,6 +8,7 @@ from typing import Optional
 import pandas as pd
 import pandera as pa
 
+from compression import compress_bytes, compressed_path, read_table
 from pipeline import STATUS_FLAGS, COUNT_COLUMNS
 from constants import Cols
 
@@ -49,9 +50,13 @@ PAIRS_SCHEMA = pa.DataFrameSchema(
 
 
 def read_csv(path: Path, schema: Optional[pa.DataFrameSchema] = None) -> pd.DataFrame:
-    """Read a CSV file using UTF-8 encoding and optional validation."""
+    """Read a CSV file using UTF-8 encoding and optional validation.
 
-    df = pd.read_csv(path)
+    Gzip and zstd compressed files are detected from their content, and
+    ``<name>.csv.gz``/``<name>.csv.zst`` are used when ``path`` is absent.
+    """
+
+    df = read_table(path)
     if schema is not None:
         df = schema.validate(df, lazy=False)
     return df
@@ -85,8 +90,23 @@ def read_pairs(path: Path, strict: bool = True) -> pd.DataFrame:
     return read_csv(path, PAIRS_SCHEMA if strict else None)
 
 
-def write_csv(df: pd.DataFrame, path: Path) -> None:
-    """Write dataframe to ``path`` in a deterministic way."""
+def write_csv(
+    df: pd.DataFrame,
+    path: Path,
+    compression: Optional[str] = None,
+    threads: Optional[int] = None,
+) -> Path:
+    """Write dataframe to ``path`` in a deterministic way.
+
+    With ``compression`` (``"gzip"`` or ``"zstd"``) the codec suffix is
+    appended to ``path`` and the written path is returned.
+    """
 
     path.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(path, index=False, encoding="utf-8", lineterminator="\n")
+    if compression in (None, "none"):
+        df.to_csv(path, index=False, encoding="utf-8", lineterminator="\n")
+        return path
+    data = df.to_csv(index=False, lineterminator="\n").encode("utf-8")
+    target = compressed_path(path, compression)
+    target.write_bytes(compress_bytes(data, compression, threads=threads))
+    return target
@@ -15,21 +15,249 @@ Run the classifier on the bundled example dataset::
 from __future__ import annotations
 
 import argparse
+from contextlib import nullcontext
+from functools import cache, partial
 import logging
 from pathlib import Path
-from typing import List, Sequence
+from typing import Callable, Dict, List, Mapping, Sequence
 
 import pandas as pd
 
+from checkpoint import CHECKPOINT_DIR, CheckpointStore, inputs_fingerprint
+from clusters import activity_clusters, cluster_status
+from compression import CODECS, read_table, resolve_table
 from constants import Cols
+from counts import ALL_TYPES, attach_counts, pivot_counts
+from enrichment import enrich_entity, load_references
+from orphans import ORPHANS_NAME, orphan_counts, remove_orphans, split_orphan_pairs
+from parallel import BACKENDS, LocalBackend, make_backend, run_partitioned
+from partitioning import PartitionSpec, table_exists, write_table
 from pipeline import (
-    activity_from_pairs,
-    aggregate_entities,
-    initialize_pairs,
-    initialize_status,
+    ENTITY_KEYS,
+    copy_on_write,
+    count_columns_of,
+    initialize_status_profiles,
+    needs_pairs,
+    resolve_entities,
+    sort_once,
     write_csv_with_meta,
 )
+from pipelined import BackgroundWriter, prefetch, reader_pool
+from planner import (
+    ExecutionPlan,
+    parse_memory,
+    plan_execution,
+    run_activity_from_pairs,
+    run_aggregate_entities,
+    run_initialize_pairs,
+)
+import polars_engine
+from polars_engine import ENGINES
+from status_api import PROFILE_COLUMN, load_status_profiles
+from status_index import build_status_index
 from status_utils import StatusUtils
+from summaries import SUMMARY_NAME, status_summary, write_run_summary
+
+
+def _write_outputs(
+    load_activities_init: Callable[[], pd.DataFrame],
+    load_pairs: Callable[[], pd.DataFrame],
+    utils: StatusUtils,
+    output_dir: Path,
+    inputs: List[Path],
+    *,
+    clusters: bool = False,
+    cluster_edge_column: str | None = None,
+    references: Mapping[str, pd.DataFrame] | None = None,
+    compression: str | None = None,
+    compression_threads: int | None = None,
+    checkpoints: CheckpointStore | None = None,
+    resume: bool = False,
+    partition: PartitionSpec | None = None,
+    plan: ExecutionPlan | None = None,
+    overlap: bool = True,
+    entities: Sequence[str] | None = None,
+    prune_orphans: bool = False,
+    engine: str = "pandas",
+    count_types: Sequence[str] | None = None,
+    backend: LocalBackend | None = None,
+) -> None:
+    """Run the pair and aggregation stages for one status profile.
+
+    The inputs are passed as loaders so that a resumed run only reads the
+    raw tables when a stage actually has to be recomputed.  With ``overlap``
+    the outputs are written in the background (see :mod:`pipelined`).  Only
+    the ``entities`` tables and their dependencies are computed and written.
+    With ``prune_orphans`` pairs of unknown activities are dropped before
+    the pair stages and written to :data:`orphans.ORPHANS_NAME`; otherwise
+    a quarantine left by an earlier run is removed.  The
+    ``"polars"`` engine computes all stages in one lazy query and ignores
+    ``plan``.  With ``count_types`` the counts of those measurement types
+    are derived from the pairs and added to ``InitializeStatus``.  A
+    ``backend`` runs the pair and aggregation stages on hash partitions of
+    the activities (see :mod:`parallel`).
+    """
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    if not prune_orphans:
+        remove_orphans(output_dir)
+    plan = plan or ExecutionPlan()
+    with BackgroundWriter(overlap) as writer:
+        # Tables are written on a background thread while the next stage
+        # computes; leaving the block waits for the pending writes.
+        write = partial(
+            writer.submit,
+            write_table,
+            partition=partition,
+            compression=compression,
+            threads=compression_threads,
+        )
+
+        def stage(
+            name: str, compute: Callable[[], pd.DataFrame], keys: str | List[str]
+        ) -> pd.DataFrame:
+            """Return the result of ``name`` from its checkpoint or ``compute``."""
+
+            # A checkpoint only stands in for a stage whose output still exists.
+            done = table_exists(output_dir / f"{name}.csv")
+            if resume and checkpoints is not None and done:
+                df = checkpoints.load(name)
+                if df is not None:
+                    return df
+            df = sort_once(compute(), keys)
+            write(df, output_dir / f"{name}.csv", inputs, "1.0")
+            if checkpoints is not None:
+                checkpoints.save(name, df)
+            return df
+
+        # The raw inputs arrive sorted by their keys, and every stage below
+        # preserves that order, so ``sort_once`` only sorts the pair-derived
+        # activity table.
+        def load_initialised() -> pd.DataFrame:
+            activities = load_activities_init()
+            if count_types is None:
+                return activities
+            return attach_counts(activities, pivot_counts(load_pairs(), count_types))
+
+        activities_init = stage("InitializeStatus", load_initialised, Cols.ACTIVITY_ID)
+        # Later tables inherit the partition column through the activity keys.
+        write = partial(write, activities=activities_init)
+
+        @cache
+        def stage_pairs() -> pd.DataFrame:
+            """Return the pairs, quarantining orphans when requested."""
+
+            pairs = load_pairs()
+            if not prune_orphans:
+                return pairs
+            kept, orphans = split_orphan_pairs(pairs, activities_init)
+            writer.submit(
+                write_csv_with_meta,
+                orphans,
+                output_dir / ORPHANS_NAME,
+                inputs,
+                "1.0",
+                compression=compression,
+                threads=compression_threads,
+                extra={"orphans": orphan_counts(orphans, len(pairs))},
+            )
+            return kept
+
+        # Only the activity table needs the pair stages; clusters take their
+        # worst status from it.
+        names = resolve_entities(entities)
+        computed = names if not clusters else resolve_entities([*names, "activity"])
+        pairs_init = act_pairs = None
+
+        # The polars engine and the parallel backend compute all stages at once.
+        whole = engine == "polars" or backend is not None
+
+        @cache
+        def whole_tables() -> Dict[str, pd.DataFrame]:
+            pairs = stage_pairs() if needs_pairs(computed) else None
+            if backend is not None:
+                return run_partitioned(
+                    activities_init, pairs, utils, backend, entities=computed
+                )
+            return polars_engine.stage_tables(activities_init, pairs, utils, computed)
+
+        if needs_pairs(computed):
+            pairs_init = stage(
+                "InitializePairs",
+                (
+                    (lambda: whole_tables()["InitializePairs"])
+                    if whole
+                    else lambda: run_initialize_pairs(
+                        stage_pairs(),
+                        activities_init,
+                        utils,
+                        plan["initialize_pairs"],
+                    )
+                ),
+                [Cols.ACTIVITY_ID1, Cols.ACTIVITY_ID2],
+            )
+            # Derive activity-level table from pairs to avoid recomputation downstream
+            act_pairs = stage(
+                "ActivityInitializeStatus",
+                (
+                    (lambda: whole_tables()["ActivityInitializeStatus"])
+                    if whole
+                    else lambda: run_activity_from_pairs(
+                        pairs_init,
+                        activities_init,
+                        utils,
+                        plan["activity_from_pairs"],
+                    )
+                ),
+                Cols.ACTIVITY_ID,
+            )
+
+        # Aggregate to all required entity levels
+        if whole:
+            tables = whole_tables()
+        else:
+            tables = run_aggregate_entities(
+                pairs_init,
+                activities_init,
+                utils,
+                act_pairs,
+                plan["aggregate_entities"],
+                entities=computed,
+            )
+
+        summaries = {}
+        for name in names:
+            key = ENTITY_KEYS[name]
+            # ``groupby`` already emits the entity tables in key order
+            df_sorted = sort_once(tables[name], key)
+            cols = [key, Cols.FILTERED_NEW, *count_columns_of(df_sorted.columns)]
+            if list(df_sorted.columns) != cols:
+                df_sorted = df_sorted[cols]
+            # Summarised while in memory so monitoring never rereads the table
+            summaries[name] = status_summary(df_sorted, utils)
+            if references:
+                df_sorted = enrich_entity(name, df_sorted, references)
+            write(
+                df_sorted,
+                output_dir / f"{name}.csv",
+                inputs,
+                "1.0",
+                extra={"summary": summaries[name]},
+            )
+        writer.submit(
+            write_run_summary, output_dir / SUMMARY_NAME, summaries, inputs, "1.0"
+        )
+
+        if clusters:
+            # Connected components of the pair graph with their worst status
+            members = activity_clusters(stage_pairs(), cluster_edge_column)
+            write(members, output_dir / "ActivityCluster.csv", inputs, "1.0")
+            write(
+                cluster_status(members, tables["activity"], utils),
+                output_dir / "cluster.csv",
+                inputs,
+                "1.0",
+            )
 
 
 def classify_directory(
@@ -39,6 +267,27 @@ def classify_directory(
     sep: str = ",",
     encoding: str = "utf-8",
     log_level: str = "INFO",
+    index_path: Path | None = None,
+    profiles: Mapping[str, Path] | None = None,
+    clusters: bool = False,
+    cluster_edge_column: str | None = None,
+    enrich: bool = False,
+    reference_cache: Path | None = None,
+    copy_free: bool = False,
+    compression: str | None = None,
+    compression_threads: int | None = None,
+    checkpoint: bool = False,
+    resume: bool = False,
+    partition: PartitionSpec | None = None,
+    max_memory: int | None = None,
+    overlap: bool = True,
+    entities: Sequence[str] | None = None,
+    prune_orphans: bool = False,
+    engine: str = "pandas",
+    count_types: Sequence[str] | None = None,
+    backend: str | None = None,
+    workers: int | None = None,
+    scheduler: str | None = None,
 ) -> None:
     """Classify activity data located in ``input_dir``.
 
@@ -47,6 +296,11 @@ def classify_directory(
     ``ActivityInitializeStatus.csv`` before aggregating entities such as
     activities, assays or documents.
 
+    When several status profiles are configured, either through a
+    ``profile`` column in ``status.csv`` or through ``profiles``, the inputs
+    are read once and the outputs of each profile are written to
+    ``output_dir / <profile>``.
+
     Parameters
     ----------
     input_dir:
@@ -60,78 +314,224 @@ def classify_directory(
         Encoding of the CSV files.  Defaults to ``"utf-8"``.
     log_level:
         Logging level passed to :func:`logging.basicConfig`.
+    index_path:
+        Optional SQLite file receiving a :mod:`status_index` of the outputs
+        for fast point and range queries.  With profiles, one index per
+        profile is written next to it as ``<stem>.<profile><suffix>``.
+    profiles:
+        Optional mapping from profile name to a status table file used
+        instead of ``input_dir / "status.csv"``.
+    clusters:
+        Also write ``ActivityCluster.csv`` with the connected component of
+        every activity in the pair graph and ``cluster.csv`` with the worst
+        status per component (see :mod:`clusters`).
+    cluster_edge_column:
+        Boolean-like pairs column selecting the graph edges, e.g.
+        ``not_ind_no_iss_graph``.  Defaults to non-independent pairs.
+    enrich:
+        Attach attributes from the ``testitem`` and ``target`` reference
+        tables in ``input_dir`` to the ``testitem``, ``target`` and
+        ``system`` outputs (see :mod:`enrichment`).
+    reference_cache:
+        Optional directory caching the parsed reference tables between runs.
+    copy_free:
+        Run the stages under pandas copy-on-write (see
+        :func:`pipeline.copy_on_write`) so derived frames share the input
+        columns instead of copying them.
+    compression:
+        Write the CSV outputs as ``"gzip"`` or ``"zstd"`` (see
+        :mod:`compression`).  Compressed inputs are always detected.
+    compression_threads:
+        Threads used for compression; defaults to the number of CPUs.
+    checkpoint:
+        Keep binary checkpoints of the intermediate tables in
+        ``<output>/.checkpoints`` (see :mod:`checkpoint`).
+    resume:
+        Reload valid checkpoints instead of recomputing their stages.  The
+        raw activities and pairs are only read when a stage needs them.
+        Implies ``checkpoint``.
+    partition:
+        Write the tables as partition directories with a manifest instead of
+        single CSV files (see :mod:`partitioning`).
+    max_memory:
+        Memory budget in bytes.  The pair and aggregation stages are run in
+        memory or chunked into hash partitions depending on estimates from
+        the input sizes (see :mod:`planner`); the chosen plan is logged.
+    overlap:
+        Parse ``activities.csv`` and ``pairs.csv`` concurrently with the
+        status table and the status initialisation, and write the outputs
+        on a background thread (see :mod:`pipelined`).  ``False`` runs all
+        I/O serially.
+    entities:
+        Entity tables to write, e.g. ``["assay", "target"]``; defaults to all
+        of :data:`pipeline.ENTITY_KEYS`.  Only their dependencies are
+        computed: unless ``activity`` or ``clusters`` is requested,
+        ``pairs.csv`` is never read and the pair tables are not written.
+    prune_orphans:
+        Drop pairs whose activity IDs are missing from ``activities.csv``
+        before any merge and quarantine them in ``OrphanPairs.csv`` with
+        counts per reason in its ``.meta.yaml`` (see :mod:`orphans`).  A
+        pair with one known activity is quarantined as a whole, so the rows
+        the known activity would take from it are missing from
+        ``activity.csv`` as well.
+    engine:
+        ``"pandas"`` (default) or ``"polars"``.  The Polars engine builds the
+        status initialisation, pair stages and aggregations as lazy queries
+        executed on all cores (see :mod:`polars_engine`); ``max_memory`` is
+        then ignored.  Requires the optional ``polars`` package, version
+        2.0 or newer.
+    count_types:
+        Measurement types such as ``["EC50", "Kd"]`` whose
+        ``independent_<type>`` and ``non_independent_<type>`` counts are
+        derived from the ``INDEPENDENT`` and measurement type columns of
+        ``pairs.csv`` and written to every table (see :mod:`counts`);
+        ``"all"`` selects every type in the pairs.  Count columns present in
+        ``activities.csv`` are kept.
+    backend:
+        ``"local"`` runs the pair stages and partial aggregations on hash
+        partitions of the activity IDs in a pool of ``workers`` processes;
+        ``"dask"`` runs them on the Dask cluster at ``scheduler`` or on a
+        local Dask cluster (see :mod:`parallel`).  ``max_memory`` is then
+        ignored.
+    workers:
+        Worker processes of the local pool or cluster; defaults to the
+        number of CPUs.
+    scheduler:
+        Address of a running Dask scheduler.
     """
 
     logging.basicConfig(level=getattr(logging, log_level.upper(), logging.INFO))
+    if engine == "polars" and not polars_engine.available():
+        raise ImportError("the polars engine requires 'polars>=2.0'")
+    if engine == "polars" and backend is not None:
+        raise ValueError("a parallel backend runs the pandas engine only")
 
-    # Load the raw input tables
-    status_df = pd.read_csv(input_dir / "status.csv", sep=sep, encoding=encoding)
-    activities_df = pd.read_csv(
-        input_dir / "activities.csv", sep=sep, encoding=encoding
+    workers_pool = (
+        make_backend(backend, workers, scheduler) if backend else nullcontext()
     )
-    pairs_df = pd.read_csv(input_dir / "pairs.csv", sep=sep, encoding=encoding)
+    with copy_on_write(copy_free), reader_pool(
+        overlap and not resume
+    ) as readers, workers_pool as executor:
+        # Read and sort the raw inputs at most once; later stages keep this
+        # order.  Activities and pairs are parsed in the background while the
+        # status table is read and the statuses are initialised; resumed runs
+        # read them lazily as they may not need them at all.
+        def read_activities() -> pd.DataFrame:
+            df = read_table(input_dir / "activities.csv", sep=sep, encoding=encoding)
+            return sort_once(df, Cols.ACTIVITY_ID)
 
-    inputs: List[Path] = [
-        input_dir / "status.csv",
-        input_dir / "activities.csv",
-        input_dir / "pairs.csv",
-    ]
+        def read_pairs() -> pd.DataFrame:
+            df = read_table(input_dir / "pairs.csv", sep=sep, encoding=encoding)
+            return sort_once(df, [Cols.ACTIVITY_ID1, Cols.ACTIVITY_ID2])
 
-    output_dir.mkdir(parents=True, exist_ok=True)
+        use_pairs = clusters or needs_pairs(entities) or count_types is not None
+        load_activities = prefetch(readers, read_activities)
+        load_pairs = prefetch(readers if use_pairs else None, read_pairs)
+
+        if profiles is None:
+            status_df = read_table(input_dir / "status.csv", sep=sep, encoding=encoding)
+            status_profiles = load_status_profiles(status_df)
+            status_paths = {
+                name: resolve_table(input_dir / "status.csv")
+                for name in status_profiles
+            }
+            layered = PROFILE_COLUMN in status_df.columns
+        else:
+            status_profiles = load_status_profiles(profiles, sep=sep, encoding=encoding)
+            status_paths = {name: Path(path) for name, path in profiles.items()}
+            layered = True
+
+        # Apply the status initialisation once for all profiles
+        @cache
+        def initialised() -> Dict[str, pd.DataFrame]:
+            initialize = (
+                polars_engine.initialize_status_profiles
+                if engine == "polars"
+                else initialize_status_profiles
+            )
+            return initialize(load_activities(), status_profiles, "GLOBAL_MIN")
+
+        def initialised_for(name: str) -> pd.DataFrame:
+            return initialised()[name]
+
+        plan = plan_execution(
+            input_dir, max_memory, pairs=use_pairs, sep=sep, encoding=encoding
+        )
+        if max_memory is not None:
+            plan.log()
 
-    utils = StatusUtils(status_df)
-
-    # Apply the status initialisation and pair logic
-    activities_init = initialize_status(activities_df, utils, "GLOBAL_MIN")
-    activities_sorted = activities_init.sort_values(Cols.ACTIVITY_ID).reset_index(
-        drop=True
-    )
-    write_csv_with_meta(
-        activities_sorted, output_dir / "InitializeStatus.csv", inputs, "1.0"
-    )
-
-    pairs_init = initialize_pairs(pairs_df, activities_init, utils)
-    pairs_sorted = pairs_init.sort_values(
-        [Cols.ACTIVITY_ID1, Cols.ACTIVITY_ID2]
-    ).reset_index(drop=True)
-    write_csv_with_meta(pairs_sorted, output_dir / "InitializePairs.csv", inputs, "1.0")
-
-    # Derive activity-level table from pairs to avoid recomputation downstream
-    act_pairs = activity_from_pairs(pairs_init, activities_init, utils)
-    act_pairs_sorted = act_pairs.sort_values(Cols.ACTIVITY_ID).reset_index(drop=True)
-    write_csv_with_meta(
-        act_pairs_sorted,
-        output_dir / "ActivityInitializeStatus.csv",
-        inputs,
-        "1.0",
-    )
-
-    # Aggregate to all required entity levels
-    entities = aggregate_entities(pairs_init, activities_init, utils, act_pairs)
-
-    # Map from entity name to primary sort key column
-    sort_keys = {
-        "activity": Cols.ACTIVITY_ID,
-        "assay": Cols.ASSAY_ID,
-        "document": Cols.DOCUMENT_ID,
-        "system": Cols.SYSTEM_ID,
-        "testitem": Cols.TESTITEM_ID,
-        "target": Cols.TARGET_ID,
-    }
-
-    for name, df in entities.items():
-        key = sort_keys[name]
-        df_sorted = df.sort_values(key).reset_index(drop=True)
-        cols = [
-            key,
-            Cols.FILTERED_NEW,
-            Cols.INDEPENDENT_IC50,
-            Cols.NON_INDEPENDENT_IC50,
-            Cols.INDEPENDENT_KI,
-            Cols.NON_INDEPENDENT_KI,
-        ]
-        df_sorted = df_sorted[cols]
-        write_csv_with_meta(df_sorted, output_dir / f"{name}.csv", inputs, "1.0")
+        references = (
+            load_references(
+                input_dir, sep=sep, encoding=encoding, cache_dir=reference_cache
+            )
+            if enrich
+            else None
+        )
+
+        for name, utils in status_profiles.items():
+            inputs: List[Path] = [
+                status_paths[name],
+                resolve_table(input_dir / "activities.csv"),
+            ]
+            if use_pairs:
+                inputs.append(resolve_table(input_dir / "pairs.csv"))
+            target_dir = output_dir / name if layered else output_dir
+            checkpoints = (
+                CheckpointStore(
+                    target_dir / CHECKPOINT_DIR,
+                    inputs_fingerprint(
+                        inputs,
+                        name,
+                        f"prune_orphans={prune_orphans}",
+                        *(count_types or []),
+                    ),
+                )
+                if checkpoint or resume
+                else None
+            )
+            _write_outputs(
+                partial(initialised_for, name),
+                load_pairs,
+                utils,
+                target_dir,
+                inputs,
+                clusters=clusters,
+                cluster_edge_column=cluster_edge_column,
+                references=references,
+                compression=compression,
+                compression_threads=compression_threads,
+                checkpoints=checkpoints,
+                resume=resume,
+                partition=partition,
+                plan=plan,
+                overlap=overlap,
+                entities=entities,
+                prune_orphans=prune_orphans,
+                engine=engine,
+                count_types=count_types,
+                backend=executor,
+            )
+
+            if index_path is not None:
+                profile_index = (
+                    index_path.with_name(f"{index_path.stem}.{name}{index_path.suffix}")
+                    if layered
+                    else index_path
+                )
+                build_status_index(target_dir, profile_index, utils)
+
+
+def parse_entities(value: str) -> List[str]:
+    """Parse a comma separated list of entity tables for ``--entities``."""
+
+    names = [v.strip() for v in value.split(",") if v.strip()]
+    unknown = sorted(set(names) - set(ENTITY_KEYS))
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"unknown entity tables {', '.join(unknown)} "
+            f"(choose from {', '.join(ENTITY_KEYS)})"
+        )
+    return names
 
 
 def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
@@ -143,6 +543,140 @@ def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
     parser.add_argument("--log-level", default="INFO")
     parser.add_argument("--sep", default=",")
     parser.add_argument("--encoding", default="utf-8")
+    parser.add_argument(
+        "--index",
+        type=Path,
+        default=None,
+        help="write an SQLite status index of the outputs to this file",
+    )
+    parser.add_argument(
+        "--profile",
+        action="append",
+        default=None,
+        metavar="NAME=PATH",
+        help="status profile to classify with; may be given several times",
+    )
+    parser.add_argument(
+        "--clusters",
+        action="store_true",
+        help="write connected components of the pair graph",
+    )
+    parser.add_argument(
+        "--cluster-edge-column",
+        default=None,
+        help="pairs column selecting graph edges (default: non-independent pairs)",
+    )
+    parser.add_argument(
+        "--enrich",
+        action="store_true",
+        help="attach testitem and target reference attributes to the outputs",
+    )
+    parser.add_argument(
+        "--reference-cache",
+        type=Path,
+        default=None,
+        metavar="DIR",
+        help="cache the parsed reference tables in this directory",
+    )
+    parser.add_argument(
+        "--copy-on-write",
+        action="store_true",
+        help="share columns between stages instead of copying frames",
+    )
+    parser.add_argument(
+        "--compression",
+        choices=CODECS,
+        default="none",
+        help="compress the CSV outputs (zstd needs the 'zstandard' package)",
+    )
+    parser.add_argument(
+        "--compression-threads",
+        type=int,
+        default=None,
+        help="threads used for compression (default: all CPUs)",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        action="store_true",
+        help="keep binary checkpoints of the intermediate tables",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="reuse valid checkpoints of an interrupted run",
+    )
+    parser.add_argument(
+        "--partition-by",
+        default=None,
+        metavar="COLUMN",
+        help="write each table as a directory partitioned on COLUMN",
+    )
+    parser.add_argument(
+        "--partition-buckets",
+        type=int,
+        default=0,
+        metavar="N",
+        help="hash COLUMN into N buckets instead of one partition per value",
+    )
+    parser.add_argument(
+        "--max-memory",
+        type=parse_memory,
+        default=None,
+        metavar="SIZE",
+        help="memory budget such as 8G; large stages are chunked",
+    )
+    parser.add_argument(
+        "--serial-io",
+        action="store_true",
+        help="read inputs and write outputs without overlapping computation",
+    )
+    parser.add_argument(
+        "--entities",
+        type=parse_entities,
+        default=None,
+        metavar="NAMES",
+        help="comma separated entity tables to compute, e.g. assay,target "
+        "(default: all); pairs.csv is only read for activity",
+    )
+    parser.add_argument(
+        "--prune-orphans",
+        action="store_true",
+        help="quarantine pairs of unknown activities in OrphanPairs.csv; "
+        "pairs with one known activity are dropped from activity.csv too",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="pandas",
+        help="execution engine; polars needs the optional 'polars' package",
+    )
+    parser.add_argument(
+        "--count-types",
+        type=lambda value: [v.strip() for v in value.split(",") if v.strip()],
+        default=None,
+        metavar="TYPES",
+        help="comma separated measurement types, e.g. EC50,Kd, whose counts are "
+        f"derived from the pairs; '{ALL_TYPES}' counts every type",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default=None,
+        help="run the pair stages and aggregations on hash partitions in "
+        "parallel processes (local) or on a Dask cluster (dask)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="worker processes of the backend (default: all CPUs)",
+    )
+    parser.add_argument(
+        "--scheduler",
+        default=None,
+        metavar="ADDRESS",
+        help="address of a running Dask scheduler for --backend dask",
+    )
     return parser.parse_args(argv)
 
 
@@ -150,12 +684,46 @@ def main(argv: Sequence[str] | None = None) -> int:
     """Script entry point."""
 
     args = parse_args(argv)
+    profiles: Dict[str, Path] | None = None
+    if args.profile:
+        profiles = {}
+        for item in args.profile:
+            name, sep, path = item.partition("=")
+            if not sep or not name:
+                raise SystemExit(f"invalid --profile {item!r}; expected NAME=PATH")
+            profiles[name] = Path(path)
+    partition = (
+        PartitionSpec(args.partition_by, args.partition_buckets)
+        if args.partition_by
+        else None
+    )
     classify_directory(
         args.input,
         args.output,
         sep=args.sep,
         encoding=args.encoding,
         log_level=args.log_level,
+        index_path=args.index,
+        profiles=profiles,
+        clusters=args.clusters,
+        cluster_edge_column=args.cluster_edge_column,
+        enrich=args.enrich,
+        reference_cache=args.reference_cache,
+        copy_free=args.copy_on_write,
+        compression=args.compression,
+        compression_threads=args.compression_threads,
+        checkpoint=args.checkpoint,
+        resume=args.resume,
+        partition=partition,
+        max_memory=args.max_memory,
+        overlap=not args.serial_io,
+        entities=args.entities,
+        prune_orphans=args.prune_orphans,
+        engine=args.engine,
+        count_types=args.count_types,
+        backend=args.backend,
+        workers=args.workers,
+        scheduler=args.scheduler,
     )
     return 0
 
@@ -0,0 +1,195 @@
+"""Semi-join pruning of orphan pairs.
+
+A pair is an *orphan* when one or both of its activity IDs are missing from
+``activities.csv``.  Without pruning such pairs are merged against the
+activities, resolved with an unknown status and only dropped from the
+activity table after the pair halves are concatenated.
+
+:func:`split_orphan_pairs` removes them before any merge.  Membership is
+tested against an :class:`ActivityIdIndex`, a sorted array of the known IDs
+searched with :func:`numpy.searchsorted`.  ChEMBL style IDs sharing a textual
+prefix such as ``CHEMBL`` are stored as 64-bit integers, which keeps the
+index compact and the search fast; other IDs are stored as fixed-width
+strings.  The quarantined pairs are written to :data:`ORPHANS_NAME` with the
+reason for each pair and the counts per reason in its ``.meta.yaml``.
+"""
+
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from compression import table_variants
+from constants import Cols
+
+logger = logging.getLogger(__name__)
+
+ORPHANS_NAME = "OrphanPairs.csv"
+REASON_COLUMN = "orphan_reason"
+MISSING_ID1 = "missing_id1"
+MISSING_ID2 = "missing_id2"
+MISSING_BOTH = "missing_both"
+
+# Optional textual prefix followed by a decimal number without leading zeros.
+_PREFIXED_ID = r"^(\D*)([1-9]\d{0,17}|0)$"
+
+
+def _integral(values: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """Return ``values`` of a float column as int64 and which are integral.
+
+    A blank cell makes pandas read an integer ID column as float64; its
+    integral values still name the integer IDs.  Missing and fractional
+    values are invalid.
+    """
+
+    floats = values.to_numpy(dtype=np.float64)
+    with np.errstate(invalid="ignore"):
+        valid = np.isfinite(floats) & (floats == np.floor(floats))
+        valid &= np.abs(floats) < 2.0**63
+    return np.where(valid, floats, -1).astype(np.int64), valid
+
+
+class ActivityIdIndex:
+    """Sorted membership index of activity IDs.
+
+    Parameters
+    ----------
+    ids:
+        Known activity IDs; missing values are ignored.
+    """
+
+    def __init__(self, ids: pd.Series) -> None:
+        ids = pd.Series(ids).dropna()
+        self.prefix: Optional[str] = None
+        if pd.api.types.is_integer_dtype(ids.dtype):
+            self.prefix = ""
+            self.keys = np.unique(ids.to_numpy(dtype=np.int64))
+            return
+        if pd.api.types.is_float_dtype(ids.dtype):
+            numbers, integral = _integral(ids)
+            if integral.all():
+                self.prefix = ""
+                self.keys = np.unique(numbers)
+                return
+        parts = ids.astype(str).str.extract(_PREFIXED_ID)
+        if len(ids) and parts[1].notna().all() and parts[0].nunique() == 1:
+            self.prefix = str(parts[0].iat[0])
+            self.keys = np.unique(parts[1].astype(np.int64).to_numpy())
+        else:
+            self.keys = np.unique(ids.astype(str).to_numpy(dtype=str))
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the index."""
+
+        return int(self.keys.nbytes)
+
+    def _encode(self, values: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+        """Return search keys of ``values`` and which of them are valid."""
+
+        if self.prefix is None:
+            return values.astype(str).to_numpy(dtype=str), values.notna().to_numpy()
+        if self.prefix == "" and pd.api.types.is_integer_dtype(values.dtype):
+            return values.to_numpy(dtype=np.int64), np.ones(len(values), dtype=bool)
+        if self.prefix == "" and pd.api.types.is_float_dtype(values.dtype):
+            return _integral(values)
+        parts = values.astype(str).str.extract(_PREFIXED_ID)
+        valid = (parts[0] == self.prefix) & parts[1].notna() & values.notna()
+        numbers = pd.to_numeric(parts[1].where(valid), errors="coerce")
+        return numbers.fillna(-1).astype(np.int64).to_numpy(), valid.to_numpy()
+
+    @classmethod
+    def from_keys(cls, keys: np.ndarray, prefix: Optional[str]) -> "ActivityIdIndex":
+        """Return an index over already sorted ``keys`` without copying them."""
+
+        index = cls.__new__(cls)
+        index.keys = keys
+        index.prefix = prefix
+        return index
+
+    def positions(self, values: pd.Series) -> np.ndarray:
+        """Return the position of every value in :attr:`keys`, ``-1`` if absent."""
+
+        keys, valid = self._encode(pd.Series(values))
+        if not len(self.keys):
+            return np.full(len(keys), -1, dtype=np.int64)
+        pos = np.searchsorted(self.keys, keys)
+        pos[pos == len(self.keys)] = 0
+        return np.where(valid & (self.keys[pos] == keys), pos, -1)
+
+    def contains(self, values: pd.Series) -> np.ndarray:
+        """Return a boolean mask of the ``values`` present in the index."""
+
+        return self.positions(values) >= 0
+
+
+def split_orphan_pairs(
+    pairs: pd.DataFrame, activities: pd.DataFrame
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Split ``pairs`` into pairs of known activities and orphans.
+
+    Parameters
+    ----------
+    pairs:
+        Raw pairs table.
+    activities:
+        Activity table whose ``activity_chembl_id`` values are known.
+
+    Returns
+    -------
+    tuple
+        The kept pairs in their original order, and the orphan pairs with an
+        added :data:`REASON_COLUMN`.
+    """
+
+    index = ActivityIdIndex(activities[Cols.ACTIVITY_ID])
+    known1 = index.contains(pairs[Cols.ACTIVITY_ID1])
+    known2 = index.contains(pairs[Cols.ACTIVITY_ID2])
+    keep = known1 & known2
+    logger.debug("activity ID index: %d IDs in %d bytes", len(index), index.nbytes)
+    if keep.all():
+        return pairs, pairs.iloc[:0].assign(**{REASON_COLUMN: pd.Series(dtype=str)})
+
+    dropped = np.flatnonzero(~keep)
+    reason = np.where(
+        known1[dropped],
+        MISSING_ID2,
+        np.where(known2[dropped], MISSING_ID1, MISSING_BOTH),
+    )
+    orphans = pairs.iloc[dropped].assign(**{REASON_COLUMN: reason})
+    kept = pairs.iloc[np.flatnonzero(keep)]
+    logger.info("quarantined %d of %d pairs as orphans", len(orphans), len(pairs))
+    return kept.reset_index(drop=True), orphans.reset_index(drop=True)
+
+
+def orphan_counts(orphans: pd.DataFrame, total: int) -> Dict[str, int]:
+    """Return the counts recorded in the sidecar of :data:`ORPHANS_NAME`."""
+
+    reasons = orphans[REASON_COLUMN].value_counts()
+    return {
+        "pairs_total": int(total),
+        "pairs_kept": int(total - len(orphans)),
+        "orphans": int(len(orphans)),
+        **{r: int(reasons.get(r, 0)) for r in (MISSING_ID1, MISSING_ID2, MISSING_BOTH)},
+    }
+
+
+def remove_orphans(directory: Path) -> None:
+    """Remove :data:`ORPHANS_NAME` and its sidecar from ``directory``.
+
+    Called when pruning is off, so a quarantine left by an earlier run is
+    not taken for one of the current outputs.
+    """
+
+    path = directory / ORPHANS_NAME
+    for stale in table_variants(path) + [path.with_suffix(".meta.yaml")]:
+        if stale.exists():
+            logger.info("removing stale %s", stale)
+            stale.unlink()
@@ -0,0 +1,415 @@
+"""Partition-parallel execution of the pair and aggregation stages.
+
+Activities are split into hash partitions of their activity ID (see
+:func:`pipeline.hash_buckets`) and every partition is processed by one task
+on a :class:`LocalBackend` process pool or a Dask cluster
+(:class:`DaskBackend`).  A task receives
+
+* the pairs touching an activity of its partition,
+* the initialised rows of every activity those pairs reference, and
+* the initialised activities of its partition,
+
+resolves the pair statuses and the final activity statuses, and returns the
+pairs whose ``activity_chembl_id1`` falls into its partition, the activity
+rows of its partition and partial aggregates.  The ``activity`` table is
+complete per partition, since all rows of an activity share its partition.
+Assays, documents and systems span partitions; their partial aggregates are
+merged on the driver with :func:`pipeline.merge_aggregates` (status maximum
+by order and count sums).  ``testitem`` and ``target`` aggregate the merged
+``system`` table.  The result equals the single-process pipeline.
+
+When the backend runs on one host (:attr:`LocalBackend.shares_memory`), the
+statuses are published once with :func:`shared_state.publish` and tasks
+carry a :class:`shared_state.SharedStateHandle` instead of the
+:class:`StatusAPI` and the referenced rows.
+
+The driver still reads the inputs; only the partitions travel to the
+workers.  Dask is optional and only needed for clusters spanning nodes.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+import logging
+import os
+from types import TracebackType
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+)
+
+import numpy as np
+import pandas as pd
+
+from constants import Cols
+from pipeline import (
+    ENTITY_KEYS,
+    _aggregate,
+    _attach_activity_counts,
+    activity_from_pairs,
+    hash_buckets,
+    initialize_pairs,
+    merge_aggregates,
+    needs_pairs,
+    partial_aggregate,
+    resolve_entities,
+    sort_once,
+    system_entities,
+    with_system_id,
+)
+from shared_state import SharedStateHandle, attach, publish, shareable
+from status_api import StatusAPI
+
+try:  # pragma: no cover - optional dependency
+    from dask.distributed import Client, LocalCluster
+except ImportError:  # pragma: no cover - optional dependency
+    Client = None
+    LocalCluster = None
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("local", "dask")
+
+# Partitions per worker; more partitions than workers balance skewed keys.
+PARTITIONS_PER_WORKER = 4
+
+
+class LocalBackend:
+    """Run tasks on a pool of local worker processes.
+
+    Parameters
+    ----------
+    workers:
+        Number of processes; defaults to the number of CPUs.
+    """
+
+    # Workers can attach to shared memory segments of the driver.
+    shares_memory = True
+
+    def __init__(self, workers: Optional[int] = None) -> None:
+        self.workers = workers or os.cpu_count() or 1
+        self._pool = ProcessPoolExecutor(max_workers=self.workers)
+
+    def map(self, func: Callable[[Any], Any], tasks: Sequence[Any]) -> List[Any]:
+        """Return ``[func(t) for t in tasks]`` computed on the workers."""
+
+        return list(self._pool.map(func, tasks))
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self) -> "LocalBackend":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+class DaskBackend(LocalBackend):
+    """Run tasks on a Dask cluster.
+
+    Parameters
+    ----------
+    address:
+        Scheduler address such as ``tcp://scheduler:8786``.  Without one a
+        local cluster of ``workers`` processes is started.
+    workers:
+        Worker processes of the local cluster.
+    """
+
+    shares_memory = False
+
+    def __init__(
+        self, address: Optional[str] = None, workers: Optional[int] = None
+    ) -> None:
+        if Client is None:
+            raise ImportError("the dask backend requires 'dask[distributed]'")
+        self._cluster = None
+        if address is None:
+            self._cluster = LocalCluster(
+                n_workers=workers or os.cpu_count() or 1,
+                threads_per_worker=1,
+                processes=True,
+            )
+            address = self._cluster.scheduler_address
+        self._client = Client(address)
+        self.workers = len(self._client.scheduler_info()["workers"])
+
+    def map(self, func: Callable[[Any], Any], tasks: Sequence[Any]) -> List[Any]:
+        data = self._client.scatter(list(tasks))
+        return self._client.gather(self._client.map(func, data, pure=False))
+
+    def close(self) -> None:
+        self._client.close()
+        if self._cluster is not None:
+            self._cluster.close()
+
+
+def make_backend(
+    name: str, workers: Optional[int] = None, address: Optional[str] = None
+) -> LocalBackend:
+    """Return the backend ``name`` from :data:`BACKENDS`."""
+
+    if name == "local":
+        return LocalBackend(workers)
+    if name == "dask":
+        return DaskBackend(address, workers)
+    raise ValueError(f"unknown backend {name!r}; expected one of {BACKENDS}")
+
+
+# ---------------------------------------------------------------------------
+@dataclass
+class PartitionTask:
+    """Inputs of one partition."""
+
+    part: int
+    partitions: int
+    status: Optional[StatusAPI]
+    entities: List[str]
+    activities: pd.DataFrame
+    pairs: Optional[pd.DataFrame] = None
+    lookup: Optional[pd.DataFrame] = None
+    # Replaces ``status`` and ``lookup`` when set.
+    shared: Optional[SharedStateHandle] = None
+
+
+@dataclass
+class PartitionResult:
+    """Tables of one partition, or the error of its earliest failed stage."""
+
+    tables: Dict[str, pd.DataFrame] = field(default_factory=dict)
+    # Position of the failed stage in pipeline order and its exception.
+    error: Optional[Tuple[int, BaseException]] = None
+
+
+def run_partition(task: PartitionTask) -> PartitionResult:
+    """Process one partition; runs on a worker."""
+
+    result = PartitionResult()
+    stage = 0
+    try:
+        state = attach(task.shared) if task.shared is not None else None
+        status = state.status if state is not None else task.status
+        if task.pairs is not None:
+            if state is not None:
+                pairs = state.initialize_pairs(task.pairs)
+                lookup = _with_foreign_stubs(task, pairs)
+            else:
+                lookup = task.lookup
+                pairs = initialize_pairs(task.pairs, lookup, status)
+            owner = hash_buckets(pairs[Cols.ACTIVITY_ID1], task.partitions)
+            result.tables["InitializePairs"] = pairs.iloc[
+                np.flatnonzero(owner == task.part)
+            ]
+            stage = 1
+            act_pairs = activity_from_pairs(pairs, lookup, status)
+            own = hash_buckets(act_pairs[Cols.ACTIVITY_ID], task.partitions)
+            act_pairs = act_pairs.iloc[np.flatnonzero(own == task.part)]
+            result.tables["ActivityInitializeStatus"] = act_pairs
+            stage = 2
+            if "activity" in task.entities:
+                result.tables["activity"] = _aggregate(
+                    act_pairs, Cols.ACTIVITY_ID, status
+                )
+        stage = 3
+        result.tables.update(_partial_entities(task, status))
+    except Exception as exc:  # noqa: BLE001 - re-raised by the driver
+        result.error = (stage, exc)
+    return result
+
+
+def _with_foreign_stubs(task: PartitionTask, pairs: pd.DataFrame) -> pd.DataFrame:
+    """Return the activities of ``task`` plus a stub row per foreign pair ID.
+
+    Rows of other partitions are dropped after :func:`activity_from_pairs`;
+    copies of a local row keep the merged columns at the dtypes of the full
+    lookup.
+    """
+
+    ids = pd.concat([pairs[Cols.ACTIVITY_ID1], pairs[Cols.ACTIVITY_ID2]])
+    ids = ids.dropna().drop_duplicates()
+    foreign = ids[hash_buckets(ids, task.partitions) != task.part]
+    if task.activities.empty or foreign.empty:
+        return task.activities
+    stubs = task.activities.iloc[np.zeros(len(foreign), dtype=np.intp)]
+    stubs = stubs.assign(**{Cols.ACTIVITY_ID: foreign.to_numpy()})
+    return pd.concat([task.activities, stubs], ignore_index=True)
+
+
+def _partial_entities(
+    task: PartitionTask, status: StatusAPI
+) -> Dict[str, pd.DataFrame]:
+    result: Dict[str, pd.DataFrame] = {}
+    act_df = task.activities.rename(columns={Cols.FILTERED_INIT: Cols.FILTERED})
+    for name in ("assay", "document"):
+        if name in task.entities:
+            result[name] = partial_aggregate(act_df, ENTITY_KEYS[name], status)
+    if "system" in task.entities:
+        result["system"] = partial_aggregate(
+            with_system_id(act_df), Cols.SYSTEM_ID, status
+        )
+    return result
+
+
+def partition_tasks(
+    activities_init: pd.DataFrame,
+    pairs: Optional[pd.DataFrame],
+    status: StatusAPI,
+    partitions: int,
+    entities: Iterable[str],
+    shared: Optional[SharedStateHandle] = None,
+) -> List[PartitionTask]:
+    """Split the inputs into one :class:`PartitionTask` per partition.
+
+    With ``shared`` the tasks refer to the published state instead of
+    carrying ``status`` and the referenced activity rows.
+    """
+
+    entities = list(entities)
+    act_bucket = hash_buckets(activities_init[Cols.ACTIVITY_ID], partitions)
+    bucket1 = bucket2 = np.zeros(0, dtype=np.int64)
+    if pairs is not None:
+        bucket1 = hash_buckets(pairs[Cols.ACTIVITY_ID1], partitions)
+        bucket2 = hash_buckets(pairs[Cols.ACTIVITY_ID2], partitions)
+    tasks = []
+    for part in range(partitions):
+        task = PartitionTask(
+            part,
+            partitions,
+            None if shared is not None else status,
+            entities,
+            activities_init.iloc[np.flatnonzero(act_bucket == part)],
+            shared=shared,
+        )
+        touching = np.flatnonzero((bucket1 == part) | (bucket2 == part))
+        if pairs is not None and len(touching):
+            touching = pairs.iloc[touching]
+            task.pairs = touching
+        if task.pairs is not None and shared is None:
+            ids = pd.concat([touching[Cols.ACTIVITY_ID1], touching[Cols.ACTIVITY_ID2]])
+            referenced = activities_init[Cols.ACTIVITY_ID].isin(ids).to_numpy()
+            task.lookup = activities_init.iloc[np.flatnonzero(referenced)]
+        tasks.append(task)
+    return tasks
+
+
+def run_partitioned(
+    activities_init: pd.DataFrame,
+    pairs: Optional[pd.DataFrame],
+    status: StatusAPI,
+    backend: LocalBackend,
+    entities: Optional[Iterable[str]] = None,
+    partitions: Optional[int] = None,
+    shared: Optional[bool] = None,
+) -> Dict[str, pd.DataFrame]:
+    """Compute the pair tables and entity tables on ``backend``.
+
+    Parameters
+    ----------
+    activities_init:
+        ``InitializeStatus`` table.
+    pairs:
+        Raw pairs; only needed when ``entities`` include ``activity``.
+    status:
+        :class:`StatusAPI` instance.
+    backend:
+        :class:`LocalBackend` or :class:`DaskBackend` running the tasks.
+    entities:
+        Names from :data:`pipeline.ENTITY_KEYS`; defaults to all.
+    partitions:
+        Number of hash partitions; defaults to
+        :data:`PARTITIONS_PER_WORKER` per worker.
+    shared:
+        Publish the statuses in shared memory instead of shipping them with
+        every task; defaults to :attr:`LocalBackend.shares_memory`.  Pairs
+        that are not :func:`shared_state.shareable` are shipped as before.
+
+    Returns
+    -------
+    dict
+        ``InitializePairs`` and ``ActivityInitializeStatus`` when the
+        ``activity`` table is requested, followed by the entity tables, each
+        sorted by its key.
+    """
+
+    names = resolve_entities(entities)
+    with_pairs = needs_pairs(names)
+    if with_pairs and pairs is None:
+        raise ValueError("the activity table requires the pairs")
+    computed = set(names)
+    if {"testitem", "target"}.intersection(names):
+        computed.add("system")
+    partitions = partitions or PARTITIONS_PER_WORKER * backend.workers
+    if shared is None:
+        shared = backend.shares_memory
+    if with_pairs and shared:
+        shared = shareable(pairs, activities_init)
+    with publish(activities_init, status) if shared else nullcontext() as state:
+        tasks = partition_tasks(
+            activities_init,
+            pairs if with_pairs else None,
+            status,
+            partitions,
+            [name for name in ENTITY_KEYS if name in computed],
+            state.handle if state is not None else None,
+        )
+        logger.info("running %d partitions on %d workers", partitions, backend.workers)
+        results = backend.map(run_partition, tasks)
+    # Surface the error the single-process pipeline would raise first.
+    errors = [r.error for r in results if r.error is not None]
+    if errors:
+        raise min(errors, key=lambda error: error[0])[1]
+    parts = [r.tables for r in results]
+
+    if with_pairs and not any("InitializePairs" in part for part in parts):
+        # Without pairs the pair stages are trivial; run them here to get
+        # the exact empty tables.
+        pair_table = initialize_pairs(pairs, activities_init, status)
+        act_pairs = activity_from_pairs(pair_table, activities_init, status)
+        parts.append(
+            {
+                "InitializePairs": pair_table,
+                "ActivityInitializeStatus": act_pairs,
+                "activity": _aggregate(act_pairs, Cols.ACTIVITY_ID, status),
+            }
+        )
+
+    def gathered(name: str) -> List[pd.DataFrame]:
+        return [part[name] for part in parts if name in part]
+
+    result: Dict[str, pd.DataFrame] = {}
+    if with_pairs:
+        result["InitializePairs"] = sort_once(
+            pd.concat(gathered("InitializePairs"), ignore_index=True),
+            [Cols.ACTIVITY_ID1, Cols.ACTIVITY_ID2],
+        )
+        result["ActivityInitializeStatus"] = sort_once(
+            pd.concat(gathered("ActivityInitializeStatus"), ignore_index=True),
+            Cols.ACTIVITY_ID,
+        )
+    if "activity" in names:
+        activity = sort_once(
+            pd.concat(gathered("activity"), ignore_index=True), Cols.ACTIVITY_ID
+        )
+        result["activity"] = _attach_activity_counts(activity, activities_init)
+    for name in ("assay", "document"):
+        if name in names:
+            result[name] = merge_aggregates(gathered(name), ENTITY_KEYS[name], status)
+    if "system" in computed:
+        system = merge_aggregates(gathered("system"), Cols.SYSTEM_ID, status)
+        result.update(system_entities(system, status, names))
+    return result
@@ -0,0 +1,370 @@
+"""Partitioned output layout with manifest-based pruning.
+
+Instead of one ``<table>.csv`` per output, a table can be written as a
+directory ``<table>/`` of ``part-NNNNN.csv`` files split on a partition
+column, e.g. ``target_chembl_id`` or ``document_chembl_id``, together with a
+``_manifest.yaml`` describing which partition holds which values.  Two
+schemes are supported:
+
+``value``
+    One partition per distinct value of the column.
+``hash``
+    A fixed number of buckets; a value lives in bucket
+    :func:`bucket_of` ``(value, buckets)``.
+
+Tables lacking the partition column inherit it through a key they share with
+the activity table when that key determines the column, e.g. ``activity``
+rows through ``activity_chembl_id`` or ``assay`` rows through
+``assay_chembl_id``.  Pair tables use the first activity of each pair.
+Tables for which no such key exists are written as a single CSV.
+
+:func:`read_partitioned` reads only the partitions that can contain the
+requested values.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import hashlib
+import logging
+from pathlib import Path
+import shutil
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from checkpoint import atomic_write_bytes
+from compression import (
+    compress_bytes,
+    compressed_path,
+    read_table,
+    resolve_table,
+    table_variants,
+)
+from constants import Cols
+from pipeline import hash_buckets, write_csv_with_meta
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "_manifest.yaml"
+
+# Keys through which a table may inherit the partition column from the
+# activity table, mapped to the matching activity column.
+INHERIT_KEYS: Dict[str, str] = {
+    Cols.ACTIVITY_ID: Cols.ACTIVITY_ID,
+    Cols.ACTIVITY_ID1: Cols.ACTIVITY_ID,
+    Cols.ASSAY_ID: Cols.ASSAY_ID,
+    Cols.DOCUMENT_ID: Cols.DOCUMENT_ID,
+    Cols.TESTITEM_ID: Cols.TESTITEM_ID,
+    Cols.TARGET_ID: Cols.TARGET_ID,
+}
+
+
+@dataclass(frozen=True)
+class PartitionSpec:
+    """How output tables are partitioned.
+
+    Parameters
+    ----------
+    column:
+        Partition column, e.g. ``"target_chembl_id"``.
+    buckets:
+        Number of hash buckets; ``0`` partitions by distinct value.
+    """
+
+    column: str
+    buckets: int = 0
+
+    @property
+    def scheme(self) -> str:
+        return "hash" if self.buckets else "value"
+
+
+def bucket_of(values: Iterable[object], buckets: int) -> np.ndarray:
+    """Return the hash bucket of every value.
+
+    Values are hashed as strings with pandas' fixed-key hash, so buckets are
+    stable across processes and platforms.
+    """
+
+    return hash_buckets(np.asarray(list(values), dtype=object), buckets)
+
+
+def table_dir(path: Path) -> Path:
+    """Return the partition directory of the logical table ``path``."""
+
+    return path.with_name(path.name.split(".")[0])
+
+
+def table_exists(path: Path) -> bool:
+    """Whether ``path`` was written either as one file or partitioned."""
+
+    return resolve_table(path).exists() or (table_dir(path) / MANIFEST_NAME).exists()
+
+
+def partition_values(
+    df: pd.DataFrame, column: str, activities: Optional[pd.DataFrame] = None
+) -> Tuple[Optional[pd.Series], Optional[str]]:
+    """Return the partition value of every row of ``df``.
+
+    Parameters
+    ----------
+    df:
+        Table to partition.
+    column:
+        Partition column.
+    activities:
+        Activity table used to inherit ``column`` when ``df`` lacks it.
+
+    Returns
+    -------
+    tuple
+        The values and the column they were derived from, or ``(None, None)``
+        when ``df`` cannot be partitioned on ``column``.
+    """
+
+    if column in df.columns:
+        return df[column], column
+    if activities is None or column not in activities.columns:
+        return None, None
+    for key, source in INHERIT_KEYS.items():
+        if key not in df.columns or source not in activities.columns:
+            continue
+        mapping = activities[[source, column]].drop_duplicates()
+        if not mapping[source].is_unique:
+            # ``key`` does not determine ``column``.
+            continue
+        lookup = pd.Series(mapping[column].to_numpy(), index=mapping[source])
+        return df[key].map(lookup), key
+    return None, None
+
+
+def _clear(directory: Path) -> None:
+    if (directory / MANIFEST_NAME).exists():
+        shutil.rmtree(directory)
+
+
+def write_partitioned(
+    df: pd.DataFrame,
+    path: Path,
+    inputs: List[Path],
+    version: str,
+    spec: PartitionSpec,
+    values: pd.Series,
+    *,
+    derived_from: Optional[str] = None,
+    compression: Optional[str] = None,
+    threads: Optional[int] = None,
+    extra: Optional[Dict[str, object]] = None,
+) -> Path:
+    """Write ``df`` as a partition directory next to ``path``.
+
+    Parameters
+    ----------
+    df:
+        Table to write.
+    path:
+        Logical table path, e.g. ``output/activity.csv``; the partitions go
+        to ``output/activity/``.
+    inputs, version:
+        Provenance recorded in the manifest.
+    spec:
+        Partitioning scheme.
+    values:
+        Partition value per row, see :func:`partition_values`.
+    derived_from:
+        Column ``values`` were derived from, recorded in the manifest.
+    compression, threads, extra:
+        See :func:`pipeline.write_csv_with_meta`; ``extra`` goes to the
+        manifest.
+
+    Returns
+    -------
+    pathlib.Path
+        The partition directory.
+    """
+
+    directory = table_dir(path)
+    _clear(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    for stale in table_variants(path) + [path.with_suffix(".meta.yaml")]:
+        if stale.exists():
+            stale.unlink()
+
+    if spec.buckets:
+        labels = pd.Series(bucket_of(values, spec.buckets), index=df.index)
+    else:
+        labels = values.astype(str).where(values.notna(), None)
+    # Missing values get a partition of their own, listed last.
+    codes, uniques = pd.factorize(labels, sort=True, use_na_sentinel=False)
+
+    parts = []
+    for number, label in enumerate(uniques):
+        part = df.iloc[np.flatnonzero(codes == number)]
+        data = part.to_csv(index=False).encode("utf-8")
+        payload = compress_bytes(data, compression, threads=threads)
+        target = compressed_path(directory / f"part-{number:05d}.csv", compression)
+        atomic_write_bytes(target, payload)
+        if pd.isna(label):
+            label = None
+        elif spec.buckets:
+            label = int(label)
+        parts.append(
+            {
+                "file": target.name,
+                "value": label,
+                "rows": int(part.shape[0]),
+                "sha256": hashlib.sha256(data).hexdigest(),
+            }
+        )
+
+    # Digest of the whole table, equal for equal tables partitioned alike.
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(f"{part['value']}:{part['sha256']}\n".encode("utf-8"))
+    manifest = {
+        "table": path.name.split(".")[0],
+        "version": version,
+        "inputs": [str(p) for p in inputs],
+        "column": spec.column,
+        "derived_from": derived_from or spec.column,
+        "scheme": spec.scheme,
+        "buckets": spec.buckets,
+        "rows": int(df.shape[0]),
+        "cols": int(df.shape[1]),
+        "sha256": digest.hexdigest(),
+        "partitions": parts,
+    }
+    if extra:
+        manifest.update(extra)
+    atomic_write_bytes(
+        directory / MANIFEST_NAME,
+        yaml.safe_dump(manifest, sort_keys=False).encode("utf-8"),
+    )
+    return directory
+
+
+def write_table(
+    df: pd.DataFrame,
+    path: Path,
+    inputs: List[Path],
+    version: str,
+    *,
+    partition: Optional[PartitionSpec] = None,
+    activities: Optional[pd.DataFrame] = None,
+    compression: Optional[str] = None,
+    threads: Optional[int] = None,
+    extra: Optional[Dict[str, object]] = None,
+) -> Path:
+    """Write ``df`` partitioned when possible, otherwise as one CSV.
+
+    Parameters
+    ----------
+    partition:
+        Partitioning scheme; ``None`` always writes one CSV.
+    activities:
+        Activity table used by :func:`partition_values`.
+
+    See :func:`write_partitioned` for the remaining parameters.
+    """
+
+    if partition is not None:
+        values, derived_from = partition_values(df, partition.column, activities)
+        if values is not None:
+            return write_partitioned(
+                df,
+                path,
+                inputs,
+                version,
+                partition,
+                values,
+                derived_from=derived_from,
+                compression=compression,
+                threads=threads,
+                extra=extra,
+            )
+        logger.info(
+            "%s cannot be partitioned on %s; writing one file",
+            path.name,
+            partition.column,
+        )
+    _clear(table_dir(path))
+    return write_csv_with_meta(
+        df,
+        path,
+        inputs,
+        version,
+        compression=compression,
+        threads=threads,
+        extra=extra,
+    )
+
+
+def load_manifest(directory: Path) -> Dict[str, object]:
+    """Return the manifest of the partition directory ``directory``."""
+
+    return yaml.safe_load((directory / MANIFEST_NAME).read_text())
+
+
+def select_partitions(
+    manifest: Dict[str, object], values: Optional[Iterable[object]] = None
+) -> List[Dict[str, object]]:
+    """Return the manifest entries that can hold any of ``values``."""
+
+    parts: List[Dict[str, object]] = list(manifest["partitions"])  # type: ignore
+    if values is None:
+        return parts
+    values = list(values)
+    if manifest["scheme"] == "hash":
+        wanted = set(bucket_of(values, int(manifest["buckets"])).tolist())
+    else:
+        wanted = {None if pd.isna(v) else str(v) for v in values}
+    return [p for p in parts if p["value"] in wanted]
+
+
+def read_partitioned(
+    path: Path, values: Optional[Iterable[object]] = None, **kwargs: object
+) -> pd.DataFrame:
+    """Read a partitioned table, touching only partitions that may match.
+
+    Parameters
+    ----------
+    path:
+        Partition directory or logical table path (``output/activity.csv``).
+    values:
+        Values of the partition column to keep.  Only partitions that can
+        contain them are read.  When the table holds the partition column
+        itself the rows are filtered exactly; for inherited columns all rows
+        of the selected partitions are returned.
+    kwargs:
+        Extra arguments for :func:`pandas.read_csv`.
+    """
+
+    directory = Path(path)
+    if not (directory / MANIFEST_NAME).exists():
+        directory = table_dir(directory)
+    manifest = load_manifest(directory)
+    parts = select_partitions(manifest, values)
+    if not parts:
+        # Keep the columns of the table for an empty selection.
+        parts = list(manifest["partitions"])[:1]  # type: ignore[call-overload]
+        kwargs["nrows"] = 0
+    if not parts:
+        return pd.DataFrame()
+    frames = [read_table(directory / str(p["file"]), **kwargs) for p in parts]
+    df = pd.concat(frames, ignore_index=True)
+    column = str(manifest["column"])
+    if values is not None and column in df.columns and len(df):
+        keep = {str(v) for v in values}
+        df = df[df[column].astype(str).isin(keep)].reset_index(drop=True)
+    return df
+
+
+def read_output(path: Path, **kwargs: object) -> pd.DataFrame:
+    """Read the logical table ``path`` whether or not it is partitioned."""
+
+    if (table_dir(path) / MANIFEST_NAME).exists() and not resolve_table(path).exists():
+        return read_partitioned(path, **kwargs)
+    return read_table(path, **kwargs)
@@ -2,16 +2,21 @@
 
 from __future__ import annotations
 
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime
 import hashlib
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
+import numpy as np
 import pandas as pd
 import yaml
 
+from checkpoint import atomic_write_bytes
+from compression import compress_bytes, compressed_path, table_variants
 from constants import Cols
+from orphans import split_orphan_pairs
 from status_api import StatusAPI
 
 STATUS_FLAGS: List[str] = [
@@ -35,6 +40,30 @@ COUNT_COLUMNS: List[str] = [
     Cols.NON_INDEPENDENT_KI,
 ]
 
+# Prefixes of the count columns of any measurement type, e.g. ``independent_EC50``
+# (see :mod:`counts`).
+COUNT_PREFIXES: Tuple[str, ...] = ("independent", "non_independent")
+
+# Entity tables written by the pipeline and their key columns.
+ENTITY_KEYS: Dict[str, str] = {
+    "activity": Cols.ACTIVITY_ID,
+    "assay": Cols.ASSAY_ID,
+    "document": Cols.DOCUMENT_ID,
+    "system": Cols.SYSTEM_ID,
+    "testitem": Cols.TESTITEM_ID,
+    "target": Cols.TARGET_ID,
+}
+
+# Only the activity table is derived from the pairs; all other entity tables
+# aggregate the initialised activities, ``testitem`` and ``target`` through
+# the ``system`` table.
+PAIR_ENTITIES = frozenset({"activity"})
+SYSTEM_ENTITIES = frozenset({"system", "testitem", "target"})
+
+
+# pandas 3 always uses copy-on-write and no longer exposes the option.
+_COW_BUILTIN = int(pd.__version__.split(".")[0]) >= 3
+
 
 @dataclass
 class Config:
@@ -47,12 +76,75 @@ class Config:
 
 
 # ---------------------------------------------------------------------------
+@contextmanager
+def copy_on_write(enabled: bool = True) -> Iterator[None]:
+    """Run the enclosed pipeline stages with pandas copy-on-write enabled.
+
+    The stages below derive new frames through shallow copies, renames and
+    column subsets.  Without copy-on-write several of these operations still
+    copy every column; with it they share the input buffers until a column
+    is actually modified, which keeps peak memory close to the input size.
+
+    Parameters
+    ----------
+    enabled:
+        When ``False`` the context manager does nothing.
+    """
+
+    if not enabled or _COW_BUILTIN:
+        yield
+        return
+    with pd.option_context("mode.copy_on_write", True):
+        yield
+
+
 def load_csv(path: Path, dtype: Optional[Dict[str, str]] = None) -> pd.DataFrame:
     """Load a CSV file using UTF-8 encoding."""
 
     return pd.read_csv(path, dtype=dtype)  # type: ignore[arg-type]
 
 
+# Canonical column names mapped to commonly seen alternatives.
+ACTIVITY_LEGACY_NAMES: Dict[str, List[str]] = {
+    Cols.TESTITEM_ID: [
+        "test_item.id",
+        "testitem_id",
+        "molecule_chembl_id",
+        "molecule_id",
+    ],
+    Cols.MEASUREMENT_TYPE: ["measurement_type", "standard_type"],
+    Cols.ASSAY_ID: ["assay_id"],
+    Cols.DOCUMENT_ID: ["document_id"],
+    Cols.TARGET_ID: ["target_id"],
+}
+# ``pairs`` only carries legacy test item and measurement type names; the
+# measurement type column is historically misspelled.
+PAIR_LEGACY_NAMES: Dict[str, List[str]] = {
+    Cols.TESTITEM_ID: ACTIVITY_LEGACY_NAMES[Cols.TESTITEM_ID],
+    Cols.MEASUREMENT_TYPE: ACTIVITY_LEGACY_NAMES[Cols.MEASUREMENT_TYPE],
+}
+
+
+def _legacy_rename_map(
+    columns: Iterable[str], legacy_names: Dict[str, List[str]]
+) -> Dict[str, str]:
+    """Return the renames mapping legacy *columns* to canonical names.
+
+    The first alternative present is used, and only for canonical columns
+    that are missing.
+    """
+
+    columns = list(columns)
+    rename_map: Dict[str, str] = {}
+    for canonical, alts in legacy_names.items():
+        if canonical not in columns:
+            for alt in alts:
+                if alt in columns:
+                    rename_map[alt] = canonical
+                    break
+    return rename_map
+
+
 def _normalise_activity_columns(df: pd.DataFrame) -> pd.DataFrame:
     """Return *df* with legacy column names mapped to the canonical ones.
 
@@ -72,31 +164,96 @@ def _normalise_activity_columns(df: pd.DataFrame) -> pd.DataFrame:
         encountered.
     """
 
-    rename_map: Dict[str, str] = {}
-    # Map canonical column names to commonly seen alternatives.
-    legacy_names = {
-        Cols.TESTITEM_ID: [
-            "test_item.id",
-            "testitem_id",
-            "molecule_chembl_id",
-            "molecule_id",
-        ],
-        Cols.MEASUREMENT_TYPE: ["measurement_type", "standard_type"],
-        Cols.ASSAY_ID: ["assay_id"],
-        Cols.DOCUMENT_ID: ["document_id"],
-        Cols.TARGET_ID: ["target_id"],
-    }
-    for canonical, alts in legacy_names.items():
-        if canonical not in df.columns:
-            for alt in alts:
-                if alt in df.columns:
-                    rename_map[alt] = canonical
-                    break
+    rename_map = _legacy_rename_map(df.columns, ACTIVITY_LEGACY_NAMES)
     if rename_map:
         df = df.rename(columns=rename_map)
     return df
 
 
+def _prepare_status_input(activities: pd.DataFrame) -> pd.DataFrame:
+    """Return a normalised copy of *activities* with a boolean ``no_issue``.
+
+    The copy is shallow: columns are replaced or added, never modified in
+    place, so the caller's frame is left untouched without duplicating it.
+    """
+
+    df = _normalise_activity_columns(activities.copy(deep=False))
+
+    if Cols.NO_ISSUE in df.columns:
+        # Ensure boolean dtype if ``no_issue`` is provided by the caller
+        df[Cols.NO_ISSUE] = df[Cols.NO_ISSUE].astype(bool)
+    else:
+        # Derive ``no_issue`` when not supplied by checking for active flags
+        df[Cols.NO_ISSUE] = ~df[STATUS_FLAGS].any(axis=1)
+    return df
+
+
+# Strings read as true by :func:`as_bool`, compared case-insensitively.
+TRUE_STRINGS = frozenset({"true", "1", "yes", "y", "t"})
+
+
+def as_bool(series: pd.Series) -> np.ndarray:
+    """Interpret boolean-like values such as ``"TRUE"`` or ``1``.
+
+    Used for boolean columns of ``pairs.csv`` that may arrive as text or
+    numbers, such as ``INDEPENDENT``.  Missing values are false.
+    """
+
+    if series.dtype == bool:
+        return series.to_numpy()
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        return series.fillna(0).to_numpy() != 0
+    return series.astype(str).str.strip().str.lower().isin(TRUE_STRINGS).to_numpy()
+
+
+def _truthy(series: pd.Series) -> np.ndarray:
+    """Return the Python truth value of every element in *series*."""
+
+    if series.dtype == bool:
+        return series.to_numpy()
+    return series.map(bool).to_numpy(dtype=bool)
+
+
+def _flag_patterns(df: pd.DataFrame) -> Tuple[np.ndarray, List[Optional[List[str]]]]:
+    """Group the rows of *df* by their combination of active status flags.
+
+    Returns
+    -------
+    tuple
+        Array mapping each row to its pattern and, per pattern, the list of
+        active flags or ``None`` when the row is marked ``no_issue``.
+    """
+
+    present = [f for f in STATUS_FLAGS if f in df.columns]
+    codes = np.zeros(len(df), dtype=np.int64)
+    for bit, flag in enumerate(present):
+        codes |= _truthy(df[flag]).astype(np.int64) << bit
+    no_issue = _truthy(df[Cols.NO_ISSUE])
+    codes[no_issue] = -1
+    uniques, inverse = np.unique(codes, return_inverse=True)
+    patterns: List[Optional[List[str]]] = [
+        None
+        if code < 0
+        else [f for bit, f in enumerate(present) if (int(code) >> bit) & 1]
+        for code in uniques
+    ]
+    return inverse.reshape(-1), patterns
+
+
+def _resolve_pattern(
+    active_fields: Optional[List[str]], status: StatusAPI, empty_fallback: str
+) -> str:
+    # ``no_issue`` rows take precedence over all other status flags
+    if active_fields is None:
+        return Cols.NO_ISSUE
+    valid = [f for f in active_fields if f in status.condition_fields]
+    if valid:
+        return status.get_min(valid)
+    if empty_fallback.upper() == "GLOBAL_MIN":
+        return status.status_list[21]
+    raise ValueError("no active status flags")
+
+
 def initialize_status(
     activities: pd.DataFrame, status: StatusAPI, empty_fallback: str
 ) -> pd.DataFrame:
@@ -104,7 +261,8 @@ def initialize_status(
 
     When the ``no_issue`` column evaluates to :data:`True`, ``Filtered.init``
     is set to the literal string ``"no_issue"`` regardless of other active
-    status flags.
+    status flags.  The status is resolved once per distinct combination of
+    active flags rather than once per row.
 
     Parameters
     ----------
@@ -117,50 +275,118 @@ def initialize_status(
         minimal status from the global order, ``ERROR`` raises ``ValueError``.
     """
 
-    df = _normalise_activity_columns(activities.copy())
+    return initialize_status_profiles(
+        activities, {"": status}, empty_fallback
+    )[""]
 
-    if Cols.NO_ISSUE in df.columns:
-        # Ensure boolean dtype if ``no_issue`` is provided by the caller
-        df[Cols.NO_ISSUE] = df[Cols.NO_ISSUE].astype(bool)
+
+def initialize_status_profiles(
+    activities: pd.DataFrame,
+    profiles: Dict[str, StatusAPI],
+    empty_fallback: str,
+) -> Dict[str, pd.DataFrame]:
+    """Run :func:`initialize_status` for several status profiles at once.
+
+    Column normalisation and flag evaluation happen once for all profiles;
+    only the per-pattern status lookup is repeated for each profile.
+
+    Parameters
+    ----------
+    activities:
+        Raw activities dataframe.
+    profiles:
+        Mapping from profile name to its compiled :class:`StatusAPI`, e.g. as
+        returned by :func:`status_api.load_status_profiles`.
+    empty_fallback:
+        See :func:`initialize_status`.
+
+    Returns
+    -------
+    dict
+        Initialised activity table per profile name.
+    """
+
+    base = _prepare_status_input(activities)
+    inverse, patterns = _flag_patterns(base)
+    result: Dict[str, pd.DataFrame] = {}
+    for name, status in profiles.items():
+        resolved = np.array(
+            [_resolve_pattern(p, status, empty_fallback) for p in patterns],
+            dtype=object,
+        )
+        df = base if len(profiles) == 1 else base.copy(deep=False)
+        df[Cols.FILTERED_INIT] = resolved[inverse]
+        result[name] = df
+    return result
+
+
+def sort_once(df: pd.DataFrame, keys: Union[str, List[str]]) -> pd.DataFrame:
+    """Return *df* ordered by *keys* with a fresh ``RangeIndex``.
+
+    Frames that are already ordered are returned without sorting, so a table
+    sorted once up front keeps flowing through later stages without repeated
+    ``O(n log n)`` sorts and full-frame copies.  The sort is stable, making
+    the output deterministic for duplicated keys.
+    """
+
+    key_list = [keys] if isinstance(keys, str) else list(keys)
+    if len(key_list) == 1:
+        ordered = df[key_list[0]].is_monotonic_increasing
     else:
-        # Derive ``no_issue`` when not supplied by checking for active flags
-        df[Cols.NO_ISSUE] = ~df[STATUS_FLAGS].any(axis=1)
+        ordered = pd.MultiIndex.from_frame(df[key_list]).is_monotonic_increasing
+    if ordered:
+        if isinstance(df.index, pd.RangeIndex) and df.index.start == 0 and (
+            df.index.step == 1
+        ):
+            return df
+        return df.reset_index(drop=True)
+    return df.sort_values(key_list, kind="stable", ignore_index=True)
 
-    def _compute(row: pd.Series) -> str:
-        # ``no_issue`` rows take precedence over all other status flags
-        if row.get(Cols.NO_ISSUE, False):
-            return Cols.NO_ISSUE
-        active_fields = [f for f in STATUS_FLAGS if row.get(f, False)]
-        valid = [f for f in active_fields if f in status.condition_fields]
-        if valid:
-            return status.get_min(valid)
-        if empty_fallback.upper() == "GLOBAL_MIN":
-            return status.status_list[21]
-        raise ValueError("no active status flags")
-
-    df[Cols.FILTERED_INIT] = df.apply(_compute, axis=1)
-    return df
+
+def _status_lookup(activities: pd.DataFrame) -> Optional[pd.Series]:
+    """Return ``Filtered.init`` indexed by activity ID when IDs are unique."""
+
+    ids = pd.Index(activities[Cols.ACTIVITY_ID])
+    if not ids.is_unique:
+        return None
+    return pd.Series(activities[Cols.FILTERED_INIT].to_numpy(), index=ids)
 
 
 def initialize_pairs(
     pairs: pd.DataFrame, activities: pd.DataFrame, status: StatusAPI
 ) -> pd.DataFrame:
-    """Attach initial statuses from *activities* to *pairs* and compute ``Filtered``."""
-
-    left = pairs.merge(
-        activities[[Cols.ACTIVITY_ID, Cols.FILTERED_INIT]],
-        left_on=Cols.ACTIVITY_ID1,
-        right_on=Cols.ACTIVITY_ID,
-        how="left",
-    ).rename(columns={Cols.FILTERED_INIT: "Filtered1"})
-    left = left.drop(columns=[Cols.ACTIVITY_ID])
-    merged = left.merge(
-        activities[[Cols.ACTIVITY_ID, Cols.FILTERED_INIT]],
-        left_on=Cols.ACTIVITY_ID2,
-        right_on=Cols.ACTIVITY_ID,
-        how="left",
-    ).rename(columns={Cols.FILTERED_INIT: "Filtered2"})
-    merged = merged.drop(columns=[Cols.ACTIVITY_ID])
+    """Attach initial statuses from *activities* to *pairs* and compute ``Filtered``.
+
+    The row order of *pairs* is preserved.  When activity IDs are unique the
+    statuses are attached through an indexed lookup instead of two merges.
+    """
+
+    lookup = _status_lookup(activities)
+    same_dtype = (
+        pairs[Cols.ACTIVITY_ID1].dtype == activities[Cols.ACTIVITY_ID].dtype
+        and pairs[Cols.ACTIVITY_ID2].dtype == activities[Cols.ACTIVITY_ID].dtype
+    )
+    if lookup is not None and same_dtype and Cols.ACTIVITY_ID not in pairs.columns:
+        merged = pairs.assign(
+            Filtered1=lookup.reindex(pairs[Cols.ACTIVITY_ID1]).to_numpy(),
+            Filtered2=lookup.reindex(pairs[Cols.ACTIVITY_ID2]).to_numpy(),
+        )
+        merged.index = pd.RangeIndex(len(merged))
+    else:
+        left = pairs.merge(
+            activities[[Cols.ACTIVITY_ID, Cols.FILTERED_INIT]],
+            left_on=Cols.ACTIVITY_ID1,
+            right_on=Cols.ACTIVITY_ID,
+            how="left",
+        ).rename(columns={Cols.FILTERED_INIT: "Filtered1"})
+        left = left.drop(columns=[Cols.ACTIVITY_ID])
+        merged = left.merge(
+            activities[[Cols.ACTIVITY_ID, Cols.FILTERED_INIT]],
+            left_on=Cols.ACTIVITY_ID2,
+            right_on=Cols.ACTIVITY_ID,
+            how="left",
+        ).rename(columns={Cols.FILTERED_INIT: "Filtered2"})
+        merged = merged.drop(columns=[Cols.ACTIVITY_ID])
     merged[Cols.FILTERED] = merged.apply(
         lambda r: status.pair(r["Filtered1"], r["Filtered2"]), axis=1
     )
@@ -185,29 +411,65 @@ def ensure_count_columns(df: pd.DataFrame) -> pd.DataFrame:
     -------
     pandas.DataFrame
         Original dataframe with any missing count columns added and filled with
-        zeros.  A copy is returned only if new columns are created.
+        zeros.  A shallow copy sharing the existing columns is returned only if
+        new columns are created.
     """
 
     missing = [c for c in COUNT_COLUMNS if c not in df.columns]
     if not missing:
         return df
-    result = df.copy()
+    result = df.copy(deep=False)
     for col in missing:
         result[col] = 0
     return result
 
 
-def _aggregate(df: pd.DataFrame, group_col: str, status: StatusAPI) -> pd.DataFrame:
+def count_columns_of(columns: Iterable[str]) -> List[str]:
+    """Return the count columns among *columns*.
+
+    The columns of :data:`COUNT_COLUMNS` come first, followed by the count
+    columns of other measurement types in their order of appearance.
+    """
+
+    prefixes = tuple(f"{prefix}_" for prefix in COUNT_PREFIXES)
+    present = list(dict.fromkeys(c for c in columns if str(c).startswith(prefixes)))
+    return [c for c in COUNT_COLUMNS if c in present] + [
+        c for c in present if c not in COUNT_COLUMNS
+    ]
+
+
+def hash_buckets(values: pd.Series | np.ndarray, buckets: int) -> np.ndarray:
+    """Return a stable hash bucket in ``range(buckets)`` for every value.
+
+    Values are hashed as strings with pandas' fixed-key hash, so buckets do
+    not depend on the process, the platform or the dtype of *values*.
+    """
+
+    series = pd.Series(np.asarray(values, dtype=object)).astype(str)
+    hashes = pd.util.hash_pandas_object(series, index=False).to_numpy()
+    return (hashes % np.uint64(buckets)).astype(np.int64)
+
+
+def _aggregate(
+    df: pd.DataFrame, group_col: str, status: StatusAPI, partitions: int = 1
+) -> pd.DataFrame:
     df = ensure_count_columns(df)
+    if partitions > 1 and len(df) > 1:
+        # Groups never straddle hash partitions, so aggregating them one at a
+        # time and restoring the key order gives the unpartitioned result.
+        bucket = hash_buckets(df[group_col], partitions)
+        parts = [
+            _aggregate(df.iloc[rows], group_col, status)
+            for rows in (np.flatnonzero(bucket == p) for p in range(partitions))
+            if len(rows)
+        ]
+        return sort_once(pd.concat(parts, ignore_index=True), group_col)
     return (
         df.groupby(group_col)
         .agg(
             {
                 Cols.FILTERED: lambda s: _agg_filtered(status, s),
-                Cols.INDEPENDENT_IC50: "sum",
-                Cols.NON_INDEPENDENT_IC50: "sum",
-                Cols.INDEPENDENT_KI: "sum",
-                Cols.NON_INDEPENDENT_KI: "sum",
+                **{col: "sum" for col in count_columns_of(df.columns)},
             }
         )
         .rename(columns={Cols.FILTERED: Cols.FILTERED_NEW})
@@ -215,6 +477,107 @@ def _aggregate(df: pd.DataFrame, group_col: str, status: StatusAPI) -> pd.DataFr
     )
 
 
+def _partial_filtered(status: StatusAPI, series: pd.Series) -> Optional[str]:
+    statuses = [s for s in series if isinstance(s, str) and s in status.order_map]
+    return status.get_max(statuses) if statuses else None
+
+
+def partial_aggregate(
+    df: pd.DataFrame, group_col: str, status: StatusAPI
+) -> pd.DataFrame:
+    """Aggregate one partition of *df* for a later :func:`merge_aggregates`.
+
+    Like :func:`_aggregate`, but groups without a known status get ``None``
+    instead of raising, since another partition may contribute one.
+    """
+
+    df = ensure_count_columns(df)
+    return (
+        df.groupby(group_col)
+        .agg(
+            {
+                Cols.FILTERED: lambda s: _partial_filtered(status, s),
+                **{col: "sum" for col in count_columns_of(df.columns)},
+            }
+        )
+        .rename(columns={Cols.FILTERED: Cols.FILTERED_NEW})
+        .reset_index()
+    )
+
+
+def merge_aggregates(
+    parts: Iterable[pd.DataFrame], group_col: str, status: StatusAPI
+) -> pd.DataFrame:
+    """Combine :func:`partial_aggregate` results into the :func:`_aggregate` one.
+
+    The maximum of the partial maxima by status order is the maximum of the
+    group, and sums of partial sums are the group sums.
+    """
+
+    merged = pd.concat(list(parts), ignore_index=True)
+    merged = merged.rename(columns={Cols.FILTERED_NEW: Cols.FILTERED})
+    return _aggregate(merged, group_col, status)
+
+
+def _dense_codes(values: pd.Series | np.ndarray) -> Tuple[np.ndarray, int]:
+    """Return dense integer codes of *values* with all missing values equal.
+
+    Mirrors the factorisation used by :meth:`pandas.DataFrame.duplicated`.
+    """
+
+    codes, uniques = pd.factorize(values)
+    return codes.astype(np.int64) + 1, len(uniques) + 1
+
+
+def _unify_pair_halves(pairs: pd.DataFrame, shared: List[str]) -> pd.DataFrame:
+    """Stack both activity ends of *pairs* into one deduplicated table.
+
+    Equivalent to concatenating the ``activity_chembl_id1`` and
+    ``activity_chembl_id2`` halves, calling ``drop_duplicates()`` and dropping
+    empty activity IDs, but duplicates are detected on an ``int64`` key built
+    from integer-coded columns.  The columns shared by both halves are coded
+    once per pair rather than once per half, and only the surviving rows are
+    materialised, so the pair table is never doubled in memory.
+    """
+
+    n = len(pairs)
+    ids = pd.concat([pairs[Cols.ACTIVITY_ID1], pairs[Cols.ACTIVITY_ID2]])
+    ids = ids.reset_index(drop=True)
+
+    row_codes = np.zeros(n, dtype=np.int64)
+    for col in shared:
+        codes, size = _dense_codes(pairs[col])
+        row_codes, _ = _dense_codes(row_codes * size + codes)
+        row_codes -= 1
+    id_codes, _ = _dense_codes(ids)
+    keys = id_codes * (int(row_codes.max(initial=0)) + 1) + np.tile(row_codes, 2)
+
+    keep = ~pd.Series(keys).duplicated().to_numpy()
+    keep &= (ids.notna() & (ids != "")).to_numpy()
+    positions = np.flatnonzero(keep)
+    rows = np.where(positions < n, positions, positions - n)
+
+    # Gather column by column so the shared columns are not first copied
+    # into a consolidated block.
+    columns = {Cols.ACTIVITY_ID: ids.iloc[positions].reset_index(drop=True)}
+    for col in shared:
+        columns[col] = pairs[col].iloc[rows].reset_index(drop=True)
+    return pd.DataFrame(columns)
+
+
+# Pair columns describing each activity of a pair in ``activity_from_pairs``.
+PAIR_ACTIVITY_COLUMNS: List[str] = [
+    Cols.TESTITEM_ID,
+    Cols.TARGET_ID,
+    Cols.MEASUREMENT_TYPE,
+    Cols.FILTERED,
+    Cols.INDEPENDENT_IC50,
+    Cols.NON_INDEPENDENT_IC50,
+    Cols.INDEPENDENT_KI,
+    Cols.NON_INDEPENDENT_KI,
+]
+
+
 def activity_from_pairs(
     pairs: pd.DataFrame, init_status: pd.DataFrame, status: StatusAPI
 ) -> pd.DataFrame:
@@ -247,79 +610,33 @@ def activity_from_pairs(
     pandas.DataFrame
         Deduplicated list of activities merged with ``InitializeStatus`` and
         containing the minimal set of columns required for later aggregation
-        steps.  The table includes ``Filtered.init``, ``Filtered.new`` and the
-        final ``Filtered`` value.
+        steps, ordered by activity ID.  The table includes ``Filtered.init``,
+        ``Filtered.new`` and the final ``Filtered`` value.
 
     """
 
     # ``pairs`` may lack canonical column names when sourced from older
     # pipelines.  Accept common fallbacks and normalise them to the expected
     # names.  This avoids ``KeyError`` when selecting ``cols`` below.
-    rename_map: Dict[str, str] = {}
-    if Cols.TESTITEM_ID not in pairs.columns:
-        for alt in (
-            "test_item.id",
-            "testitem_id",
-            "molecule_chembl_id",
-            "molecule_id",
-        ):
-            if alt in pairs.columns:
-                rename_map[alt] = Cols.TESTITEM_ID
-                break
-    if Cols.MEASUREMENT_TYPE not in pairs.columns:
-        # the column is historically misspelled; also accept ``standard_type``
-        for alt in ("measurement_type", "standard_type"):
-            if alt in pairs.columns:
-                rename_map[alt] = Cols.MEASUREMENT_TYPE
-                break
+    rename_map = _legacy_rename_map(pairs.columns, PAIR_LEGACY_NAMES)
     if rename_map:
         pairs = pairs.rename(columns=rename_map)
 
-    cols = [
-        Cols.ACTIVITY_ID1,
-        Cols.TESTITEM_ID,
-        Cols.TARGET_ID,
-        Cols.MEASUREMENT_TYPE,
-        Cols.FILTERED,
-        Cols.INDEPENDENT_IC50,
-        Cols.NON_INDEPENDENT_IC50,
-        Cols.INDEPENDENT_KI,
-        Cols.NON_INDEPENDENT_KI,
-    ]
+    cols = [Cols.ACTIVITY_ID1, *PAIR_ACTIVITY_COLUMNS]
     missing = [c for c in cols if c not in pairs.columns]
     if missing:
         raise KeyError(f"required columns {missing} not found in pairs table")
 
-    left = pairs[cols].rename(columns={Cols.ACTIVITY_ID1: Cols.ACTIVITY_ID})
-    right = pairs[
-        [
-            Cols.ACTIVITY_ID2,
-            Cols.TESTITEM_ID,
-            Cols.TARGET_ID,
-            Cols.MEASUREMENT_TYPE,
-            Cols.FILTERED,
-            Cols.INDEPENDENT_IC50,
-            Cols.NON_INDEPENDENT_IC50,
-            Cols.INDEPENDENT_KI,
-            Cols.NON_INDEPENDENT_KI,
-        ]
-    ].rename(columns={Cols.ACTIVITY_ID2: Cols.ACTIVITY_ID})
-    unified = pd.concat([left, right], ignore_index=True).drop_duplicates()
-    unified = unified[
-        unified[Cols.ACTIVITY_ID].notna() & (unified[Cols.ACTIVITY_ID] != "")
-    ]
+    unified = _unify_pair_halves(pairs, cols[1:])
+    # Order by activity ID while the table is still narrow; the left merge
+    # below preserves this order for the wide result.
+    unified = sort_once(unified, Cols.ACTIVITY_ID)
 
     # ``InitializeStatus`` already contains the count columns aggregated above.
     # Remove them to avoid duplicated ``_x``/``_y`` suffixed columns after the
-    # merge.  Missing columns are ignored to keep the function robust with
-    # diverse inputs.
-    drop_cols = [
-        Cols.INDEPENDENT_IC50,
-        Cols.NON_INDEPENDENT_IC50,
-        Cols.INDEPENDENT_KI,
-        Cols.NON_INDEPENDENT_KI,
-    ]
-    status_cols = init_status.drop(columns=drop_cols, errors="ignore")
+    # merge; counts of further measurement types are attached to the activity
+    # table by :func:`aggregate_entities`.
+    status_cols = init_status.drop(columns=count_columns_of(init_status.columns))
     merged = unified.merge(status_cols, on=Cols.ACTIVITY_ID, how="left")
 
     # The pair table encodes the newly computed status in ``Filtered``.  For
@@ -344,18 +661,66 @@ def activity_from_pairs(
     return merged
 
 
+def resolve_entities(entities: Optional[Iterable[str]] = None) -> List[str]:
+    """Return the requested entity tables in :data:`ENTITY_KEYS` order.
+
+    ``None`` selects all of them; unknown names raise ``KeyError``.
+    """
+
+    if entities is None:
+        return list(ENTITY_KEYS)
+    wanted = set(entities)
+    unknown = sorted(wanted - set(ENTITY_KEYS))
+    if unknown:
+        raise KeyError(f"unknown entity tables {unknown}")
+    return [name for name in ENTITY_KEYS if name in wanted]
+
+
+def needs_pairs(entities: Optional[Iterable[str]] = None) -> bool:
+    """Whether computing ``entities`` requires the pair table."""
+
+    return bool(PAIR_ENTITIES.intersection(resolve_entities(entities)))
+
+
+def _attach_activity_counts(
+    activity: pd.DataFrame, activity_table: pd.DataFrame
+) -> pd.DataFrame:
+    """Add the count columns of *activity_table* the pairs do not carry.
+
+    Counts derived per activity (see :mod:`counts`) are taken as they are
+    rather than summed over the pair-derived rows of each activity.
+    """
+
+    extra = [
+        c for c in count_columns_of(activity_table.columns) if c not in activity.columns
+    ]
+    if not extra:
+        return activity
+    counts = activity_table.drop_duplicates(Cols.ACTIVITY_ID).set_index(
+        Cols.ACTIVITY_ID
+    )[extra]
+    result = activity.copy(deep=False)
+    for col in extra:
+        values = result[Cols.ACTIVITY_ID].map(counts[col])
+        result[col] = values.fillna(0).astype(counts[col].dtype)
+    return result
+
+
 def aggregate_entities(
-    pair_table: pd.DataFrame,
+    pair_table: pd.DataFrame | None,
     activity_table: pd.DataFrame,
     status: StatusAPI,
     act_pairs: pd.DataFrame | None = None,
+    partitions: int = 1,
+    entities: Optional[Iterable[str]] = None,
 ) -> Dict[str, pd.DataFrame]:
     """Return aggregated tables for all required entities.
 
     Parameters
     ----------
     pair_table:
-        Pairwise activity table produced by :func:`initialize_pairs`.
+        Pairwise activity table produced by :func:`initialize_pairs`.  Only
+        needed for the ``activity`` table when ``act_pairs`` is not given.
     activity_table:
         Activity table with initial status information.
     status:
@@ -364,17 +729,44 @@ def aggregate_entities(
         Optional precomputed table returned by :func:`activity_from_pairs`.
         Providing this avoids recomputing the table when it is already
         available.
+    partitions:
+        Number of hash partitions of the group keys aggregated one at a
+        time, bounding the group-by buffers to one partition.
+    entities:
+        Names from :data:`ENTITY_KEYS` to compute; defaults to all.  Tables
+        that are neither requested nor needed by a requested table are
+        skipped.
     """
 
-    if act_pairs is None:
-        act_pairs = activity_from_pairs(pair_table, activity_table, status)
-    activity = _aggregate(act_pairs, Cols.ACTIVITY_ID, status)
+    names = resolve_entities(entities)
+    result: Dict[str, pd.DataFrame] = {}
+    if "activity" in names:
+        if act_pairs is None:
+            if pair_table is None:
+                raise ValueError("the activity table requires the pair table")
+            act_pairs = activity_from_pairs(pair_table, activity_table, status)
+        activity = _aggregate(act_pairs, Cols.ACTIVITY_ID, status, partitions)
+        result["activity"] = _attach_activity_counts(activity, activity_table)
+
+    # Shallow copies with renamed or added columns; the activity columns are
+    # shared rather than duplicated for every entity level.
+    act_df = activity_table.copy(deep=False)
+    act_df.rename(columns={Cols.FILTERED_INIT: Cols.FILTERED}, inplace=True)
+    for name in ("assay", "document"):
+        if name in names:
+            result[name] = _aggregate(act_df, ENTITY_KEYS[name], status, partitions)
+
+    if not SYSTEM_ENTITIES.intersection(names):
+        return result
+    system = _aggregate(with_system_id(act_df), Cols.SYSTEM_ID, status, partitions)
+    result.update(system_entities(system, status, names, partitions))
+    return result
 
-    act_df = activity_table.rename(columns={Cols.FILTERED_INIT: Cols.FILTERED})
-    assay = _aggregate(act_df, Cols.ASSAY_ID, status)
-    document = _aggregate(act_df, Cols.DOCUMENT_ID, status)
 
-    sys_df = act_df.copy()
+def with_system_id(act_df: pd.DataFrame) -> pd.DataFrame:
+    """Return a shallow copy of *act_df* with the ``system_id`` column."""
+
+    sys_df = act_df.copy(deep=False)
     sys_df[Cols.SYSTEM_ID] = (
         sys_df[Cols.TESTITEM_ID].astype(str)
         + "_"
@@ -382,28 +774,105 @@ def aggregate_entities(
         + "_"
         + sys_df[Cols.MEASUREMENT_TYPE].astype(str)
     )
-    system = _aggregate(sys_df, Cols.SYSTEM_ID, status)
-
-    ti_df = system.rename(columns={Cols.FILTERED_NEW: Cols.FILTERED}).copy()
-    ti_df[[Cols.TESTITEM_ID, Cols.TARGET_ID, Cols.TYPE]] = ti_df[
-        Cols.SYSTEM_ID
-    ].str.split("_", expand=True)
-    testitem = _aggregate(ti_df, Cols.TESTITEM_ID, status)
-
-    tar_df = system.rename(columns={Cols.FILTERED_NEW: Cols.FILTERED}).copy()
-    tar_df[[Cols.TESTITEM_ID, Cols.TARGET_ID, Cols.TYPE]] = tar_df[
-        Cols.SYSTEM_ID
-    ].str.split("_", expand=True)
-    target = _aggregate(tar_df, Cols.TARGET_ID, status)
-
-    return {
-        "activity": activity,
-        "assay": assay,
-        "document": document,
-        "system": system,
-        "testitem": testitem,
-        "target": target,
-    }
+    return sys_df
+
+
+def system_entities(
+    system: pd.DataFrame,
+    status: StatusAPI,
+    names: Iterable[str],
+    partitions: int = 1,
+) -> Dict[str, pd.DataFrame]:
+    """Return the ``system``, ``testitem`` and ``target`` tables among *names*.
+
+    The test item and target levels aggregate the ``system`` table.
+    """
+
+    names = list(names)
+    result: Dict[str, pd.DataFrame] = {}
+    if "system" in names:
+        result["system"] = system
+
+    # Test item and target levels share one split of the system IDs.
+    if {"testitem", "target"}.intersection(names):
+        parts_df = system.copy(deep=False)
+        parts_df.rename(columns={Cols.FILTERED_NEW: Cols.FILTERED}, inplace=True)
+        parts_df[[Cols.TESTITEM_ID, Cols.TARGET_ID, Cols.TYPE]] = parts_df[
+            Cols.SYSTEM_ID
+        ].str.split("_", expand=True)
+        for name in ("testitem", "target"):
+            if name in names:
+                result[name] = _aggregate(
+                    parts_df, ENTITY_KEYS[name], status, partitions
+                )
+    return result
+
+
+def classify_tables(
+    activities: pd.DataFrame,
+    status: StatusAPI,
+    pairs: pd.DataFrame | Callable[[], pd.DataFrame] | None = None,
+    *,
+    entities: Optional[Iterable[str]] = None,
+    empty_fallback: str = "GLOBAL_MIN",
+    prune_orphans: bool = False,
+) -> Dict[str, pd.DataFrame]:
+    """Classify in memory and return the requested tables without writing.
+
+    Only the requested entity tables and the stages they depend on are
+    computed: the pair stages run only when ``activity`` is requested, so
+    e.g. ``entities=["assay", "target"]`` never touches ``pairs``.
+
+    Parameters
+    ----------
+    activities:
+        Raw activities dataframe.
+    status:
+        :class:`StatusAPI` instance.
+    pairs:
+        Raw pairs dataframe, or a callable loading it on demand.
+    entities:
+        Names from :data:`ENTITY_KEYS`; defaults to all.
+    empty_fallback:
+        See :func:`initialize_status`.
+    prune_orphans:
+        Drop pairs of activities missing from ``activities`` before the pair
+        stages and return them as ``OrphanPairs`` (see :mod:`orphans`).
+
+    Returns
+    -------
+    dict
+        ``InitializeStatus``, ``OrphanPairs``, ``InitializePairs`` and
+        ``ActivityInitializeStatus`` when computed, followed by the entity
+        tables in :data:`ENTITY_KEYS` order, each sorted by its key.
+    """
+
+    names = resolve_entities(entities)
+    activities = sort_once(activities, Cols.ACTIVITY_ID)
+    init = sort_once(
+        initialize_status(activities, status, empty_fallback), Cols.ACTIVITY_ID
+    )
+    tables: Dict[str, pd.DataFrame] = {"InitializeStatus": init}
+    act_pairs = None
+    if needs_pairs(names):
+        if pairs is None:
+            raise ValueError("the activity table requires the pairs")
+        raw_pairs = pairs() if callable(pairs) else pairs
+        if prune_orphans:
+            raw_pairs, tables["OrphanPairs"] = split_orphan_pairs(raw_pairs, init)
+        pair_keys = [Cols.ACTIVITY_ID1, Cols.ACTIVITY_ID2]
+        pair_table = sort_once(
+            initialize_pairs(sort_once(raw_pairs, pair_keys), init, status), pair_keys
+        )
+        act_pairs = sort_once(
+            activity_from_pairs(pair_table, init, status), Cols.ACTIVITY_ID
+        )
+        tables["InitializePairs"] = pair_table
+        tables["ActivityInitializeStatus"] = act_pairs
+    aggregated = aggregate_entities(None, init, status, act_pairs, entities=names)
+    for name, df in aggregated.items():
+        tables[name] = sort_once(df, ENTITY_KEYS[name])
+    return tables
 
 
 # ---------------------------------------------------------------------------
@@ -412,12 +881,47 @@ def write_csv_with_meta(
     path: Path,
     inputs: List[Path],
     version: str,
-) -> None:
-    """Write ``df`` to ``path`` and create accompanying ``.meta.yaml``."""
+    *,
+    compression: Optional[str] = None,
+    threads: Optional[int] = None,
+    extra: Optional[Dict[str, object]] = None,
+) -> Path:
+    """Write ``df`` to ``path`` and create accompanying ``.meta.yaml``.
+
+    Both files are written atomically through a temporary file and rename.
+
+    Parameters
+    ----------
+    df:
+        Table to write.
+    path:
+        Logical output path ending in ``.csv``.  Compressed tables get the
+        codec suffix appended, e.g. ``activity.csv.gz``; the metadata file is
+        always named after ``path``.
+    inputs, version:
+        Provenance recorded in the metadata.
+    compression:
+        ``"gzip"``, ``"zstd"`` or ``None`` (see :mod:`compression`).
+    threads:
+        Compression threads; defaults to the number of CPUs.
+    extra:
+        Additional entries for the metadata, e.g. diagnostic counts.
+
+    Returns
+    -------
+    pathlib.Path
+        Path of the written data file.
+    """
 
     path.parent.mkdir(parents=True, exist_ok=True)
     csv_bytes = df.to_csv(index=False).encode("utf-8")
-    path.write_bytes(csv_bytes)
+    payload = compress_bytes(csv_bytes, compression, threads=threads)
+    target = compressed_path(path, compression)
+    atomic_write_bytes(target, payload)
+    # Drop variants from earlier runs so readers cannot pick up stale data.
+    for stale in table_variants(path):
+        if stale != target and stale.exists():
+            stale.unlink()
 
     meta = {
         "generated": datetime.utcnow().isoformat(),
@@ -427,5 +931,14 @@ def write_csv_with_meta(
         "cols": int(df.shape[1]),
         "sha256": hashlib.sha256(csv_bytes).hexdigest(),
     }
+    if payload is not csv_bytes:
+        meta["file"] = target.name
+        meta["compression"] = compression
+        meta["sha256_compressed"] = hashlib.sha256(payload).hexdigest()
+    if extra:
+        meta.update(extra)
     meta_path = path.with_suffix(".meta.yaml")
-    meta_path.write_text(yaml.safe_dump(meta))
+    atomic_write_bytes(
+        meta_path, yaml.safe_dump(meta, sort_keys=False).encode("utf-8")
+    )
+    return target
@@ -0,0 +1,122 @@
+"""Overlap input parsing and output writes with computation.
+
+Reading ``pairs.csv`` is the largest single I/O cost of a run and does not
+depend on the activity status computation, and writing a finished table
+does not block the next stage.  This module provides two small helpers used
+by :func:`main.classify_directory`:
+
+* :func:`prefetch` starts a loader on a thread pool and returns a callable
+  that waits for its result, so ``initialize_status`` can start as soon as
+  the activities are parsed while the pairs are still being read;
+* :class:`BackgroundWriter` runs table writes on a background thread in
+  submission order while the caller continues with the next stage.
+
+The pandas CSV parser, the CSV writer and ``zlib`` release the GIL for large
+parts of their work, so the threads overlap with computation even in one
+process.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import cache
+from types import TracebackType
+from typing import Any, Callable, Iterator, List, Optional, Type, TypeVar
+
+T = TypeVar("T")
+
+
+@contextmanager
+def reader_pool(
+    enabled: bool = True, workers: int = 2
+) -> Iterator[Optional[ThreadPoolExecutor]]:
+    """Yield a thread pool for :func:`prefetch`, or ``None`` when disabled.
+
+    Loads that were never waited for are cancelled on exit.
+    """
+
+    if not enabled:
+        yield None
+        return
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="reader")
+    try:
+        yield pool
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def prefetch(
+    pool: Optional[ThreadPoolExecutor], loader: Callable[[], T]
+) -> Callable[[], T]:
+    """Start ``loader`` on ``pool`` and return a callable yielding its result.
+
+    Without a pool the loader runs lazily on the first call instead.  In both
+    cases it runs at most once and exceptions surface on the call.
+    """
+
+    if pool is None:
+        return cache(loader)
+    future = pool.submit(loader)
+    return future.result
+
+
+class BackgroundWriter:
+    """Run writes on one background thread, in submission order.
+
+    Use as a context manager; leaving it waits for all pending writes and
+    re-raises the first write error.
+
+    Parameters
+    ----------
+    enabled:
+        Run writes synchronously in the calling thread when ``False``.
+    """
+
+    def __init__(self, enabled: bool = True) -> None:
+        self._pool = (
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="writer")
+            if enabled
+            else None
+        )
+        self._pending: List[Future] = []
+
+    def submit(self, write: Callable[..., Any], *args: Any, **kwargs: Any) -> None:
+        """Schedule ``write(*args, **kwargs)``.
+
+        The arguments must not be modified until the writer is closed.
+        """
+
+        if self._pool is None:
+            write(*args, **kwargs)
+            return
+        self._pending.append(self._pool.submit(write, *args, **kwargs))
+
+    def wait(self) -> None:
+        """Block until all pending writes finished; raise the first error."""
+
+        pending, self._pending = self._pending, []
+        errors = [f.exception() for f in pending]
+        for error in errors:
+            if error is not None:
+                raise error
+
+    def __enter__(self) -> "BackgroundWriter":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        try:
+            if exc_type is None:
+                self.wait()
+            else:
+                # Let started writes finish; the original error wins.
+                for future in self._pending:
+                    future.exception()
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
@@ -0,0 +1,349 @@
+"""Memory-budget aware execution planning.
+
+:func:`plan_execution` estimates the working memory of the pair and
+aggregation stages from the sizes of the input files, their ``.meta.yaml``
+row counts and the in-memory width of a small sample of rows.  For every
+stage it then picks one of two modes for a given ``--max-memory`` budget:
+
+``memory``
+    Run the stage on the whole table at once.
+``chunked``
+    Run the stage on hash partitions one after another and keep the partial
+    results in memory.  Only the working set of one partition is held on
+    top of the stage output.
+
+The stage outputs are checkpointed and read whole by the following stages,
+so they stay in memory either way and partial results are not spilled to
+disk.  The ``chunked`` mode produces exactly the same tables as
+``memory``: pairs
+are split into contiguous row ranges, activity-level rows and aggregates by
+hash partitions of their key (see :func:`pipeline.hash_buckets`).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import logging
+import math
+from pathlib import Path
+import re
+from typing import Dict, Iterable, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from compression import detect_compression, read_table, resolve_table
+from constants import Cols
+from pipeline import (
+    activity_from_pairs,
+    aggregate_entities,
+    hash_buckets,
+    initialize_pairs,
+    sort_once,
+)
+from status_api import StatusAPI
+
+logger = logging.getLogger(__name__)
+
+MODES = ("memory", "chunked")
+
+# Rows sampled to measure the in-memory width of a table.
+SAMPLE_ROWS = 2000
+
+# Assumed compression ratio of compressed inputs without a row count.
+COMPRESSED_RATIO = 4.0
+
+# Working-set multipliers of the stages relative to the tables they read.
+# ``initialize_pairs`` holds its input, the merged copy and the row-wise
+# ``apply`` temporaries; ``activity_from_pairs`` doubles the pairs into
+# activity halves before merging the activity columns; ``aggregate_entities``
+# builds shallow copies plus the system IDs and group-by buffers.
+PAIRS_FACTOR = 2.5
+ACTIVITY_PAIRS_FACTOR = 1.5
+AGGREGATE_FACTOR = 2.0
+
+# Partitions hold at least this many input rows of their stage, and a stage
+# is split into at most ``MAX_PARTITIONS``; smaller partitions only add
+# per-partition overhead without lowering the working set much further.
+MIN_PARTITION_ROWS = 10_000
+MAX_PARTITIONS = 256
+
+_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+
+
+def parse_memory(value: str) -> int:
+    """Parse sizes such as ``"512M"``, ``"8G"`` or ``"1.5GB"`` into bytes."""
+
+    match = re.fullmatch(r"\s*([0-9.]+)\s*([KMGT]?)I?B?\s*", value.upper())
+    if not match:
+        raise ValueError(f"invalid memory size {value!r}")
+    return int(float(match.group(1)) * _UNITS[match.group(2)])
+
+
+def _format_bytes(size: float) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TiB"
+
+
+@dataclass
+class TableEstimate:
+    """Estimated size of one input table."""
+
+    name: str
+    rows: int
+    row_bytes: float
+
+    @property
+    def nbytes(self) -> float:
+        return self.rows * self.row_bytes
+
+
+def _meta_rows(path: Path) -> Optional[int]:
+    for meta in (
+        path.with_suffix(".meta.yaml"),
+        path.with_name(path.name + ".meta.yaml"),
+    ):
+        if meta.exists():
+            data = yaml.safe_load(meta.read_text()) or {}
+            if isinstance(data.get("rows"), int):
+                return int(data["rows"])
+    return None
+
+
+def estimate_table(path: Path, **read_kwargs: object) -> TableEstimate:
+    """Estimate rows and in-memory bytes per row of the CSV at ``path``.
+
+    The row count comes from the ``.meta.yaml`` sidecar when available and is
+    otherwise extrapolated from the file size and the CSV width of a sample.
+    """
+
+    path = resolve_table(path)
+    sample = read_table(path, nrows=SAMPLE_ROWS, **read_kwargs)
+    if sample.empty:
+        return TableEstimate(path.name, 0, 0.0)
+    row_bytes = float(sample.memory_usage(deep=True, index=False).sum()) / len(sample)
+    rows = _meta_rows(path)
+    if rows is None:
+        csv_row = len(sample.to_csv(index=False).encode("utf-8")) / len(sample)
+        size = path.stat().st_size
+        if detect_compression(path) is not None:
+            size *= COMPRESSED_RATIO
+        rows = max(len(sample), int(size / csv_row))
+    return TableEstimate(path.name, rows, row_bytes)
+
+
+@dataclass
+class StagePlan:
+    """Execution mode chosen for one stage."""
+
+    stage: str
+    mode: str = "memory"
+    partitions: int = 1
+    estimate: float = 0.0
+
+    def describe(self) -> str:
+        parts = f" x{self.partitions}" if self.partitions > 1 else ""
+        return f"{self.stage}: {self.mode}{parts} (~{_format_bytes(self.estimate)})"
+
+
+@dataclass
+class ExecutionPlan:
+    """Modes for ``initialize_pairs``, ``activity_from_pairs`` and aggregation."""
+
+    max_memory: Optional[int] = None
+    resident: float = 0.0
+    stages: Dict[str, StagePlan] = field(default_factory=dict)
+
+    def __getitem__(self, stage: str) -> StagePlan:
+        return self.stages.get(stage, StagePlan(stage))
+
+    def log(self) -> None:
+        """Log the plan at ``INFO`` level."""
+
+        budget = _format_bytes(self.max_memory) if self.max_memory else "unlimited"
+        logger.info(
+            "execution plan for %s budget, inputs ~%s:",
+            budget,
+            _format_bytes(self.resident),
+        )
+        for plan in self.stages.values():
+            logger.info("  %s", plan.describe())
+
+
+def _choose(
+    stage: str, estimate: float, output: float, available: float, rows: int
+) -> StagePlan:
+    """Pick the mode of one stage reading ``rows`` input rows.
+
+    The number of partitions never decreases as ``available`` shrinks.
+    """
+
+    if estimate <= available:
+        return StagePlan(stage, "memory", 1, estimate)
+    room = max(available - output, 0.0)
+    min_size = estimate / max(rows, 1) * MIN_PARTITION_ROWS
+    partitions = math.ceil(estimate / max(room, min_size, 1.0))
+    partitions = max(1, min(partitions, MAX_PARTITIONS, rows))
+    # Too few rows to split: run it whole despite the budget.
+    mode = "chunked" if partitions > 1 else "memory"
+    return StagePlan(stage, mode, partitions, estimate)
+
+
+def plan_execution(
+    input_dir: Path,
+    max_memory: Optional[int],
+    *,
+    pairs: bool = True,
+    **read_kwargs: object,
+) -> ExecutionPlan:
+    """Plan the pair and aggregation stages for ``max_memory`` bytes.
+
+    Parameters
+    ----------
+    input_dir:
+        Directory with ``activities.csv`` and ``pairs.csv``.
+    max_memory:
+        Memory budget in bytes; ``None`` runs every stage in memory.
+    pairs:
+        Whether the pair stages run; otherwise ``pairs.csv`` is not sampled
+        and only the aggregation is planned.
+    read_kwargs:
+        CSV options used to sample the inputs.
+    """
+
+    if max_memory is None:
+        return ExecutionPlan()
+    activities = estimate_table(input_dir / "activities.csv", **read_kwargs)
+    pairs_est = (
+        estimate_table(input_dir / "pairs.csv", **read_kwargs)
+        if pairs
+        else TableEstimate("pairs.csv", 0, 0.0)
+    )
+    # Two status columns per pair plus the ``Filtered`` result.
+    pairs_out = pairs_est.nbytes + pairs_est.rows * 3 * 8
+    # Up to two activity rows per pair, each with the activity columns.
+    act_rows = 2 * pairs_est.rows
+    act_out = act_rows * (activities.row_bytes + 8 * 6)
+    resident = activities.nbytes + pairs_est.nbytes
+
+    plan = ExecutionPlan(max_memory, resident)
+    stages = [
+        (
+            "initialize_pairs",
+            PAIRS_FACTOR * pairs_est.nbytes,
+            pairs_out,
+            pairs_est.rows,
+        ),
+        (
+            "activity_from_pairs",
+            ACTIVITY_PAIRS_FACTOR * act_out,
+            act_out,
+            act_rows,
+        ),
+        (
+            "aggregate_entities",
+            AGGREGATE_FACTOR * (activities.nbytes + act_out),
+            0,
+            activities.rows + act_rows,
+        ),
+    ]
+    if not pairs:
+        stages = stages[2:]
+    for stage, estimate, output, rows in stages:
+        plan.stages[stage] = _choose(
+            stage, estimate, output, max_memory - resident, rows
+        )
+        # Outputs stay resident for the following stages.
+        resident += output
+    if max_memory < plan.resident:
+        logger.warning(
+            "memory budget %s is below the estimated input size %s",
+            _format_bytes(max_memory),
+            _format_bytes(plan.resident),
+        )
+    return plan
+
+
+# ---------------------------------------------------------------------------
+def _row_ranges(n: int, partitions: int) -> Iterator[slice]:
+    bounds = np.linspace(0, n, min(partitions, max(n, 1)) + 1).astype(int)
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        if stop > start:
+            yield slice(start, stop)
+
+
+def run_initialize_pairs(
+    pairs: pd.DataFrame,
+    activities: pd.DataFrame,
+    status: StatusAPI,
+    plan: StagePlan,
+) -> pd.DataFrame:
+    """:func:`pipeline.initialize_pairs` executed according to ``plan``."""
+
+    if plan.partitions <= 1 or len(pairs) < 2:
+        return initialize_pairs(pairs, activities, status)
+    parts = [
+        initialize_pairs(pairs.iloc[rows], activities, status)
+        for rows in _row_ranges(len(pairs), plan.partitions)
+    ]
+    return pd.concat(parts, ignore_index=True)
+
+
+def run_activity_from_pairs(
+    pairs: pd.DataFrame,
+    init_status: pd.DataFrame,
+    status: StatusAPI,
+    plan: StagePlan,
+) -> pd.DataFrame:
+    """:func:`pipeline.activity_from_pairs` executed according to ``plan``.
+
+    Partition ``p`` holds every pair touching an activity of hash bucket
+    ``p`` and keeps only the rows of those activities, so deduplication and
+    row order within an activity match the unpartitioned result.
+    """
+
+    if plan.partitions <= 1 or len(pairs) < 2:
+        return activity_from_pairs(pairs, init_status, status)
+    n = plan.partitions
+    bucket1 = hash_buckets(pairs[Cols.ACTIVITY_ID1], n)
+    bucket2 = hash_buckets(pairs[Cols.ACTIVITY_ID2], n)
+    status_bucket = hash_buckets(init_status[Cols.ACTIVITY_ID], n)
+
+    def parts() -> Iterator[pd.DataFrame]:
+        for part in range(n):
+            touching = np.flatnonzero((bucket1 == part) | (bucket2 == part))
+            if not len(touching):
+                continue
+            result = activity_from_pairs(
+                pairs.iloc[touching],
+                init_status.iloc[np.flatnonzero(status_bucket == part)],
+                status,
+            )
+            own = hash_buckets(result[Cols.ACTIVITY_ID], n) == part
+            yield result.iloc[np.flatnonzero(own)]
+
+    return sort_once(pd.concat(list(parts()), ignore_index=True), Cols.ACTIVITY_ID)
+
+
+def run_aggregate_entities(
+    pair_table: Optional[pd.DataFrame],
+    activity_table: pd.DataFrame,
+    status: StatusAPI,
+    act_pairs: pd.DataFrame,
+    plan: StagePlan,
+    entities: Optional[Iterable[str]] = None,
+) -> Dict[str, pd.DataFrame]:
+    """:func:`pipeline.aggregate_entities` executed according to ``plan``."""
+
+    return aggregate_entities(
+        pair_table,
+        activity_table,
+        status,
+        act_pairs,
+        partitions=plan.partitions,
+        entities=entities,
+    )
@@ -0,0 +1,619 @@
+"""Polars lazy execution engine.
+
+The pandas pipeline in :mod:`pipeline` runs eagerly on one core and
+materialises every intermediate table.  This module implements
+``initialize_status``, ``initialize_pairs``, ``activity_from_pairs`` and
+``aggregate_entities`` as Polars lazy queries instead.  All requested
+outputs are collected together with :func:`polars.collect_all`, so the
+optimiser shares the common sub-plans, prunes unused columns and fuses the
+projections and aggregations of consecutive stages, running them on all
+cores.
+
+Status logic is expressed through join tables built from the
+:class:`StatusAPI` order rather than row-wise Python calls:
+
+* ``_order`` maps every status to its ``order``, used for pair statuses and
+  for the final activity status;
+* ``_rank`` maps every status to its position in the ordered status table,
+  so the worst status of a group is the one with the highest rank;
+* ``_next`` maps every status to the one following it.
+
+Only the resolution of the distinct status flag combinations calls back
+into :class:`StatusAPI`; there are at most a few hundred of them.
+
+Polars is optional.  Results are returned as pandas DataFrames and match
+the pandas engine, which remains the default.  Polars :data:`MIN_POLARS` or
+newer is required; the common sub-plan elimination of Polars 1.31 panics on
+the collected entity queries.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from constants import Cols
+from orphans import split_orphan_pairs
+from pipeline import (
+    ACTIVITY_LEGACY_NAMES,
+    COUNT_COLUMNS,
+    ENTITY_KEYS,
+    PAIR_ACTIVITY_COLUMNS,
+    PAIR_LEGACY_NAMES,
+    STATUS_FLAGS,
+    SYSTEM_ENTITIES,
+    _legacy_rename_map,
+    _resolve_pattern,
+    count_columns_of,
+    needs_pairs,
+    resolve_entities,
+)
+from status_api import StatusAPI
+
+try:  # pragma: no cover - optional dependency
+    import polars as pl
+except ImportError:  # pragma: no cover - optional dependency
+    pl = None
+
+# Execution engines selectable on the command line.
+ENGINES = ("pandas", "polars")
+
+# Oldest supported Polars release.
+MIN_POLARS = (2, 0)
+
+# Helper column restoring the input row order after joins.
+_ROW = "__row"
+
+# Status columns whose missing values are the ``None`` of ``StatusAPI.pair``
+# rather than ``NaN``.
+_NONE_COLUMNS = (Cols.FILTERED, Cols.FILTERED_NEW)
+
+_PAIR_ERROR = "unknown status in pair"
+_MAX_ERROR = "no matching statuses"
+_SPLIT_ERROR = "Columns must be same length as key"
+
+
+def _version() -> tuple:
+    return tuple(int(part) for part in pl.__version__.split(".")[:2])
+
+
+def available() -> bool:
+    """Whether a supported Polars release is installed."""
+
+    return pl is not None and _version() >= MIN_POLARS
+
+
+def _require() -> None:
+    if not available():
+        minimum = ".".join(map(str, MIN_POLARS))
+        raise ImportError(f"the polars engine requires 'polars>={minimum}'")
+
+
+# ---------------------------------------------------------------------------
+# Conversion
+def to_lazy(df: pd.DataFrame) -> "pl.LazyFrame":
+    """Return ``df`` as a Polars ``LazyFrame`` with missing values as null.
+
+    Columns are converted through NumPy, so pyarrow is not required.
+    """
+
+    _require()
+    columns = []
+    for name in df.columns:
+        series = df[name]
+        if series.dtype == object or isinstance(
+            series.dtype, pd.api.extensions.ExtensionDtype
+        ):
+            values = series.astype(object).where(series.notna(), None).tolist()
+            columns.append(pl.Series(str(name), values, strict=False))
+        else:
+            columns.append(pl.Series(str(name), series.to_numpy(), nan_to_null=True))
+    return pl.DataFrame(columns).lazy()
+
+
+def to_pandas(df: "pl.DataFrame") -> pd.DataFrame:
+    """Return the collected ``df`` as a pandas DataFrame.
+
+    Text and boolean columns with missing values become ``object`` columns
+    holding ``NaN`` like the pandas engine, or ``None`` in the pair status
+    columns.
+    """
+
+    data: Dict[str, np.ndarray] = {}
+    for series in df.get_columns():
+        if series.dtype.is_numeric() or (
+            series.dtype == pl.Boolean and not series.null_count()
+        ):
+            # Integers with nulls become floats with ``NaN``.
+            data[series.name] = series.to_numpy()
+            continue
+        values = np.array(series.to_list(), dtype=object)
+        values[pd.isna(values)] = None if series.name in _NONE_COLUMNS else np.nan
+        data[series.name] = values
+    return pd.DataFrame(data, columns=df.columns)
+
+
+def _names(lf: "pl.LazyFrame") -> List[str]:
+    return lf.collect_schema().names()
+
+
+def _sort(lf: "pl.LazyFrame", keys: str | List[str]) -> "pl.LazyFrame":
+    """Stable sort with missing values last, like :func:`pipeline.sort_once`."""
+
+    return lf.sort(keys, maintain_order=True, nulls_last=True)
+
+
+def _text_ids(lf: "pl.LazyFrame", *columns: str) -> "pl.LazyFrame":
+    """Cast the activity ID ``columns`` of ``lf`` to text for joining.
+
+    An ID column without any value arrives as ``f64``, and Polars refuses to
+    join it with a text column.
+    """
+
+    return lf.with_columns(pl.col(c).cast(pl.String) for c in columns)
+
+
+def _raise_if(message: str) -> Callable[["pl.Series"], "pl.Series"]:
+    def check(mask: "pl.Series") -> "pl.Series":
+        if mask.any():
+            raise ValueError(message)
+        return mask
+
+    return check
+
+
+def _fail_rows(lf: "pl.LazyFrame", mask: "pl.Expr", message: str) -> "pl.LazyFrame":
+    """Raise ``ValueError(message)`` on collection if ``mask`` holds anywhere."""
+
+    return lf.filter(~mask.map_batches(_raise_if(message), return_dtype=pl.Boolean))
+
+
+# ---------------------------------------------------------------------------
+# Status join tables
+def _order_table(status: StatusAPI, key: str, value: str) -> "pl.LazyFrame":
+    statuses = list(status.order_map)
+    return pl.LazyFrame(
+        {key: statuses, value: [int(status.order_map[s]) for s in statuses]},
+        schema={key: pl.String, value: pl.Int64},
+    )
+
+
+def _rank_table(status: StatusAPI) -> "pl.LazyFrame":
+    # ``get_max`` picks the last row of the ordered table among the statuses.
+    ranks = {name: pos for pos, name in enumerate(status.table["status"])}
+    return pl.LazyFrame(
+        {Cols.FILTERED: list(ranks), "_rank": list(ranks.values())},
+        schema={Cols.FILTERED: pl.String, "_rank": pl.Int64},
+    )
+
+
+def _next_table(status: StatusAPI, key: str) -> "pl.LazyFrame":
+    statuses = list(dict.fromkeys(status.status_list))
+    return pl.LazyFrame(
+        {key: statuses, "_next": [status.next(s) for s in statuses]},
+        schema={key: pl.String, "_next": pl.String},
+    )
+
+
+# ---------------------------------------------------------------------------
+# Stages
+def _truthy(name: str, dtype: "pl.DataType", missing: bool) -> "pl.Expr":
+    """Python truth value of column ``name``; missing values map to ``missing``.
+
+    ``bool(NaN)`` is true, so row-wise truth uses ``missing=True`` while
+    ``DataFrame.any`` skips missing values (``missing=False``).
+    """
+
+    col = pl.col(name)
+    if dtype == pl.Boolean:
+        expr = col
+    elif dtype.is_numeric():
+        expr = col != 0
+    elif dtype == pl.String:
+        expr = col.str.len_chars() > 0
+    else:
+        expr = col.is_not_null()
+    return expr.fill_null(missing)
+
+
+def initialize_status(
+    activities: "pl.LazyFrame", status: StatusAPI, empty_fallback: str
+) -> "pl.LazyFrame":
+    """Lazy :func:`pipeline.initialize_status`.
+
+    The distinct flag combinations are collected eagerly and resolved with
+    :func:`pipeline._resolve_pattern`; rows pick up their status through a
+    replace table keyed on the combination code.
+    """
+
+    _require()
+    lf = activities.rename(
+        _legacy_rename_map(_names(activities), ACTIVITY_LEGACY_NAMES)
+    )
+    schema = lf.collect_schema()
+    present = [f for f in STATUS_FLAGS if f in schema]
+    if Cols.NO_ISSUE in schema:
+        no_issue = _truthy(Cols.NO_ISSUE, schema[Cols.NO_ISSUE], True)
+    else:
+        missing = [f for f in STATUS_FLAGS if f not in schema]
+        if missing:
+            raise KeyError(f"{missing} not in index")
+        no_issue = ~pl.any_horizontal(
+            [_truthy(f, schema[f], False) for f in STATUS_FLAGS]
+        )
+    lf = lf.with_columns(no_issue.alias(Cols.NO_ISSUE))
+
+    bits = [
+        _truthy(f, schema[f], True).cast(pl.Int64) * (1 << bit)
+        for bit, f in enumerate(present)
+    ]
+    code = (
+        pl.when(pl.col(Cols.NO_ISSUE))
+        .then(pl.lit(-1, dtype=pl.Int64))
+        .otherwise(pl.sum_horizontal(bits) if bits else pl.lit(0, dtype=pl.Int64))
+    )
+    codes = lf.select(code.unique().alias("code")).collect()["code"].to_list()
+    mapping = {
+        c: _resolve_pattern(
+            None if c < 0 else [f for bit, f in enumerate(present) if (c >> bit) & 1],
+            status,
+            empty_fallback,
+        )
+        for c in codes
+    }
+    return lf.with_columns(
+        code.replace_strict(mapping, return_dtype=pl.String).alias(Cols.FILTERED_INIT)
+    )
+
+
+def initialize_pairs(
+    pairs: "pl.LazyFrame", activities: "pl.LazyFrame", status: StatusAPI
+) -> "pl.LazyFrame":
+    """Lazy :func:`pipeline.initialize_pairs` preserving the row order of *pairs*."""
+
+    _require()
+    columns = _names(pairs)
+    lookup = activities.select(
+        pl.col(Cols.ACTIVITY_ID).cast(pl.String), pl.col(Cols.FILTERED_INIT)
+    )
+    lf = _text_ids(pairs, Cols.ACTIVITY_ID1, Cols.ACTIVITY_ID2).with_row_index(_ROW)
+    for side, name, text, order in (
+        (Cols.ACTIVITY_ID1, "Filtered1", "_f1", "_o1"),
+        (Cols.ACTIVITY_ID2, "Filtered2", "_f2", "_o2"),
+    ):
+        lf = lf.drop(name, strict=False).join(
+            lookup.rename({Cols.ACTIVITY_ID: side, Cols.FILTERED_INIT: name}),
+            on=side,
+            how="left",
+        )
+        # ``Filtered.init`` keeps its dtype in the output; without any
+        # activity it is ``f64`` like the all-``NaN`` pandas column.
+        lf = lf.with_columns(pl.col(name).cast(pl.String).alias(text))
+        lf = lf.join(_order_table(status, text, order), on=text, how="left")
+
+    f1, f2 = pl.col("_f1"), pl.col("_f2")
+    known1, known2 = pl.col("_o1").is_not_null(), pl.col("_o2").is_not_null()
+    # Lower ``order`` means higher priority; unknown statuses defer to the
+    # other one and two different unknown statuses are an error.
+    filtered = (
+        pl.when(known1 & known2)
+        .then(pl.when(pl.col("_o1") <= pl.col("_o2")).then(f1).otherwise(f2))
+        .when(known1)
+        .then(f1)
+        .when(known2)
+        .then(f2)
+        .otherwise(f1)
+    )
+    lf = _fail_rows(lf, ~known1 & ~known2 & ~f1.eq_missing(f2), _PAIR_ERROR)
+    lf = lf.with_columns(filtered.alias(Cols.FILTERED))
+    out = columns + [
+        c for c in ("Filtered1", "Filtered2", Cols.FILTERED) if c not in columns
+    ]
+    return lf.sort(_ROW).select(out)
+
+
+def activity_from_pairs(
+    pairs: "pl.LazyFrame", init_status: "pl.LazyFrame", status: StatusAPI
+) -> "pl.LazyFrame":
+    """Lazy :func:`pipeline.activity_from_pairs`."""
+
+    _require()
+    pairs = pairs.rename(_legacy_rename_map(_names(pairs), PAIR_LEGACY_NAMES))
+    names = _names(pairs)
+    missing = [c for c in [Cols.ACTIVITY_ID1, *PAIR_ACTIVITY_COLUMNS] if c not in names]
+    if missing:
+        raise KeyError(f"required columns {missing} not found in pairs table")
+
+    halves = [
+        pairs.select(
+            pl.col(side).cast(pl.String).alias(Cols.ACTIVITY_ID),
+            *PAIR_ACTIVITY_COLUMNS,
+        )
+        for side in (Cols.ACTIVITY_ID1, Cols.ACTIVITY_ID2)
+    ]
+    unified = pl.concat(halves, how="vertical_relaxed").unique(
+        keep="first", maintain_order=True
+    )
+    valid = pl.col(Cols.ACTIVITY_ID).is_not_null() & (pl.col(Cols.ACTIVITY_ID) != "")
+    unified = _sort(unified.filter(valid), Cols.ACTIVITY_ID)
+
+    # Mirror the ``_x``/``_y`` suffixes of the pandas merge.
+    init_counts = count_columns_of(_names(init_status))
+    status_cols = [c for c in _names(init_status) if c not in init_counts]
+    overlap = [c for c in status_cols if c in _names(unified) and c != Cols.ACTIVITY_ID]
+    left = unified.rename({c: f"{c}_x" for c in overlap}).with_row_index(_ROW)
+    right = _text_ids(init_status.select(status_cols), Cols.ACTIVITY_ID)
+    right = right.rename({c: f"{c}_y" for c in overlap})
+    merged = left.join(right, on=Cols.ACTIVITY_ID, how="left")
+    merged = merged.rename({Cols.FILTERED: Cols.FILTERED_NEW})
+    columns = [c for c in _names(merged) if c != _ROW]
+
+    # pandas compares ``str`` of the values.  A missing ``Filtered.init``
+    # comes from the left merge and reads "nan"; a missing ``Filtered.new`` is
+    # the ``None`` of ``StatusAPI.pair`` and reads "None", so the two never
+    # compare equal.
+    init = pl.col(Cols.FILTERED_INIT).cast(pl.String).fill_null("nan")
+    new = pl.col(Cols.FILTERED_NEW).cast(pl.String).fill_null("None")
+    merged = (
+        merged.with_columns(init.alias("_init"), new.alias("_new"))
+        .join(_order_table(status, "_new", "_o_new"), on="_new", how="left")
+        .join(_order_table(status, "_init", "_o_init"), on="_init", how="left")
+        .join(_next_table(status, "_new"), on="_new", how="left")
+    )
+    final = (
+        pl.when(pl.col("_init") == pl.col("_new"))
+        .then(pl.col("_new"))
+        .when(pl.col("_o_new").fill_null(-1) > pl.col("_o_init").fill_null(-1))
+        .then(pl.col("_next").fill_null(status.status_list[-1]))
+        .otherwise(pl.lit("Error"))
+    )
+    return (
+        merged.with_columns(final.alias(Cols.FILTERED))
+        .sort(_ROW)
+        .select(columns + [Cols.FILTERED])
+    )
+
+
+def _aggregate(lf: "pl.LazyFrame", group_col: str, status: StatusAPI) -> "pl.LazyFrame":
+    schema = lf.collect_schema()
+    count_cols = count_columns_of([*COUNT_COLUMNS, *schema.names()])
+    counts = []
+    for col in count_cols:
+        if col not in schema:
+            counts.append(pl.lit(0, dtype=pl.Int64).alias(col))
+        elif schema[col].is_integer() or schema[col] == pl.Boolean:
+            counts.append(pl.col(col).cast(pl.Int64))
+        else:
+            counts.append(pl.col(col))
+    ranks = _rank_table(status)
+    statuses = ranks.rename({Cols.FILTERED: Cols.FILTERED_NEW})
+    out = (
+        lf.filter(pl.col(group_col).is_not_null())
+        .select(pl.col(group_col), pl.col(Cols.FILTERED).cast(pl.String), *counts)
+        .join(ranks, on=Cols.FILTERED, how="left")
+        .group_by(group_col)
+        .agg(pl.col("_rank").max(), *[pl.col(c).sum() for c in count_cols])
+        .join(statuses, on="_rank", how="left")
+    )
+    out = _fail_rows(out, pl.col(Cols.FILTERED_NEW).is_null(), _MAX_ERROR)
+    return _sort(out, group_col).select(group_col, Cols.FILTERED_NEW, *count_cols)
+
+
+def _attach_activity_counts(
+    activity: "pl.LazyFrame", activity_table: "pl.LazyFrame"
+) -> "pl.LazyFrame":
+    """Lazy :func:`pipeline._attach_activity_counts`."""
+
+    present = _names(activity)
+    extra = [c for c in count_columns_of(_names(activity_table)) if c not in present]
+    if not extra:
+        return activity
+    counts = _text_ids(
+        activity_table.select(Cols.ACTIVITY_ID, *extra), Cols.ACTIVITY_ID
+    )
+    counts = counts.unique(Cols.ACTIVITY_ID, keep="first", maintain_order=True)
+    joined = _text_ids(activity, Cols.ACTIVITY_ID).join(
+        counts, on=Cols.ACTIVITY_ID, how="left"
+    )
+    return _sort(joined.with_columns(pl.col(extra).fill_null(0)), Cols.ACTIVITY_ID)
+
+
+def _as_text(col: str) -> "pl.Expr":
+    # ``astype(str)`` renders missing values as "nan".
+    return pl.col(col).cast(pl.String).fill_null("nan")
+
+
+def _check_system_split(df: "pl.DataFrame") -> "pl.DataFrame":
+    """Raise like the pandas split of ``system_id`` into exactly three parts."""
+
+    separators = df[Cols.SYSTEM_ID].str.count_matches("_").max()
+    if separators != 2:
+        raise ValueError(_SPLIT_ERROR)
+    return df
+
+
+def aggregate_entities(
+    pair_table: Optional["pl.LazyFrame"],
+    activity_table: "pl.LazyFrame",
+    status: StatusAPI,
+    act_pairs: Optional["pl.LazyFrame"] = None,
+    entities: Optional[Iterable[str]] = None,
+) -> Dict[str, "pl.LazyFrame"]:
+    """Lazy :func:`pipeline.aggregate_entities`."""
+
+    _require()
+    names = resolve_entities(entities)
+    result: Dict[str, pl.LazyFrame] = {}
+    if "activity" in names:
+        if act_pairs is None:
+            if pair_table is None:
+                raise ValueError("the activity table requires the pair table")
+            act_pairs = activity_from_pairs(pair_table, activity_table, status)
+        activity = _aggregate(act_pairs, Cols.ACTIVITY_ID, status)
+        result["activity"] = _attach_activity_counts(activity, activity_table)
+
+    act = activity_table.rename({Cols.FILTERED_INIT: Cols.FILTERED})
+    for name in ("assay", "document"):
+        if name in names:
+            result[name] = _aggregate(act, ENTITY_KEYS[name], status)
+
+    if not SYSTEM_ENTITIES.intersection(names):
+        return result
+    system_id = pl.concat_str(
+        [
+            _as_text(Cols.TESTITEM_ID),
+            _as_text(Cols.TARGET_ID),
+            _as_text(Cols.MEASUREMENT_TYPE),
+        ],
+        separator="_",
+    )
+    system = _aggregate(
+        act.with_columns(system_id.alias(Cols.SYSTEM_ID)), Cols.SYSTEM_ID, status
+    )
+    if "system" in names:
+        result["system"] = system
+    if {"testitem", "target"}.intersection(names):
+        parts = pl.col(Cols.SYSTEM_ID).str.split_exact("_", 2)
+        parts_df = (
+            system.map_batches(_check_system_split)
+            .rename({Cols.FILTERED_NEW: Cols.FILTERED})
+            .with_columns(
+                parts.struct.field("field_0").alias(Cols.TESTITEM_ID),
+                parts.struct.field("field_1").alias(Cols.TARGET_ID),
+            )
+        )
+        for name in ("testitem", "target"):
+            if name in names:
+                result[name] = _aggregate(parts_df, ENTITY_KEYS[name], status)
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Execution
+def _unwrap(exc: Exception) -> Exception:
+    """Return the pandas error of ``exc``; query errors arrive wrapped."""
+
+    for message in (_PAIR_ERROR, _MAX_ERROR, _SPLIT_ERROR):
+        if message in str(exc):
+            return ValueError(message)
+    return exc
+
+
+def collect(frames: Dict[str, "pl.LazyFrame"]) -> Dict[str, pd.DataFrame]:
+    """Collect ``frames`` in one optimised query and convert them to pandas.
+
+    When the query fails, the frames are collected one at a time in order,
+    so the error of the earliest stage is raised like in the pandas engine
+    rather than whichever error the parallel collection hit first.
+    """
+
+    _require()
+    try:
+        results = pl.collect_all(list(frames.values()))
+    except (pl.exceptions.PolarsError, ValueError) as exc:
+        first = exc
+        for frame in frames.values():
+            try:
+                frame.collect()
+            except (pl.exceptions.PolarsError, ValueError) as frame_exc:
+                first = frame_exc
+                break
+        error = _unwrap(first)
+        if error is first:
+            raise first
+        raise error from first
+    return {name: to_pandas(df) for name, df in zip(frames, results)}
+
+
+def _pair_and_entity_frames(
+    init: "pl.LazyFrame",
+    pairs: Optional["pl.LazyFrame"],
+    status: StatusAPI,
+    names: List[str],
+) -> Dict[str, "pl.LazyFrame"]:
+    frames: Dict[str, pl.LazyFrame] = {}
+    act_pairs = None
+    if needs_pairs(names):
+        if pairs is None:
+            raise ValueError("the activity table requires the pairs")
+        pair_keys = [Cols.ACTIVITY_ID1, Cols.ACTIVITY_ID2]
+        pair_table = _sort(
+            initialize_pairs(_sort(pairs, pair_keys), init, status), pair_keys
+        )
+        act_pairs = _sort(
+            activity_from_pairs(pair_table, init, status), Cols.ACTIVITY_ID
+        )
+        frames["InitializePairs"] = pair_table
+        frames["ActivityInitializeStatus"] = act_pairs
+    frames.update(aggregate_entities(None, init, status, act_pairs, entities=names))
+    return frames
+
+
+def initialize_status_profiles(
+    activities: pd.DataFrame, profiles: Dict[str, StatusAPI], empty_fallback: str
+) -> Dict[str, pd.DataFrame]:
+    """Polars counterpart of :func:`pipeline.initialize_status_profiles`."""
+
+    lf = to_lazy(activities)
+    return collect(
+        {
+            name: initialize_status(lf, status, empty_fallback)
+            for name, status in profiles.items()
+        }
+    )
+
+
+def stage_tables(
+    activities_init: pd.DataFrame,
+    pairs: Optional[pd.DataFrame],
+    status: StatusAPI,
+    entities: Optional[Iterable[str]] = None,
+) -> Dict[str, pd.DataFrame]:
+    """Compute the pair tables and entity tables of one profile at once.
+
+    Returns ``InitializePairs`` and ``ActivityInitializeStatus`` when the
+    requested ``entities`` need them, followed by the entity tables.
+    """
+
+    names = resolve_entities(entities)
+    init = to_lazy(activities_init)
+    lazy_pairs = to_lazy(pairs) if pairs is not None else None
+    return collect(_pair_and_entity_frames(init, lazy_pairs, status, names))
+
+
+def classify_tables(
+    activities: pd.DataFrame,
+    status: StatusAPI,
+    pairs: pd.DataFrame | Callable[[], pd.DataFrame] | None = None,
+    *,
+    entities: Optional[Iterable[str]] = None,
+    empty_fallback: str = "GLOBAL_MIN",
+    prune_orphans: bool = False,
+) -> Dict[str, pd.DataFrame]:
+    """Polars counterpart of :func:`pipeline.classify_tables`.
+
+    The whole classification is built as one lazy query and collected once.
+    """
+
+    names = resolve_entities(entities)
+    init = initialize_status(
+        _sort(to_lazy(activities), Cols.ACTIVITY_ID), status, empty_fallback
+    )
+    frames: Dict[str, pl.LazyFrame] = {"InitializeStatus": init}
+    lazy_pairs = None
+    orphans = None
+    if needs_pairs(names):
+        if pairs is None:
+            raise ValueError("the activity table requires the pairs")
+        raw_pairs = pairs() if callable(pairs) else pairs
+        if prune_orphans:
+            raw_pairs, orphans = split_orphan_pairs(raw_pairs, activities)
+        lazy_pairs = to_lazy(raw_pairs)
+    frames.update(_pair_and_entity_frames(init, lazy_pairs, status, names))
+    tables = collect(frames)
+    if orphans is not None:
+        init_table = tables.pop("InitializeStatus")
+        tables = {"InitializeStatus": init_table, "OrphanPairs": orphans, **tables}
+    return tables
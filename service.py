@@ -0,0 +1,392 @@
+"""Long-running classification service with warm state.
+
+Answering "what would the status of these activities be" through
+:mod:`main` means reloading ``status.csv``, rebuilding :class:`StatusAPI` and
+reparsing every input for each question.  This module keeps the compiled
+status table, the initialised activity table and an activity→pair index in
+memory and serves classification requests over a small JSON HTTP API built on
+:mod:`asyncio`.
+
+Endpoints
+---------
+``GET /health``
+    Return basic information about the loaded snapshot.
+``POST /classify/activities``
+    Body ``{"activities": [...]}``.  The records are run through
+    :func:`pipeline.initialize_status`; pairs from the snapshot touching the
+    submitted activities are re-evaluated with
+    :func:`pipeline.initialize_pairs` and
+    :func:`pipeline.activity_from_pairs`.
+``POST /classify/pairs``
+    Body ``{"pairs": [...], "activities": [...]}``.  The pairs are classified
+    against the snapshot; the optional activities override snapshot rows.
+``POST /reload``
+    Body ``{"input": "path"}`` (optional).  Reload the snapshot, by default
+    from the current input directory.
+
+Example
+-------
+Serve the bundled example dataset::
+
+    python service.py --input input/same_document --port 8765
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from dataclasses import dataclass
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from compression import read_table
+from constants import Cols
+from pipeline import activity_from_pairs, initialize_pairs, initialize_status
+from status_api import StatusAPI
+
+logger = logging.getLogger(__name__)
+
+# Columns returned for initialised activities.
+INIT_COLUMNS: List[str] = [Cols.ACTIVITY_ID, Cols.NO_ISSUE, Cols.FILTERED_INIT]
+
+# Columns returned for activities resolved through their pairs.
+RESOLVED_COLUMNS: List[str] = [
+    Cols.ACTIVITY_ID,
+    Cols.TESTITEM_ID,
+    Cols.TARGET_ID,
+    Cols.MEASUREMENT_TYPE,
+    Cols.FILTERED_INIT,
+    Cols.FILTERED_NEW,
+    Cols.FILTERED,
+]
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    500: "Internal Server Error",
+}
+
+
+@dataclass
+class Snapshot:
+    """Warm state derived from one input directory."""
+
+    input_dir: Path
+    status: StatusAPI
+    activities: pd.DataFrame
+    pairs: pd.DataFrame
+    # Activity IDs in row order of ``activities``.
+    activity_index: pd.Index
+    # Activity IDs of both pair ends and the matching row positions in
+    # ``pairs``, sorted by ID.
+    pair_ids: pd.Index
+    pair_rows: np.ndarray
+
+
+def _records(df: pd.DataFrame, columns: Sequence[str]) -> List[Dict[str, Any]]:
+    cols = [c for c in columns if c in df.columns]
+    return json.loads(df[cols].to_json(orient="records"))
+
+
+class ClassificationService:
+    """Classify activity and pair batches against a warm input snapshot.
+
+    Parameters
+    ----------
+    input_dir:
+        Directory containing ``status.csv``, ``activities.csv`` and
+        ``pairs.csv``.
+    sep, encoding:
+        CSV options forwarded to :func:`pandas.read_csv`.
+    empty_fallback:
+        Passed to :func:`pipeline.initialize_status`.
+    """
+
+    def __init__(
+        self,
+        input_dir: Path,
+        *,
+        sep: str = ",",
+        encoding: str = "utf-8",
+        empty_fallback: str = "GLOBAL_MIN",
+    ) -> None:
+        self.sep = sep
+        self.encoding = encoding
+        self.empty_fallback = empty_fallback
+        self.snapshot = self._load(Path(input_dir))
+
+    # ------------------------------------------------------------------
+    def _load(self, input_dir: Path) -> Snapshot:
+        def read(name: str) -> pd.DataFrame:
+            return read_table(input_dir / name, sep=self.sep, encoding=self.encoding)
+
+        status = StatusAPI(read("status.csv"))
+        activities = initialize_status(
+            read("activities.csv"), status, self.empty_fallback
+        )
+        pairs = read("pairs.csv")
+
+        ids = pd.concat(
+            [pairs[Cols.ACTIVITY_ID1], pairs[Cols.ACTIVITY_ID2]], ignore_index=True
+        )
+        rows = np.tile(np.arange(len(pairs)), 2)
+        # Blank IDs link no activity, as in ``activity_from_pairs``, and
+        # cannot be sorted against the others.
+        known = (ids.notna() & (ids.astype(str).str.strip() != "")).to_numpy()
+        ids, rows = ids[known], rows[known]
+        order = np.argsort(ids.to_numpy(), kind="stable")
+        logger.info(
+            "loaded snapshot from %s: %d activities, %d pairs",
+            input_dir,
+            len(activities),
+            len(pairs),
+        )
+        return Snapshot(
+            input_dir=input_dir,
+            status=status,
+            activities=activities,
+            pairs=pairs,
+            activity_index=pd.Index(activities[Cols.ACTIVITY_ID]),
+            pair_ids=pd.Index(ids.to_numpy()[order]),
+            pair_rows=rows[order],
+        )
+
+    def reload(self, input_dir: Optional[Path] = None) -> Dict[str, Any]:
+        """Replace the warm snapshot, optionally from a new directory."""
+
+        target = Path(input_dir) if input_dir is not None else self.snapshot.input_dir
+        self.snapshot = self._load(target)
+        return self.health()
+
+    def health(self) -> Dict[str, Any]:
+        """Return a summary of the loaded snapshot."""
+
+        snap = self.snapshot
+        return {
+            "input": str(snap.input_dir),
+            "statuses": len(snap.status.status_list),
+            "activities": int(snap.activities.shape[0]),
+            "pairs": int(snap.pairs.shape[0]),
+        }
+
+    # ------------------------------------------------------------------
+    def _pairs_for(self, snap: Snapshot, ids: pd.Series) -> pd.DataFrame:
+        """Return snapshot pairs touching any activity in ``ids``."""
+
+        indexer, _ = snap.pair_ids.get_indexer_non_unique(pd.unique(ids))
+        indexer = indexer[indexer >= 0]
+        rows = np.unique(snap.pair_rows[indexer])
+        return snap.pairs.iloc[rows]
+
+    def _activities_for(
+        self,
+        snap: Snapshot,
+        pairs: pd.DataFrame,
+        overrides: Optional[pd.DataFrame] = None,
+    ) -> pd.DataFrame:
+        """Return activities referenced by ``pairs``.
+
+        Rows are taken from the snapshot unless ``overrides`` provides an
+        initialised row for the same activity ID.
+        """
+
+        ids = pd.unique(
+            pd.concat([pairs[Cols.ACTIVITY_ID1], pairs[Cols.ACTIVITY_ID2]])
+        )
+        positions = snap.activity_index.get_indexer_for(ids)
+        warm = snap.activities.iloc[np.unique(positions[positions >= 0])]
+        if overrides is None:
+            return warm
+        warm = warm[~warm[Cols.ACTIVITY_ID].isin(overrides[Cols.ACTIVITY_ID])]
+        return pd.concat([overrides, warm], ignore_index=True)
+
+    def classify_activities(self, records: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Classify activity records and resolve them through their pairs."""
+
+        snap = self.snapshot
+        init = initialize_status(
+            pd.DataFrame.from_records(records), snap.status, self.empty_fallback
+        )
+        pairs = self._pairs_for(snap, init[Cols.ACTIVITY_ID])
+        result: Dict[str, Any] = {"activities": _records(init, INIT_COLUMNS)}
+        if pairs.empty:
+            result["resolved"] = []
+            return result
+        combined = self._activities_for(snap, pairs, init)
+        pairs_init = initialize_pairs(pairs, combined, snap.status)
+        resolved = activity_from_pairs(pairs_init, combined, snap.status)
+        resolved = resolved[resolved[Cols.ACTIVITY_ID].isin(init[Cols.ACTIVITY_ID])]
+        result["resolved"] = _records(resolved, RESOLVED_COLUMNS)
+        return result
+
+    def classify_pairs(
+        self,
+        records: List[Dict[str, Any]],
+        activities: Optional[List[Dict[str, Any]]] = None,
+    ) -> Dict[str, Any]:
+        """Classify pair records against the snapshot activities."""
+
+        snap = self.snapshot
+        pairs = pd.DataFrame.from_records(records)
+        init = None
+        if activities:
+            init = initialize_status(
+                pd.DataFrame.from_records(activities), snap.status, self.empty_fallback
+            )
+        combined = self._activities_for(snap, pairs, init)
+        pairs_init = initialize_pairs(pairs, combined, snap.status)
+        resolved = activity_from_pairs(pairs_init, combined, snap.status)
+        return {
+            "pairs": json.loads(pairs_init.to_json(orient="records")),
+            "activities": _records(resolved, RESOLVED_COLUMNS),
+        }
+
+    # ------------------------------------------------------------------
+    def dispatch(self, method: str, path: str, body: Dict[str, Any]) -> Tuple[int, Any]:
+        """Route a request to the matching handler."""
+
+        if method == "GET" and path == "/health":
+            return 200, self.health()
+        if method == "POST" and path == "/classify/activities":
+            return 200, self.classify_activities(body.get("activities", []))
+        if method == "POST" and path == "/classify/pairs":
+            return 200, self.classify_pairs(
+                body.get("pairs", []), body.get("activities")
+            )
+        if method == "POST" and path == "/reload":
+            return 200, self.reload(body.get("input"))
+        return 404, {"error": f"no route for {method} {path}"}
+
+
+# ---------------------------------------------------------------------------
+async def _read_request(
+    reader: asyncio.StreamReader,
+) -> Optional[Tuple[str, str, Dict[str, Any]]]:
+    line = await reader.readline()
+    if not line:
+        return None
+    method, path, _ = line.decode("latin-1").split(" ", 2)
+    length = 0
+    while True:
+        header = await reader.readline()
+        if header in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = header.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value.strip())
+    raw = await reader.readexactly(length) if length else b""
+    body = json.loads(raw) if raw.strip() else {}
+    return method.upper(), path.split("?", 1)[0], body
+
+
+async def _respond(writer: asyncio.StreamWriter, status_code: int, payload: Any) -> None:
+    data = json.dumps(payload).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status_code} {_REASONS.get(status_code, '')}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(data)}\r\n"
+        "Connection: close\r\n\r\n"
+    )
+    writer.write(head.encode("latin-1") + data)
+    await writer.drain()
+
+
+def make_handler(service: ClassificationService):
+    """Return an :mod:`asyncio` connection handler serving ``service``.
+
+    Requests are evaluated one at a time in the default executor so the event
+    loop stays responsive while pandas does the work, and a reload never
+    interleaves with a classification.
+    """
+
+    lock = asyncio.Lock()
+
+    async def handle(
+        reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            try:
+                request = await _read_request(reader)
+            except (ValueError, asyncio.IncompleteReadError) as exc:
+                await _respond(writer, 400, {"error": str(exc)})
+                return
+            if request is None:
+                return
+            method, path, body = request
+            loop = asyncio.get_running_loop()
+            async with lock:
+                try:
+                    status_code, payload = await loop.run_in_executor(
+                        None, service.dispatch, method, path, body
+                    )
+                except (KeyError, ValueError, TypeError) as exc:
+                    status_code, payload = 400, {"error": str(exc)}
+                except Exception as exc:  # pragma: no cover - defensive
+                    logger.exception("request failed")
+                    status_code, payload = 500, {"error": str(exc)}
+            await _respond(writer, status_code, payload)
+        finally:
+            writer.close()
+
+    return handle
+
+
+async def serve(
+    service: ClassificationService,
+    *,
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    unix_socket: Optional[Path] = None,
+) -> asyncio.AbstractServer:
+    """Start serving ``service`` on a TCP port or a Unix socket."""
+
+    handler = make_handler(service)
+    if unix_socket is not None:
+        return await asyncio.start_unix_server(handler, path=str(unix_socket))
+    return await asyncio.start_server(handler, host=host, port=port)
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    """Return command line arguments."""
+
+    parser = argparse.ArgumentParser(description="Activity classification service")
+    parser.add_argument("--input", type=Path, default=Path("input/same_document"))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix-socket", type=Path, default=None)
+    parser.add_argument("--log-level", default="INFO")
+    parser.add_argument("--sep", default=",")
+    parser.add_argument("--encoding", default="utf-8")
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Script entry point."""
+
+    args = parse_args(argv)
+    logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.INFO))
+    service = ClassificationService(args.input, sep=args.sep, encoding=args.encoding)
+
+    async def run() -> None:
+        server = await serve(
+            service, host=args.host, port=args.port, unix_socket=args.unix_socket
+        )
+        logger.info(
+            "serving on %s",
+            args.unix_socket or f"http://{args.host}:{args.port}",
+        )
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(run())
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -0,0 +1,251 @@
+"""Status state published once to the worker processes of one host.
+
+Without it every task of :mod:`parallel` pickles the :class:`StatusAPI` and
+the initialised rows of the activities its pairs reference.  :func:`publish`
+instead copies the state into a single :mod:`multiprocessing.shared_memory`
+segment:
+
+``keys``
+    The sorted activity IDs of an :class:`orphans.ActivityIdIndex`, stored
+    as 64-bit integers for prefixed ChEMBL IDs.
+``codes``
+    The ``Filtered.init`` of every key as an integer code into the status
+    vocabulary of the handle, ``-1`` for missing values.
+``order``
+    The ``order`` of every vocabulary status, ``NaN`` for statuses missing
+    from the status table.
+``status``
+    The pickled :class:`StatusAPI`, unpickled once per worker.
+
+Tasks carry only the small picklable :class:`SharedStateHandle`.
+:func:`attach` maps the segment into a worker once and views the arrays in
+place with :class:`numpy.ndarray`.  :meth:`SharedState.initialize_pairs`
+resolves the statuses of a pair shard on these arrays.  It is vectorised
+and returns the same table as :func:`pipeline.initialize_pairs`.
+
+Shared memory does not leave the host, so the Dask backend keeps shipping
+the state with every task.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import logging
+from multiprocessing import shared_memory
+import pickle
+from types import TracebackType
+from typing import Dict, Optional, Tuple, Type
+
+import numpy as np
+import pandas as pd
+
+from constants import Cols
+from orphans import ActivityIdIndex
+from status_api import StatusAPI
+
+logger = logging.getLogger(__name__)
+
+# Alignment of the arrays inside the segment.
+_ALIGN = 64
+
+
+@dataclass(frozen=True)
+class SharedStateHandle:
+    """Picklable description of a published :class:`SharedState`."""
+
+    name: str
+    # Array name -> (offset, shape, dtype string).
+    arrays: Tuple[Tuple[str, int, Tuple[int, ...], str], ...]
+    prefix: Optional[str]
+    vocabulary: Tuple[str, ...]
+
+
+def shareable(pairs: pd.DataFrame, activities: pd.DataFrame) -> bool:
+    """Return whether the statuses of ``pairs`` can be resolved on shared state.
+
+    Mirrors the indexed lookup of :func:`pipeline.initialize_pairs`: activity
+    IDs must be present and unique, and share the dtype of the pair IDs.
+    """
+
+    ids = activities[Cols.ACTIVITY_ID]
+    return (
+        ids.notna().all()
+        and ids.is_unique
+        and activities[Cols.FILTERED_INIT].dtype == object
+        and pairs[Cols.ACTIVITY_ID1].dtype == ids.dtype
+        and pairs[Cols.ACTIVITY_ID2].dtype == ids.dtype
+        and Cols.ACTIVITY_ID not in pairs.columns
+    )
+
+
+class SharedState:
+    """Status arrays in a shared memory segment.
+
+    Created by :func:`publish` in the driver, which owns and finally unlinks
+    the segment, or by :func:`attach` in a worker.
+    """
+
+    def __init__(
+        self,
+        handle: SharedStateHandle,
+        segment: shared_memory.SharedMemory,
+        owner: bool = False,
+    ) -> None:
+        self.handle = handle
+        self._segment = segment
+        self._owner = owner
+        self._status: Optional[StatusAPI] = None
+        self.arrays: Dict[str, np.ndarray] = {
+            name: np.ndarray(shape, dtype=np.dtype(dtype), buffer=segment.buf[offset:])
+            for name, offset, shape, dtype in handle.arrays
+        }
+        self.index = ActivityIdIndex.from_keys(self.arrays["keys"], handle.prefix)
+        vocabulary = list(handle.vocabulary)
+        # Code ``-1`` selects the trailing missing value.
+        self._as_init = np.array([*vocabulary, np.nan], dtype=object)
+        self._as_pair = np.array([*vocabulary, None], dtype=object)
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the shared segment."""
+
+        return self._segment.size
+
+    @property
+    def status(self) -> StatusAPI:
+        """The published :class:`StatusAPI`."""
+
+        if self._status is None:
+            self._status = pickle.loads(self.arrays["status"].tobytes())
+        return self._status
+
+    def codes(self, ids: pd.Series) -> np.ndarray:
+        """Return the ``Filtered.init`` codes of ``ids``, ``-1`` when unknown."""
+
+        pos = self.index.positions(ids)
+        codes = self.arrays["codes"]
+        if not len(codes):
+            return np.full(len(pos), -1, dtype=np.int32)
+        return np.where(pos >= 0, codes[pos], -1).astype(np.int32)
+
+    def initialize_pairs(self, pairs: pd.DataFrame) -> pd.DataFrame:
+        """Return :func:`pipeline.initialize_pairs` of ``pairs``.
+
+        ``pairs`` must be :func:`shareable` with the published activities.
+        """
+
+        code1 = self.codes(pairs[Cols.ACTIVITY_ID1])
+        code2 = self.codes(pairs[Cols.ACTIVITY_ID2])
+        order = np.append(self.arrays["order"], np.nan)
+        order1, order2 = order[code1], order[code2]
+        known1, known2 = ~np.isnan(order1), ~np.isnan(order2)
+        # ``StatusAPI.pair``: the lower order of two known statuses wins, a
+        # known status beats an unknown one, two unknown ones must be equal.
+        take2 = known2 & (~known1 | (order2 < order1))
+        if (~known1 & ~known2 & (code1 != code2)).any():
+            raise ValueError("unknown status in pair")
+        merged = pairs.assign(
+            Filtered1=self._as_init[code1], Filtered2=self._as_init[code2]
+        )
+        merged.index = pd.RangeIndex(len(merged))
+        merged[Cols.FILTERED] = self._as_pair[np.where(take2, code2, code1)]
+        return merged
+
+    def close(self) -> None:
+        """Release the segment; the owner also unlinks it."""
+
+        self.arrays = {}
+        self.index = ActivityIdIndex.from_keys(np.zeros(0, dtype=np.int64), "")
+        try:
+            self._segment.close()
+        except BufferError:  # pragma: no cover - views still referenced
+            logger.debug("shared state %s still in use", self.handle.name)
+        if self._owner:
+            self._segment.unlink()
+            self._owner = False
+
+    def __enter__(self) -> "SharedState":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+def publish(activities_init: pd.DataFrame, status: StatusAPI) -> SharedState:
+    """Copy the status state of ``activities_init`` into shared memory.
+
+    Parameters
+    ----------
+    activities_init:
+        ``InitializeStatus`` table with unique activity IDs.
+    status:
+        :class:`StatusAPI` instance.
+
+    Returns
+    -------
+    SharedState
+        The owning state; close it, or use it as a context manager, to
+        unlink the segment once the workers are done.
+    """
+
+    ids = activities_init[Cols.ACTIVITY_ID]
+    index = ActivityIdIndex(ids)
+    init_codes, vocabulary = pd.factorize(activities_init[Cols.FILTERED_INIT])
+    codes = np.full(len(index), -1, dtype=np.int32)
+    pos = index.positions(ids)
+    codes[pos[pos >= 0]] = init_codes[pos >= 0]
+    order = np.array(
+        [
+            status.order_map[s] if s in status.status_list else np.nan
+            for s in vocabulary
+        ],
+        dtype=np.float64,
+    )
+    arrays = {
+        "keys": index.keys,
+        "codes": codes,
+        "order": order,
+        "status": np.frombuffer(pickle.dumps(status), dtype=np.uint8),
+    }
+
+    layout = []
+    offset = 0
+    for name, array in arrays.items():
+        offset = -(-offset // _ALIGN) * _ALIGN
+        layout.append((name, offset, array.shape, array.dtype.str))
+        offset += array.nbytes
+    segment = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for (name, start, _, _), array in zip(layout, arrays.values()):
+        segment.buf[start : start + array.nbytes] = array.tobytes()
+    handle = SharedStateHandle(
+        segment.name, tuple(layout), index.prefix, tuple(vocabulary)
+    )
+    logger.info(
+        "published status state of %d activities (%d bytes)", len(index), offset
+    )
+    return SharedState(handle, segment, owner=True)
+
+
+# State attached in this process, keyed by segment name.
+_ATTACHED: Dict[str, SharedState] = {}
+
+
+def attach(handle: SharedStateHandle) -> SharedState:
+    """Return the state of ``handle``, mapping it into this process once.
+
+    Only the most recent state stays attached; older ones are released.
+    """
+
+    state = _ATTACHED.get(handle.name)
+    if state is None:
+        for stale in _ATTACHED.values():
+            stale.close()
+        _ATTACHED.clear()
+        segment = shared_memory.SharedMemory(name=handle.name)
+        state = _ATTACHED[handle.name] = SharedState(handle, segment)
+    return state
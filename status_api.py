@@ -9,10 +9,21 @@ throughout the preprocessing pipeline.
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from functools import lru_cache
+import logging
+from pathlib import Path
+from typing import Any, Callable, Dict, FrozenSet, List, Mapping, Optional, Union
 
 import pandas as pd
 
+logger = logging.getLogger(__name__)
+
+# Optional column naming the rule set a status row belongs to.
+PROFILE_COLUMN = "profile"
+
+# Profile name used when a status table defines a single rule set.
+DEFAULT_PROFILE = "default"
+
 
 @dataclass
 class StatusAPI:
@@ -23,9 +34,16 @@ class StatusAPI:
     table:
         Reference table containing at least the columns ``status``,
         ``condition_field``, ``condition_value``, ``order`` and ``score``.
+    cache_size:
+        Maximum number of memoised results kept per lookup method.  Flag
+        combinations and status pairs repeat heavily across activities, so
+        :meth:`get_min`, :meth:`get_max`, :meth:`pair`, :meth:`ascending` and
+        :meth:`next` remember recent answers.  ``0`` disables memoisation.
+        The caches assume ``table`` is not modified after construction.
     """
 
     table: pd.DataFrame
+    cache_size: int = 4096
 
     def __post_init__(self) -> None:  # pragma: no cover - simple assignments
         # sort by order so that lookups based on the global ordering are
@@ -41,6 +59,60 @@ class StatusAPI:
         self.score_map: Dict[str, int] = dict(
             zip(self.table["status"], self.table["score"])
         )
+        conflicting = self.table.groupby("status")["order"].nunique()
+        conflicting = conflicting[conflicting > 1]
+        if not conflicting.empty:
+            logger.warning(
+                "status table defines %d statuses with conflicting orders; "
+                "the last row wins. Split the rule sets into profiles with a "
+                "'%s' column to keep them apart.",
+                len(conflicting),
+                PROFILE_COLUMN,
+            )
+        self._init_caches()
+
+    def _init_caches(self) -> None:
+        self._caches: Dict[str, Callable[..., Any]] = {
+            name: lru_cache(maxsize=self.cache_size)(func)
+            for name, func in (
+                ("get_min", self._get_min),
+                ("get_max", self._get_max),
+                ("pair", self._pair),
+                ("ascending", self._ascending),
+                ("next", self._next),
+            )
+        }
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # ``lru_cache`` wrappers cannot be pickled; rebuild them on load.
+        state = self.__dict__.copy()
+        state.pop("_caches", None)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._init_caches()
+
+    def cache_info(self) -> Dict[str, Dict[str, int]]:
+        """Return hit/miss statistics of the memoised lookups.
+
+        Returns
+        -------
+        dict
+            Mapping from method name to ``hits``, ``misses``, ``maxsize`` and
+            ``currsize``.
+        """
+
+        return {
+            name: dict(cache.cache_info()._asdict())  # type: ignore[attr-defined]
+            for name, cache in self._caches.items()
+        }
+
+    def cache_clear(self) -> None:
+        """Drop all memoised results and reset the statistics."""
+
+        for cache in self._caches.values():
+            cache.cache_clear()  # type: ignore[attr-defined]
 
     # ------------------------------------------------------------------
     def get_min(self, condition_fields: List[str]) -> str:
@@ -52,7 +124,12 @@ class StatusAPI:
             List of field names that evaluate to ``True`` for the activity.
         """
 
-        subset = self.table[self.table["condition_field"].isin(condition_fields)]
+        return self._caches["get_min"](frozenset(condition_fields))
+
+    def _get_min(self, condition_fields: FrozenSet[str]) -> str:
+        subset = self.table[
+            self.table["condition_field"].isin(list(condition_fields))
+        ]
         if subset.empty:
             raise ValueError("no statuses for given condition fields")
         return subset.iloc[0]["status"]
@@ -60,7 +137,10 @@ class StatusAPI:
     def get_max(self, statuses: List[str]) -> str:
         """Return the maximal status from ``statuses`` based on ``order``."""
 
-        subset = self.table[self.table["status"].isin(statuses)]
+        return self._caches["get_max"](frozenset(statuses))
+
+    def _get_max(self, statuses: FrozenSet[str]) -> str:
+        subset = self.table[self.table["status"].isin(list(statuses))]
         if subset.empty:
             raise ValueError("no matching statuses")
         return subset.sort_values("order").iloc[-1]["status"]
@@ -91,7 +171,9 @@ class StatusAPI:
             status1 = None
         if pd.isna(status2):
             status2 = None
+        return self._caches["pair"](status1, status2)
 
+    def _pair(self, status1: Optional[str], status2: Optional[str]) -> Optional[str]:
         in_table1 = status1 in self.status_list if status1 is not None else False
         in_table2 = status2 in self.status_list if status2 is not None else False
 
@@ -115,6 +197,9 @@ class StatusAPI:
     def ascending(self, a: str, b: str) -> int:
         """Comparator returning ``1`` if ``a`` > ``b`` in the global order."""
 
+        return self._caches["ascending"](a, b)
+
+    def _ascending(self, a: str, b: str) -> int:
         if a == b:
             return 0
         return 1 if self.order_map.get(a, -1) > self.order_map.get(b, -1) else -1
@@ -129,6 +214,9 @@ class StatusAPI:
     def next(self, status_name: str) -> str:
         """Return the status following ``status_name`` in the global order."""
 
+        return self._caches["next"](status_name)
+
+    def _next(self, status_name: str) -> str:
         try:
             idx = self.status_list.index(status_name)
         except ValueError:
@@ -162,3 +250,65 @@ class StatusAPI:
         """
 
         return [str(col) for col, val in row.items() if bool(val)]
+
+
+# ---------------------------------------------------------------------------
+def split_status_profiles(table: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """Split a combined status ``table`` into one table per profile.
+
+    Parameters
+    ----------
+    table:
+        Status reference table.  When it has a :data:`PROFILE_COLUMN` the rows
+        are grouped by that column in order of first appearance; otherwise the
+        whole table forms the :data:`DEFAULT_PROFILE`.
+
+    Returns
+    -------
+    dict
+        Mapping from profile name to its status rows without the profile
+        column.
+    """
+
+    if PROFILE_COLUMN not in table.columns:
+        return {DEFAULT_PROFILE: table}
+    if table[PROFILE_COLUMN].isna().any():
+        raise ValueError(f"status table has rows without a {PROFILE_COLUMN!r}")
+    return {
+        str(name): group.drop(columns=[PROFILE_COLUMN]).reset_index(drop=True)
+        for name, group in table.groupby(PROFILE_COLUMN, sort=False)
+    }
+
+
+def load_status_profiles(
+    source: Union[pd.DataFrame, Mapping[str, Union[str, Path, pd.DataFrame]]],
+    **read_kwargs: object,
+) -> Dict[str, StatusAPI]:
+    """Compile every status profile in ``source`` into a :class:`StatusAPI`.
+
+    Parameters
+    ----------
+    source:
+        Either a combined status table (see :func:`split_status_profiles`) or
+        a mapping from profile name to a status table or path of a
+        ``status.csv`` file.
+    read_kwargs:
+        Extra keyword arguments for :func:`pandas.read_csv` when paths are
+        given.
+
+    Returns
+    -------
+    dict
+        Mapping from profile name to its compiled :class:`StatusAPI`.
+    """
+
+    if isinstance(source, pd.DataFrame):
+        tables = split_status_profiles(source)
+    else:
+        tables = {}
+        for name, item in source.items():
+            if isinstance(item, pd.DataFrame):
+                tables[name] = item
+            else:
+                tables[name] = pd.read_csv(item, **read_kwargs)  # type: ignore[arg-type]
+    return {name: StatusAPI(table) for name, table in tables.items()}
@@ -0,0 +1,262 @@
+"""Persistent status index for classification outputs.
+
+The tables written by :func:`main.classify_directory` are plain CSV files.
+Finding the status of a handful of assays or targets therefore means loading
+the complete tables.  This module copies the entity tables and the
+``InitializeStatus``/``ActivityInitializeStatus`` intermediates into a single
+SQLite file with indexes on the entity key and on the status order, so that
+point and range queries only touch the rows they return.
+
+Example
+-------
+Build the index after a run and query it::
+
+    from status_index import StatusIndex, build_status_index
+
+    build_status_index(Path("output"), Path("output/status.sqlite"), status)
+    with StatusIndex(Path("output/status.sqlite")) as index:
+        index.lookup("assay", ["CHEMBL1000140"])
+        index.filter_by_status("target", "review")
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+import sqlite3
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from partitioning import read_output, table_exists
+from constants import Cols
+from status_api import StatusAPI
+
+# Map from indexed table name to its key column.
+INDEX_KEYS: Dict[str, str] = {
+    "activity": Cols.ACTIVITY_ID,
+    "assay": Cols.ASSAY_ID,
+    "document": Cols.DOCUMENT_ID,
+    "system": Cols.SYSTEM_ID,
+    "testitem": Cols.TESTITEM_ID,
+    "target": Cols.TARGET_ID,
+    "InitializeStatus": Cols.ACTIVITY_ID,
+    "ActivityInitializeStatus": Cols.ACTIVITY_ID,
+}
+
+# Column holding the status used for range queries in each table.
+INDEX_STATUS_COLUMNS: Dict[str, str] = {
+    "InitializeStatus": Cols.FILTERED_INIT,
+    "ActivityInitializeStatus": Cols.FILTERED,
+}
+
+# Name of the helper column storing the status order.
+ORDER_COLUMN = "_status_order"
+
+# SQLite limits the number of bound parameters per statement.
+_MAX_PARAMS = 900
+
+
+def _quote(name: str) -> str:
+    """Return ``name`` quoted as an SQLite identifier."""
+
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _status_column(entity: str) -> str:
+    return INDEX_STATUS_COLUMNS.get(entity, Cols.FILTERED_NEW)
+
+
+def build_status_index(
+    output_dir: Path,
+    index_path: Path,
+    status: StatusAPI,
+    *,
+    entities: Optional[Iterable[str]] = None,
+) -> Path:
+    """Write the classification outputs in ``output_dir`` to ``index_path``.
+
+    Parameters
+    ----------
+    output_dir:
+        Directory produced by :func:`main.classify_directory`.
+    index_path:
+        Destination SQLite file.  An existing file is replaced.
+    status:
+        :class:`StatusAPI` providing the order used for range queries.
+    entities:
+        Optional subset of :data:`INDEX_KEYS` to index.  Tables missing from
+        ``output_dir`` are skipped.
+
+    Returns
+    -------
+    pathlib.Path
+        Path of the written index.
+    """
+
+    names = list(entities) if entities is not None else list(INDEX_KEYS)
+    unknown = [n for n in names if n not in INDEX_KEYS]
+    if unknown:
+        raise KeyError(f"unknown entity tables {unknown}")
+
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = index_path.with_name(index_path.name + ".tmp")
+    if tmp_path.exists():
+        tmp_path.unlink()
+
+    con = sqlite3.connect(tmp_path)
+    try:
+        pd.DataFrame(
+            list(status.order_map.items()), columns=["status", "order"]
+        ).to_sql("_status", con, index=False)
+        tables = []
+        for name in names:
+            path = output_dir / f"{name}.csv"
+            if not table_exists(path):
+                continue
+            key = INDEX_KEYS[name]
+            df = read_output(path, dtype={key: str})
+            status_col = _status_column(name)
+            if status_col in df.columns:
+                df[ORDER_COLUMN] = (
+                    df[status_col].map(status.order_map).fillna(-1).astype(int)
+                )
+            else:
+                df[ORDER_COLUMN] = -1
+            df.to_sql(name, con, index=False)
+            # Entity tables are unique per key; the activity-level
+            # intermediates may repeat an ID for several systems.
+            unique = "UNIQUE " if df[key].is_unique else ""
+            con.execute(
+                f"CREATE {unique}INDEX {_quote('ix_' + name + '_key')} "
+                f"ON {_quote(name)} ({_quote(key)})"
+            )
+            con.execute(
+                f"CREATE INDEX {_quote('ix_' + name + '_order')} "
+                f"ON {_quote(name)} ({_quote(ORDER_COLUMN)})"
+            )
+            tables.append((name, key, status_col, int(df.shape[0])))
+        con.execute(
+            "CREATE TABLE _tables (name TEXT PRIMARY KEY, key TEXT, "
+            "status_column TEXT, rows INTEGER)"
+        )
+        con.executemany("INSERT INTO _tables VALUES (?, ?, ?, ?)", tables)
+        con.commit()
+    finally:
+        con.close()
+    tmp_path.replace(index_path)
+    return index_path
+
+
+class StatusIndex:
+    """Read-only query interface for an index built by :func:`build_status_index`.
+
+    Parameters
+    ----------
+    path:
+        Location of the SQLite index file.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        if not self.path.exists():
+            raise FileNotFoundError(self.path)
+        self._con = sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True)
+        rows = self._con.execute(
+            "SELECT name, key, status_column FROM _tables"
+        ).fetchall()
+        self.keys: Dict[str, str] = {name: key for name, key, _ in rows}
+        self.status_columns: Dict[str, str] = {name: col for name, _, col in rows}
+        self.order_map: Dict[str, int] = dict(
+            self._con.execute('SELECT status, "order" FROM _status').fetchall()
+        )
+
+    # ------------------------------------------------------------------
+    def __enter__(self) -> "StatusIndex":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+
+        self._con.close()
+
+    @property
+    def entities(self) -> List[str]:
+        """Names of the indexed tables."""
+
+        return list(self.keys)
+
+    def _key(self, entity: str) -> str:
+        try:
+            return self.keys[entity]
+        except KeyError:
+            raise KeyError(f"entity {entity!r} is not indexed") from None
+
+    def _query(self, sql: str, params: List[object]) -> pd.DataFrame:
+        df = pd.read_sql_query(sql, self._con, params=params)
+        return df.drop(columns=[ORDER_COLUMN])
+
+    # ------------------------------------------------------------------
+    def lookup(self, entity: str, ids: Iterable[object]) -> pd.DataFrame:
+        """Return the rows of ``entity`` whose key is in ``ids``.
+
+        Parameters
+        ----------
+        entity:
+            Table name, e.g. ``"assay"`` or ``"InitializeStatus"``.
+        ids:
+            Entity identifiers.  Values are compared as strings.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Matching rows ordered by key.  Unknown IDs are ignored.
+        """
+
+        key = self._key(entity)
+        values = [str(i) for i in ids]
+        frames = []
+        for start in range(0, len(values), _MAX_PARAMS):
+            chunk = values[start : start + _MAX_PARAMS]
+            marks = ", ".join("?" * len(chunk))
+            frames.append(
+                self._query(
+                    f"SELECT * FROM {_quote(entity)} "
+                    f"WHERE {_quote(key)} IN ({marks})",
+                    list(chunk),
+                )
+            )
+        if not frames:
+            return self._query(f"SELECT * FROM {_quote(entity)} LIMIT 0", [])
+        result = pd.concat(frames, ignore_index=True)
+        return result.sort_values(key, kind="stable").reset_index(drop=True)
+
+    def filter_by_status(self, entity: str, min_status: str) -> pd.DataFrame:
+        """Return rows of ``entity`` ranked at or after ``min_status``.
+
+        Statuses are compared by their ``order`` in the status table used
+        to build the index, matching :meth:`StatusAPI.get_order`.
+
+        Parameters
+        ----------
+        entity:
+            Table name, e.g. ``"target"``.
+        min_status:
+            Lowest status to include.
+
+        Raises
+        ------
+        ValueError
+            If ``min_status`` is not part of the status table.
+        """
+
+        key = self._key(entity)
+        if min_status not in self.order_map:
+            raise ValueError(f"unknown status {min_status!r}")
+        return self._query(
+            f"SELECT * FROM {_quote(entity)} WHERE {_quote(ORDER_COLUMN)} >= ? "
+            f"ORDER BY {_quote(key)}",
+            [int(self.order_map[min_status])],
+        )
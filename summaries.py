@@ -0,0 +1,96 @@
+"""Status histograms and count totals of the entity tables.
+
+:func:`status_summary` counts the rows of an entity table per final status
+and totals its count columns.  Statuses are coded by their rank in the
+ordered status table and counted with :func:`numpy.bincount`.  The summary of
+every table is recorded in its ``.meta.yaml`` and all of them in
+:data:`SUMMARY_NAME`, so monitoring reads neither the entity tables nor their
+metadata files.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Mapping
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from checkpoint import atomic_write_bytes
+from constants import Cols
+from pipeline import count_columns_of
+from status_api import StatusAPI
+
+SUMMARY_NAME = "summary.yaml"
+
+# Key of the rows whose status is missing from the status table.
+UNKNOWN = "unknown"
+
+
+def status_ranks(status: StatusAPI) -> List[str]:
+    """Return the distinct statuses ordered by their rank."""
+
+    return list(dict.fromkeys(status.status_list))
+
+
+def status_summary(
+    df: pd.DataFrame, status: StatusAPI, column: str = Cols.FILTERED_NEW
+) -> Dict[str, object]:
+    """Return the row count per status and the count totals of ``df``.
+
+    Parameters
+    ----------
+    df:
+        Entity table with the final status in ``column``.
+    status:
+        :class:`StatusAPI` instance defining the statuses and their order.
+    column:
+        Status column of ``df``.
+
+    Returns
+    -------
+    dict
+        ``rows``, ``statuses`` with the number of rows of every status in
+        rank order, ``unknown`` when rows have a status missing from the
+        table, and ``counts`` with the sum of every count column.
+    """
+
+    ranks = status_ranks(status)
+    codes = pd.Categorical(df[column], categories=ranks).codes.astype(np.int64)
+    # Unknown statuses are counted in the trailing bin.
+    histogram = np.bincount(
+        np.where(codes >= 0, codes, len(ranks)), minlength=len(ranks) + 1
+    )
+    summary: Dict[str, object] = {
+        "rows": int(len(df)),
+        "statuses": {s: int(n) for s, n in zip(ranks, histogram)},
+    }
+    if histogram[-1]:
+        summary[UNKNOWN] = int(histogram[-1])
+    totals = {}
+    for col in count_columns_of(df.columns):
+        total = pd.to_numeric(df[col], errors="coerce").sum()
+        totals[col] = int(total) if float(total).is_integer() else float(total)
+    summary["counts"] = totals
+    return summary
+
+
+def write_run_summary(
+    path: Path,
+    summaries: Mapping[str, Dict[str, object]],
+    inputs: List[Path],
+    version: str,
+) -> Path:
+    """Write the summaries of all entity tables of one run to ``path``."""
+
+    run = {
+        "generated": datetime.utcnow().isoformat(),
+        "version": version,
+        "inputs": [str(p) for p in inputs],
+        "tables": dict(summaries),
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write_bytes(path, yaml.safe_dump(run, sort_keys=False).encode("utf-8"))
+    return path
@@ -0,0 +1,58 @@
+import shutil
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from pipeline import STATUS_FLAGS
+
+
+def make_input(path: Path) -> Path:
+    shutil.copy("tests/data/status.csv", path / "status.csv")
+    activities = pd.DataFrame(
+        {
+            "activity_chembl_id": ["a1", "a2", "a3"],
+            "assay_chembl_id": ["ass1", "ass1", "ass2"],
+            "document_chembl_id": ["doc1", "doc1", "doc2"],
+            "testitem_chembl_id": ["t1", "t1", "t2"],
+            "target_chembl_id": ["tar1", "tar1", "tar2"],
+            "mesurement_type": ["type1", "type1", "type1"],
+        }
+    )
+    for flag in STATUS_FLAGS:
+        activities[flag] = False
+    activities.loc[activities["activity_chembl_id"] != "a3", "high_citation_rate"] = True
+    activities.to_csv(path / "activities.csv", index=False)
+    pd.read_csv("tests/data/pairs.csv").to_csv(path / "pairs.csv", index=False)
+    return path
+
+
+def add_pairs(path: Path) -> Path:
+    activities = pd.read_csv(path / "activities.csv")
+    activities["high_citation_rate"] = True
+    activities.to_csv(path / "activities.csv", index=False)
+    pairs = pd.read_csv(path / "pairs.csv")
+    extra = pairs.assign(activity_chembl_id1="a2", activity_chembl_id2="a3")
+    pd.concat([pairs, extra, pairs.assign(activity_chembl_id2="a3")]).to_csv(
+        path / "pairs.csv", index=False
+    )
+    return path
+
+
+@pytest.fixture
+def input_dir(tmp_path: Path) -> Path:
+    """Input directory with three activities and a single pair."""
+
+    path = tmp_path / "in"
+    path.mkdir()
+    return make_input(path)
+
+
+@pytest.fixture
+def paired_input_dir(input_dir: Path) -> Path:
+    """``input_dir`` with flagged activities and pairs linking all of them."""
+
+    return add_pairs(input_dir)
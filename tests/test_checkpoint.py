@@ -0,0 +1,70 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import main
+from checkpoint import CHECKPOINT_DIR, CheckpointStore, inputs_fingerprint
+
+
+def test_checkpoint_roundtrip_and_validation(tmp_path):
+    source = tmp_path / "input.csv"
+    source.write_text("a\n1\n")
+    fingerprint = inputs_fingerprint([source], "default")
+    store = CheckpointStore(tmp_path / "ckpt", fingerprint)
+    df = pd.DataFrame({"a": [1, 2]})
+    path = store.save("InitializeStatus", df)
+    assert not list(path.parent.glob("*.tmp"))
+
+    reopened = CheckpointStore(tmp_path / "ckpt", fingerprint)
+    pd.testing.assert_frame_equal(reopened.load("InitializeStatus"), df)
+    assert reopened.load("InitializePairs") is None
+
+    # Corrupt files and changed inputs invalidate the checkpoint.
+    path.write_bytes(path.read_bytes() + b"x")
+    assert reopened.load("InitializeStatus") is None
+    source.write_text("a\n2\n")
+    changed = CheckpointStore(
+        tmp_path / "ckpt", inputs_fingerprint([source], "default")
+    )
+    assert changed.stages == {}
+
+
+def test_resume_skips_completed_stages(tmp_path, input_dir, monkeypatch):
+    out = tmp_path / "out"
+    main.classify_directory(input_dir, out, checkpoint=True)
+    assert (out / CHECKPOINT_DIR / "manifest.yaml").exists()
+    expected = {p.name: p.read_bytes() for p in out.glob("*.csv")}
+
+    def fail(*args, **kwargs):
+        raise AssertionError("stage recomputed")
+
+    monkeypatch.setattr(main, "initialize_status_profiles", fail)
+    monkeypatch.setattr(main, "run_initialize_pairs", fail)
+    monkeypatch.setattr(main, "run_activity_from_pairs", fail)
+    main.classify_directory(input_dir, out, resume=True)
+    assert {p.name: p.read_bytes() for p in out.glob("*.csv")} == expected
+
+
+def test_resume_with_prune_orphans_toggled(tmp_path, input_dir):
+    pairs = pd.read_csv(input_dir / "pairs.csv")
+    orphan = pairs.assign(activity_chembl_id2="gone")
+    pd.concat([pairs, orphan]).to_csv(input_dir / "pairs.csv", index=False)
+
+    expected = {}
+    for prune in (False, True):
+        out = tmp_path / f"fresh{prune}"
+        main.classify_directory(input_dir, out, prune_orphans=prune)
+        expected[prune] = pd.read_csv(out / "InitializePairs.csv")
+    assert len(expected[False]) != len(expected[True])
+
+    out = tmp_path / "out"
+    main.classify_directory(input_dir, out, checkpoint=True)
+    for prune in (True, False):
+        main.classify_directory(input_dir, out, resume=True, prune_orphans=prune)
+        result = pd.read_csv(out / "InitializePairs.csv")
+        pd.testing.assert_frame_equal(result, expected[prune])
+        assert (out / "OrphanPairs.csv").exists() == prune
+        assert (out / "OrphanPairs.meta.yaml").exists() == prune
@@ -0,0 +1,56 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from clusters import activity_clusters, cluster_status, connected_components
+from status_utils import StatusUtils
+
+
+def test_connected_components_labels_smallest_member():
+    labels = connected_components(np.array([0, 2, 4]), np.array([1, 3, 3]), 6)
+    assert labels.tolist() == [0, 0, 2, 2, 2, 5]
+
+
+def test_connected_components_long_chain():
+    rng = np.random.default_rng(0)
+    perm = rng.permutation(1000)
+    labels = connected_components(perm[:-1], perm[1:], 1000)
+    assert (labels == 0).all()
+
+
+def test_activity_clusters_and_status():
+    pairs = pd.DataFrame(
+        {
+            "activity_chembl_id1": ["a1", "a2", "a4", "a5"],
+            "activity_chembl_id2": ["a2", "a3", "a5", "a6"],
+            "INDEPENDENT": ["FALSE", "false", "FALSE", "TRUE"],
+        }
+    )
+    clusters = activity_clusters(pairs)
+    assert clusters["activity_chembl_id"].tolist() == [
+        "a1",
+        "a2",
+        "a3",
+        "a4",
+        "a5",
+        "a6",
+    ]
+    # The independent a5-a6 pair does not link its activities
+    assert clusters["cluster_id"].tolist() == [0, 0, 0, 1, 1, 2]
+    assert clusters["cluster_size"].tolist() == [3, 3, 3, 2, 2, 1]
+
+    status = StatusUtils(pd.read_csv("tests/data/status.csv"))
+    activity = pd.DataFrame(
+        {
+            "activity_chembl_id": ["a1", "a2", "a3", "a4", "a5", "a6"],
+            "Filtered.new": ["S1", "S3", "S2", "S2", "bad", "bad"],
+        }
+    )
+    summary = cluster_status(clusters, activity, status)
+    assert summary["cluster_id"].tolist() == [0, 1, 2]
+    assert summary["Filtered.new"].iloc[:2].tolist() == ["S3", "S2"]
+    assert pd.isna(summary["Filtered.new"].iat[2])
@@ -0,0 +1,57 @@
+import gzip
+import hashlib
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+import yaml
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import compression
+from compression import compress_bytes, detect_compression, read_table
+from pipeline import write_csv_with_meta
+
+
+def test_parallel_gzip_members_roundtrip(monkeypatch):
+    monkeypatch.setattr(compression, "BLOCK_SIZE", 1000)
+    data = b"".join(b"row%d,value\n" % i for i in range(5000))
+    packed = compress_bytes(data, "gzip", threads=4)
+    assert gzip.decompress(packed) == data
+    # Output does not depend on the number of threads.
+    assert compress_bytes(data, "gzip", threads=2) == packed
+
+
+def test_write_csv_with_meta_compressed(tmp_path):
+    df = pd.DataFrame({"a": ["x", "y"], "b": [1, 2]})
+    plain = write_csv_with_meta(df, tmp_path / "t.csv", [], "1.0")
+    assert plain == tmp_path / "t.csv"
+
+    target = write_csv_with_meta(df, tmp_path / "t.csv", [], "1.0", compression="gzip")
+    assert target == tmp_path / "t.csv.gz"
+    assert not plain.exists()
+    assert detect_compression(target) == "gzip"
+
+    meta = yaml.safe_load((tmp_path / "t.meta.yaml").read_text())
+    raw = gzip.decompress(target.read_bytes())
+    assert meta["sha256"] == hashlib.sha256(raw).hexdigest()
+    assert meta["sha256_compressed"] == hashlib.sha256(target.read_bytes()).hexdigest()
+    assert meta["file"] == "t.csv.gz"
+
+    # Readers find the compressed variant from the logical name.
+    pd.testing.assert_frame_equal(read_table(tmp_path / "t.csv"), df)
+
+
+def test_detect_compression_ignores_suffix(tmp_path):
+    path = tmp_path / "t.csv"
+    path.write_bytes(gzip.compress(b"a,b\n1,2\n"))
+    assert read_table(path)["b"].tolist() == [2]
+
+
+def test_zstd_roundtrip(tmp_path):
+    pytest.importorskip("zstandard")
+    df = pd.DataFrame({"a": range(100)})
+    target = write_csv_with_meta(df, tmp_path / "t.csv", [], "1.0", compression="zstd")
+    assert detect_compression(target) == "zstd"
+    pd.testing.assert_frame_equal(read_table(tmp_path / "t.csv"), df)
@@ -0,0 +1,73 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import main
+from counts import attach_counts, count_columns, pivot_counts
+from pipeline import aggregate_entities
+from status_utils import StatusUtils
+
+PAIRS = pd.DataFrame(
+    {
+        "activity_chembl_id1": ["a1", "a1", "a2", "a3"],
+        "activity_chembl_id2": ["a2", "a3", "a3", "a4"],
+        "standard_type": ["EC50", "EC50", "Kd", "IC50"],
+        "INDEPENDENT": ["True", "False", "True", "True"],
+    }
+)
+
+
+def test_pivot_counts_all_types():
+    counts = pivot_counts(PAIRS)
+    assert list(counts.columns) == [
+        "activity_chembl_id",
+        *count_columns(["EC50", "IC50", "Kd"]),
+    ]
+    a1 = counts.set_index("activity_chembl_id").loc["a1"]
+    assert a1["independent_EC50"] == 1 and a1["non_independent_EC50"] == 1
+    assert counts.set_index("activity_chembl_id").loc["a3"].sum() == 3
+
+
+def test_pivot_counts_selected_types():
+    counts = pivot_counts(PAIRS, ["Kd", "Ki"])
+    assert counts["activity_chembl_id"].tolist() == ["a2", "a3"]
+    assert counts["independent_Kd"].tolist() == [1, 1]
+    assert counts["independent_Ki"].sum() == 0
+    with pytest.raises(KeyError):
+        pivot_counts(PAIRS.drop(columns="INDEPENDENT"))
+
+
+def test_derived_counts_are_aggregated():
+    status = StatusUtils(pd.read_csv("tests/data/status.csv"))
+    activities = pd.DataFrame(
+        {
+            "activity_chembl_id": ["a1", "a2", "a3"],
+            "assay_chembl_id": ["s1", "s1", "s2"],
+            "Filtered.init": status.status_list[0],
+            "independent_IC50": [5, 5, 5],
+        }
+    )
+    init = attach_counts(activities, pivot_counts(PAIRS))
+    # Input counts take precedence over derived ones.
+    assert init["independent_IC50"].tolist() == [5, 5, 5]
+    assay = aggregate_entities(None, init, status, entities=["assay"])["assay"]
+    assert assay["independent_EC50"].tolist() == [2, 0]
+    assert assay["non_independent_EC50"].tolist() == [1, 1]
+
+
+def test_classify_directory_count_types(tmp_path, input_dir):
+    pairs = pd.read_csv(input_dir / "pairs.csv").assign(INDEPENDENT=False)
+    pairs.to_csv(input_dir / "pairs.csv", index=False)
+    main.classify_directory(input_dir, tmp_path / "out", count_types=["type1"])
+    for name in ("activity", "assay", "testitem"):
+        df = pd.read_csv(tmp_path / "out" / f"{name}.csv")
+        assert df.columns[-2:].tolist() == [
+            "independent_type1",
+            "non_independent_type1",
+        ]
+    activity = pd.read_csv(tmp_path / "out" / "activity.csv")
+    assert activity["non_independent_type1"].tolist() == [1, 1]
@@ -0,0 +1,84 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from diff_outputs import ABSENT, diff_outputs
+from partitioning import PartitionSpec, write_table
+from pipeline import write_csv_with_meta
+
+
+def write_assay(directory: Path, rows, compression=None) -> None:
+    df = pd.DataFrame(
+        rows,
+        columns=[
+            "assay_chembl_id",
+            "Filtered.new",
+            "independent_IC50",
+            "non_independent_IC50",
+            "independent_Ki",
+            "non_independent_Ki",
+        ],
+    )
+    write_csv_with_meta(df, directory / "assay.csv", [], "1.0", compression=compression)
+
+
+def test_diff_reports_transitions(tmp_path):
+    old, new = tmp_path / "old", tmp_path / "new"
+    rows = [[f"A{i}", "no_issue", 1, 0, 0, 0] for i in range(50)]
+    write_assay(old, rows)
+    changed = [list(r) for r in rows[1:]]
+    changed[0][1] = "S1"
+    changed[1][2] = 5
+    changed.append(["B1", "S2", 0, 0, 0, 0])
+    write_assay(new, changed, compression="gzip")
+
+    result = diff_outputs(old, new, report_dir=tmp_path / "report", partitions=3)
+    assay = result["assay"]
+    assert assay.changed and not assay.identical
+    assert (assay.added, assay.removed) == (1, 1)
+    assert assay.status_changed == 1
+    assert assay.counts_changed == 1
+    assert assay.transitions == {
+        ("no_issue", "S1"): 1,
+        ("no_issue", ABSENT): 1,
+        (ABSENT, "S2"): 1,
+    }
+    changes = pd.read_csv(tmp_path / "report" / "assay.changes.csv")
+    assert sorted(changes["assay_chembl_id"]) == ["A0", "A1", "A2", "B1"]
+    assert (tmp_path / "report" / "diff_report.yaml").exists()
+
+
+def test_identical_tables_skipped_by_hash(tmp_path):
+    old, new = tmp_path / "old", tmp_path / "new"
+    rows = [["A1", "S1", 1, 0, 0, 0]]
+    write_assay(old, rows)
+    write_assay(new, rows, compression="gzip")
+    # The data file is never read when the recorded hashes agree.
+    (new / "assay.csv.gz").write_bytes(b"garbage")
+    result = diff_outputs(old, new)
+    assert result["assay"].identical and not result["assay"].changed
+
+
+def test_partitioned_tables(tmp_path):
+    old, new, flat = tmp_path / "old", tmp_path / "new", tmp_path / "flat"
+    rows = [[f"A{i}", "no_issue", i, 0, 0, 0] for i in range(20)]
+    columns = ["assay_chembl_id", "Filtered.new", "independent_IC50"]
+    columns += ["non_independent_IC50", "independent_Ki", "non_independent_Ki"]
+    spec = PartitionSpec("assay_chembl_id", buckets=4)
+    df = pd.DataFrame(rows, columns=columns)
+    write_table(df, old / "assay.csv", [], "1.0", partition=spec)
+    write_table(df, new / "assay.csv", [], "1.0", partition=spec)
+    write_assay(flat, rows[1:])
+
+    # Equal manifests are compared by their table hash alone.
+    (new / "assay" / "part-00000.csv").write_bytes(b"garbage")
+    result = diff_outputs(old, new)
+    assert result["assay"].identical and result["assay"].rows_old == 20
+
+    result = diff_outputs(old, flat, partitions=3)
+    assay = result["assay"]
+    assert (assay.rows_old, assay.rows_new) == (20, 19)
+    assert (assay.added, assay.removed, assay.status_changed) == (0, 1, 0)
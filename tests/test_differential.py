@@ -0,0 +1,80 @@
+import sys
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from differential import random_case, run_case, run_cases, run_stage
+from engines import (
+    REFERENCE,
+    get_engine,
+    register_engine,
+    registered_engines,
+    unregister_engine,
+)
+
+
+def test_registry():
+    assert registered_engines()[:2] == [REFERENCE, "pandas"]
+    with pytest.raises(KeyError, match="unknown engine"):
+        get_engine("missing")
+    with pytest.raises(ValueError):
+        register_engine(get_engine(REFERENCE), replace=True)
+    with pytest.raises(ValueError):
+        unregister_engine(REFERENCE)
+
+
+def test_engines_match_reference():
+    report = run_cases(range(60))
+    assert not report.mismatches, report.format()
+    # The generated cases reach every stage and its error paths.
+    assert all(report.runs.values())
+    assert report.errors["initialize_status"] and report.errors["aggregate_entities"]
+    # Most aggregations are compared on real tables.
+    assert report.errors["aggregate_entities"] < report.runs["aggregate_entities"] / 4
+    assert set(report.timings) == set(registered_engines())
+
+
+def test_divergent_engine_is_reported():
+    def shuffled_status(activities, status, empty_fallback):
+        df = get_engine("pandas").initialize_status(activities, status, empty_fallback)
+        df["Filtered.init"] = df["Filtered.init"].iloc[::-1].to_numpy()
+        return df
+
+    broken = replace(
+        get_engine("pandas"), name="broken", initialize_status=shuffled_status
+    )
+    register_engine(broken)
+    try:
+        seeds = [s for s in range(40) if len(random_case(s).activities) > 5][:5]
+        report = run_cases(seeds, engines=["broken"])
+    finally:
+        unregister_engine("broken")
+    assert {m.stage for m in report.mismatches} == {"initialize_status"}
+    assert "broken" not in registered_engines()
+    assert run_case(random_case(seeds[0])).cases == 1
+
+
+def test_polars_engine_matches_reference():
+    pytest.importorskip("polars", minversion="2.0")
+    assert "polars" in registered_engines()
+    report = run_cases(range(60), engines=["polars"])
+    assert not report.mismatches, report.format()
+    assert all(report.runs.values())
+
+
+def test_panics_are_recorded():
+    class Panic(BaseException):
+        """Like the Polars ``PanicException``."""
+
+    def panic(*args):
+        raise Panic("entered unreachable code")
+
+    def interrupt(*args):
+        raise KeyboardInterrupt
+
+    assert isinstance(run_stage(panic).error, Panic)
+    with pytest.raises(KeyboardInterrupt):
+        run_stage(interrupt)
@@ -0,0 +1,67 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from enrichment import REFERENCE_SPECS, enrich_entity, load_reference, load_references
+
+
+def write_references(path: Path) -> None:
+    # ``testitem.csv`` ships with a byte order mark and the legacy key name.
+    path.joinpath("testitem.csv").write_text(
+        "﻿molecule_chembl_id,molecule_type,mw_freebase,canonical_smiles\n"
+        "M1,Small molecule,180.2,CCO\n"
+        "M1,Small molecule,999.0,CCO\n"
+        "M2,Protein,5000.0,\n",
+        encoding="utf-8",
+    )
+    pd.DataFrame(
+        {
+            "target_chembl_id": ["T1", "T2"],
+            "organism": ["Homo sapiens", "Mus musculus"],
+            "target_uniprot_id": ["P1", "P2"],
+            "target_names": ["a", "b"],
+        }
+    ).to_csv(path / "target.csv", index=False)
+
+
+def test_load_reference_projects_and_indexes(tmp_path):
+    write_references(tmp_path)
+    ref = load_reference(tmp_path / "testitem.csv", REFERENCE_SPECS["testitem"])
+    assert ref.index.name == "testitem_chembl_id"
+    assert list(ref.columns) == ["molecule_type", "mw_freebase"]
+    # Duplicate keys keep their first row.
+    assert ref.loc["M1", "mw_freebase"] == 180.2
+
+
+def test_enrich_entity_tables(tmp_path):
+    write_references(tmp_path)
+    refs = load_references(tmp_path)
+    testitem = pd.DataFrame({"testitem_chembl_id": ["M2", "M3"], "Filtered.new": "x"})
+    out = enrich_entity("testitem", testitem, refs)
+    assert out["molecule_type"].tolist()[0] == "Protein"
+    assert pd.isna(out["molecule_type"].iloc[1])
+
+    system = pd.DataFrame({"system_id": ["M1_T2_IC50"], "Filtered.new": ["x"]})
+    out = enrich_entity("system", system, refs)
+    assert out.loc[0, "molecule_type"] == "Small molecule"
+    assert out.loc[0, "organism"] == "Mus musculus"
+
+    assay = pd.DataFrame({"assay_chembl_id": ["A1"]})
+    assert enrich_entity("assay", assay, refs) is assay
+
+
+def test_reference_cache_reused(tmp_path):
+    write_references(tmp_path)
+    cache = tmp_path / "cache"
+    first = load_references(tmp_path, cache_dir=cache)
+    assert len(list(cache.glob("*.pkl"))) == 2
+    # The pickled index is used instead of parsing the CSV again.
+    spec = REFERENCE_SPECS["target"]
+    cached = next(cache.glob("target.*.pkl"))
+    pd.DataFrame({"organism": ["cached"]}, index=pd.Index(["T9"])).to_pickle(cached)
+    again = load_reference(tmp_path / "target.csv", spec, cache_dir=cache)
+    assert again.loc["T9", "organism"] == "cached"
+    assert first["target"].loc["T1", "organism"] == "Homo sapiens"
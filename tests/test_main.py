@@ -2,10 +2,11 @@ import sys
 from pathlib import Path
 
 import pandas as pd
+import pytest
 
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
-from main import classify_directory
+from main import classify_directory, parse_args
 
 
 def test_classify_directory(tmp_path: Path) -> None:
@@ -27,3 +28,26 @@ def test_classify_directory(tmp_path: Path) -> None:
 
     act_pairs = pd.read_csv(tmp_path / "ActivityInitializeStatus.csv")
     assert "Filtered.new" in act_pairs.columns
+
+
+def test_classify_directory_selected_entities(tmp_path: Path) -> None:
+    """Entities derived from activities alone never read ``pairs.csv``."""
+    input_dir = tmp_path / "in"
+    input_dir.mkdir()
+    for name in ("status.csv", "activities.csv"):
+        (input_dir / name).write_bytes((Path("tests/data") / name).read_bytes())
+    out = tmp_path / "out"
+    classify_directory(input_dir, out, entities=["assay", "target"])
+    assert sorted(p.name for p in out.glob("*.csv")) == [
+        "InitializeStatus.csv",
+        "assay.csv",
+        "target.csv",
+    ]
+
+
+def test_unknown_entities_rejected(capsys) -> None:
+    assert parse_args(["--entities", "assay, target"]).entities == ["assay", "target"]
+    with pytest.raises(SystemExit) as exc:
+        parse_args(["--entities", "assay,assays"])
+    assert exc.value.code == 2
+    assert "unknown entity tables assays" in capsys.readouterr().err
@@ -0,0 +1,91 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import yaml
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import main
+from orphans import ActivityIdIndex, split_orphan_pairs
+
+
+def test_index_modes():
+    chembl = ActivityIdIndex(pd.Series(["CHEMBL3", "CHEMBL10", None]))
+    assert chembl.prefix == "CHEMBL" and chembl.keys.dtype == np.int64
+    mask = chembl.contains(pd.Series(["CHEMBL10", "CHEMBL010", "X10", None, "CHEMBL4"]))
+    assert mask.tolist() == [True, False, False, False, False]
+
+    numbers = ActivityIdIndex(pd.Series([5, 1, 3]))
+    assert numbers.contains(pd.Series([3, 4])).tolist() == [True, False]
+    assert numbers.contains(pd.Series(["3", "x"])).tolist() == [True, False]
+
+    text = ActivityIdIndex(pd.Series(["b-2", "a", "c"]))
+    assert text.prefix is None
+    assert text.contains(pd.Series(["a", "d", np.nan])).tolist() == [True, False, False]
+
+
+def test_split_orphan_pairs():
+    activities = pd.DataFrame({"activity_chembl_id": ["a1", "a2"]})
+    pairs = pd.DataFrame(
+        {
+            "activity_chembl_id1": ["a1", "a1", "x", "x"],
+            "activity_chembl_id2": ["a2", "y", "a2", "y"],
+        }
+    )
+    kept, orphans = split_orphan_pairs(pairs, activities)
+    assert kept.to_dict("list") == {
+        "activity_chembl_id1": ["a1"],
+        "activity_chembl_id2": ["a2"],
+    }
+    assert orphans["orphan_reason"].tolist() == [
+        "missing_id2",
+        "missing_id1",
+        "missing_both",
+    ]
+
+
+def test_classify_directory_quarantines_orphans(tmp_path, input_dir):
+    pairs = pd.read_csv(input_dir / "pairs.csv")
+    orphan = pairs.assign(activity_chembl_id2="gone")
+    pd.concat([pairs, orphan]).to_csv(input_dir / "pairs.csv", index=False)
+
+    out = tmp_path / "out"
+    main.classify_directory(input_dir, out, prune_orphans=True)
+    assert len(pd.read_csv(out / "InitializePairs.csv")) == 1
+    assert pd.read_csv(out / "OrphanPairs.csv")["activity_chembl_id2"].tolist() == [
+        "gone"
+    ]
+    meta = yaml.safe_load((out / "OrphanPairs.meta.yaml").read_text())
+    assert meta["orphans"]["missing_id2"] == 1
+    assert meta["orphans"]["pairs_kept"] == 1
+
+
+def test_blank_id_in_integer_pairs_file(tmp_path, paired_input_dir):
+    # A blank cell makes pandas read the integer IDs of a column as floats.
+    numbers = {"a1": 1, "a2": 2, "a3": 3}
+    activities = pd.read_csv(paired_input_dir / "activities.csv")
+    activities["activity_chembl_id"] = activities["activity_chembl_id"].map(numbers)
+    activities.to_csv(paired_input_dir / "activities.csv", index=False)
+    pairs = pd.read_csv(paired_input_dir / "pairs.csv")
+    for col in ("activity_chembl_id1", "activity_chembl_id2"):
+        pairs[col] = pairs[col].map(numbers)
+    blank = pairs.head(1).assign(activity_chembl_id1=None)
+    pd.concat([pairs, blank]).to_csv(paired_input_dir / "pairs.csv", index=False)
+
+    pairs = pd.read_csv(paired_input_dir / "pairs.csv")
+    assert pairs["activity_chembl_id1"].dtype == np.float64
+    kept, orphans = split_orphan_pairs(pairs, activities)
+    assert len(kept) == len(pairs) - 1
+    assert orphans["orphan_reason"].tolist() == ["missing_id1"]
+
+    # Floats on the activity side match integer pair IDs as well.
+    floats = activities.astype({"activity_chembl_id": float})
+    kept, orphans = split_orphan_pairs(pairs.dropna(), floats)
+    assert len(kept) == len(pairs) - 1 and orphans.empty
+
+    out = tmp_path / "out"
+    main.classify_directory(paired_input_dir, out, prune_orphans=True)
+    assert len(pd.read_csv(out / "InitializePairs.csv")) == len(pairs) - 1
+    assert len(pd.read_csv(out / "OrphanPairs.csv")) == 1
@@ -0,0 +1,81 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import main
+from differential import random_case
+from parallel import DaskBackend, LocalBackend, run_partitioned
+from pipeline import classify_tables, initialize_status, sort_once
+
+PAIR_KEYS = ["activity_chembl_id1", "activity_chembl_id2"]
+
+
+@pytest.fixture(scope="module")
+def backend():
+    with LocalBackend(2) as pool:
+        yield pool
+
+
+def initialised(seed):
+    case = random_case(seed)
+    init = initialize_status(case.activities, case.status, case.empty_fallback)
+    return case, sort_once(init, "activity_chembl_id")
+
+
+def outcome(func):
+    try:
+        return func(), None
+    except Exception as exc:  # noqa: BLE001 - compared below
+        return None, (type(exc), str(exc))
+
+
+def test_partitions_match_single_process(backend):
+    for seed in range(25):
+        try:
+            case, init = initialised(seed)
+        except Exception:
+            continue
+        pairs = sort_once(case.pairs, PAIR_KEYS)
+        expected, error = outcome(
+            lambda: classify_tables(
+                case.activities, case.status, pairs, empty_fallback=case.empty_fallback
+            )
+        )
+        result, parallel_error = outcome(
+            lambda: run_partitioned(init, pairs, case.status, backend, partitions=3)
+        )
+        assert parallel_error == error, seed
+        for name, df in (result or {}).items():
+            pd.testing.assert_frame_equal(
+                df, expected[name], check_dtype=bool(len(df)), obj=f"{seed} {name}"
+            )
+
+
+def test_selected_entities(backend):
+    case, init = initialised(0)
+    tables = run_partitioned(init, None, case.status, backend, entities=["target"])
+    expected = classify_tables(case.activities, case.status, entities=["target"])
+    assert list(tables) == ["target"]
+    pd.testing.assert_frame_equal(tables["target"], expected["target"])
+
+
+def test_classify_directory_local_backend(tmp_path, paired_input_dir):
+    main.classify_directory(paired_input_dir, tmp_path / "serial")
+    main.classify_directory(
+        paired_input_dir, tmp_path / "parallel", backend="local", workers=2
+    )
+    for path in sorted((tmp_path / "serial").glob("*.csv")):
+        assert (tmp_path / "parallel" / path.name).read_bytes() == path.read_bytes()
+
+
+def test_dask_backend():
+    pytest.importorskip("dask.distributed")
+    case, init = initialised(0)
+    with DaskBackend(workers=2) as cluster:
+        tables = run_partitioned(init, None, case.status, cluster, entities=["assay"])
+    expected = classify_tables(case.activities, case.status, entities=["assay"])
+    pd.testing.assert_frame_equal(tables["assay"], expected["assay"])
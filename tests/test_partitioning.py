@@ -0,0 +1,81 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from partitioning import (
+    PartitionSpec,
+    bucket_of,
+    load_manifest,
+    read_output,
+    read_partitioned,
+    write_table,
+)
+
+ACTIVITIES = pd.DataFrame(
+    {
+        "activity_chembl_id": ["a1", "a2", "a3", "a4"],
+        "target_chembl_id": ["t1", "t2", "t1", None],
+        "Filtered.init": ["S1", "S2", "S1", "S3"],
+    }
+)
+
+
+def test_value_partitions_prune_reads(tmp_path):
+    path = tmp_path / "InitializeStatus.csv"
+    write_table(
+        ACTIVITIES, path, [], "1.0", partition=PartitionSpec("target_chembl_id")
+    )
+    manifest = load_manifest(tmp_path / "InitializeStatus")
+    assert [p["value"] for p in manifest["partitions"]] == ["t1", "t2", None]
+    assert not path.exists()
+
+    # Only the partition of ``t1`` is touched.
+    for part in manifest["partitions"][1:]:
+        (tmp_path / "InitializeStatus" / part["file"]).unlink()
+    df = read_partitioned(path, values=["t1"])
+    assert df["activity_chembl_id"].tolist() == ["a1", "a3"]
+
+
+def test_hash_partitions_inherit_column(tmp_path):
+    activity = pd.DataFrame(
+        {"activity_chembl_id": ["a1", "a2", "a3", "a4"], "Filtered.new": "S1"}
+    )
+    spec = PartitionSpec("target_chembl_id", buckets=8)
+    write_table(
+        activity,
+        tmp_path / "activity.csv",
+        [],
+        "1.0",
+        partition=spec,
+        activities=ACTIVITIES,
+        compression="gzip",
+    )
+    manifest = load_manifest(tmp_path / "activity")
+    assert manifest["derived_from"] == "activity_chembl_id"
+    assert manifest["partitions"][0]["file"].endswith(".csv.gz")
+    whole = read_output(tmp_path / "activity.csv")
+    assert sorted(whole["activity_chembl_id"]) == ["a1", "a2", "a3", "a4"]
+    # Inherited columns select whole buckets: a superset of the matches.
+    subset = read_partitioned(tmp_path / "activity", values=["t1"])
+    assert {"a1", "a3"} <= set(subset["activity_chembl_id"])
+    bucket = bucket_of(["t1"], 8)[0]
+    expected = [p["rows"] for p in manifest["partitions"] if p["value"] == bucket]
+    assert len(subset) == sum(expected)
+
+
+def test_unpartitionable_table_written_whole(tmp_path):
+    system = pd.DataFrame({"system_id": ["x_y_z"], "Filtered.new": ["S1"]})
+    spec = PartitionSpec("target_chembl_id")
+    path = write_table(
+        system,
+        tmp_path / "system.csv",
+        [],
+        "1.0",
+        partition=spec,
+        activities=ACTIVITIES,
+    )
+    assert path == tmp_path / "system.csv"
+    pd.testing.assert_frame_equal(read_output(path), system)
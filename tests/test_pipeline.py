@@ -1,16 +1,26 @@
 import sys
+import tracemalloc
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 from pipeline import (
+    COUNT_COLUMNS,
+    STATUS_FLAGS,
     activity_from_pairs,
     aggregate_entities,
+    classify_tables,
+    copy_on_write,
     initialize_pairs,
     initialize_status,
+    initialize_status_profiles,
+    sort_once,
+    _unify_pair_halves,
 )
+from status_api import load_status_profiles
 from status_utils import StatusUtils
 from constants import Cols
 
@@ -137,3 +147,120 @@ def test_activities_with_legacy_columns() -> None:
     assert (
         system.loc[system["system_id"] == "t1_tar1_type1", "independent_Ki"].iat[0] == 2
     )
+
+
+def test_initialize_status_profiles() -> None:
+    """Each profile resolves the shared flag patterns with its own order."""
+    status_df = pd.read_csv("tests/data/status.csv")
+    _, activities, _ = load_data()
+    activities = activities.assign(review=True)
+    profiles = load_status_profiles(
+        {"base": status_df, "review_first": status_df.assign(order=[2, 1, 3, 4])}
+    )
+    result = initialize_status_profiles(activities, profiles, "GLOBAL_MIN")
+    assert result["base"][Cols.FILTERED_INIT].tolist() == ["S1", "S2"]
+    assert result["review_first"][Cols.FILTERED_INIT].tolist() == ["S2", "S2"]
+    # Single-profile results match ``initialize_status``
+    single = initialize_status(activities, profiles["base"], "GLOBAL_MIN")
+    pd.testing.assert_frame_equal(single, result["base"])
+
+
+def test_sort_once_skips_sorted_frames() -> None:
+    """Sorted frames pass through untouched; others get a stable sort."""
+    df = pd.DataFrame({"k": ["a", "b", "b"], "v": [1, 2, 3]})
+    assert sort_once(df, "k") is df
+
+    shuffled = pd.DataFrame({"k": ["b", "a", "b"], "v": [1, 2, 3]}, index=[7, 8, 9])
+    result = sort_once(shuffled, ["k"])
+    assert result["v"].tolist() == [2, 1, 3]
+    assert result.index.tolist() == [0, 1, 2]
+
+
+def test_activity_from_pairs_is_key_ordered() -> None:
+    status, activities, pairs = load_data()
+    init_act = initialize_status(activities, status, "GLOBAL_MIN")
+    swapped = pairs.rename(
+        columns={
+            "activity_chembl_id1": "activity_chembl_id2",
+            "activity_chembl_id2": "activity_chembl_id1",
+        }
+    )
+    init_pairs = initialize_pairs(swapped, init_act, status)
+    merged = activity_from_pairs(init_pairs, init_act, status)
+    assert merged[Cols.ACTIVITY_ID].is_monotonic_increasing
+
+
+def test_unify_pair_halves_matches_drop_duplicates() -> None:
+    """Integer-keyed dedupe keeps the ``drop_duplicates`` semantics."""
+    pairs = pd.DataFrame(
+        {
+            "activity_chembl_id1": ["a1", "a1", "a2", None, ""],
+            "activity_chembl_id2": ["a2", "a3", "a1", "a1", "a4"],
+            "Filtered": ["S1", "S1", "S1", "S1", None],
+            "independent_IC50": [1.0, 1.0, 1.0, float("nan"), float("nan")],
+        },
+        index=[4, 3, 2, 1, 0],
+    )
+    shared = ["Filtered", "independent_IC50"]
+    left = pairs[["activity_chembl_id1", *shared]].rename(
+        columns={"activity_chembl_id1": Cols.ACTIVITY_ID}
+    )
+    right = pairs[["activity_chembl_id2", *shared]].rename(
+        columns={"activity_chembl_id2": Cols.ACTIVITY_ID}
+    )
+    expected = pd.concat([left, right], ignore_index=True).drop_duplicates()
+    expected = expected[
+        expected[Cols.ACTIVITY_ID].notna() & (expected[Cols.ACTIVITY_ID] != "")
+    ].reset_index(drop=True)
+    pd.testing.assert_frame_equal(_unify_pair_halves(pairs, shared), expected)
+
+
+def test_copy_on_write_peak_memory_bounded():
+    status = StatusUtils(pd.read_csv("tests/data/status.csv"))
+    n = 20000
+    rng = np.random.default_rng(0)
+    activities = pd.DataFrame(
+        {
+            Cols.ACTIVITY_ID: [f"A{i}" for i in range(n)],
+            Cols.ASSAY_ID: [f"AS{i}" for i in rng.integers(0, 500, n)],
+            Cols.DOCUMENT_ID: [f"D{i}" for i in rng.integers(0, 200, n)],
+            Cols.TESTITEM_ID: [f"T{i}" for i in rng.integers(0, 300, n)],
+            Cols.TARGET_ID: [f"G{i}" for i in rng.integers(0, 50, n)],
+            Cols.MEASUREMENT_TYPE: rng.choice(["IC50", "Ki"], n),
+        }
+    )
+    for flag in STATUS_FLAGS:
+        activities[flag] = False
+    activities["high_citation_rate"] = rng.random(n) < 0.3
+    for col in COUNT_COLUMNS:
+        activities[col] = rng.integers(0, 3, n)
+    input_size = activities.memory_usage(deep=True).sum()
+    before = activities.copy()
+
+    tracemalloc.start()
+    try:
+        with copy_on_write():
+            init = initialize_status(activities, status, "GLOBAL_MIN")
+            act_pairs = init.rename(columns={Cols.FILTERED_INIT: Cols.FILTERED})
+            aggregate_entities(init, init, status, act_pairs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert peak < 2 * input_size
+    pd.testing.assert_frame_equal(activities, before)
+
+
+def test_classify_tables_skips_pairs_when_not_needed() -> None:
+    status, activities, _ = load_data()
+
+    def no_pairs():
+        raise AssertionError("pairs loaded")
+
+    tables = classify_tables(activities, status, no_pairs, entities=["target", "assay"])
+    assert list(tables) == ["InitializeStatus", "assay", "target"]
+    init = initialize_status(activities, status, "GLOBAL_MIN")
+    expected = aggregate_entities(None, init, status, entities=["assay", "target"])
+    pd.testing.assert_frame_equal(tables["assay"], expected["assay"])
+    pd.testing.assert_frame_equal(tables["target"], expected["target"])
+    assert tables["target"]["target_chembl_id"].is_monotonic_increasing
@@ -0,0 +1,54 @@
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import main
+from pipelined import BackgroundWriter, prefetch, reader_pool
+
+
+def test_prefetch_runs_in_background():
+    started = threading.Event()
+
+    def loader():
+        started.set()
+        return 42
+
+    with reader_pool() as pool:
+        load = prefetch(pool, loader)
+        # The loader runs without being asked for its result.
+        assert started.wait(5)
+        assert load() == load() == 42
+
+
+def test_prefetch_without_pool_is_lazy():
+    calls = []
+    load = prefetch(None, lambda: calls.append(1) or len(calls))
+    assert not calls
+    assert load() == load() == 1
+
+
+def test_background_writer_keeps_order_and_raises():
+    written = []
+    with BackgroundWriter() as writer:
+        for i in range(5):
+            writer.submit(written.append, i)
+    assert written == list(range(5))
+
+    def fail():
+        raise OSError("disk full")
+
+    with pytest.raises(OSError, match="disk full"):
+        with BackgroundWriter() as writer:
+            writer.submit(fail)
+
+
+def test_overlapped_run_matches_serial(tmp_path, input_dir):
+    main.classify_directory(input_dir, tmp_path / "serial", overlap=False)
+    main.classify_directory(input_dir, tmp_path / "overlap")
+    serial = {p.name: p.read_bytes() for p in (tmp_path / "serial").glob("*.csv")}
+    overlap = {p.name: p.read_bytes() for p in (tmp_path / "overlap").glob("*.csv")}
+    assert serial and overlap == serial
@@ -0,0 +1,51 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import main
+import planner
+from planner import MAX_PARTITIONS, parse_memory, plan_execution
+
+
+def test_parse_memory():
+    assert parse_memory("512") == 512
+    assert parse_memory("2K") == 2048
+    assert parse_memory("1.5GB") == 3 * 1024**3 // 2
+    with pytest.raises(ValueError):
+        parse_memory("lots")
+
+
+def test_plan_modes_follow_budget(paired_input_dir, monkeypatch):
+    monkeypatch.setattr(planner, "MIN_PARTITION_ROWS", 1)
+    roomy = plan_execution(paired_input_dir, parse_memory("1G"))
+    assert {p.mode for p in roomy.stages.values()} == {"memory"}
+    tight = plan_execution(paired_input_dir, 1)
+    assert {p.mode for p in tight.stages.values()} == {"chunked"}
+    assert all(p.partitions > 1 for p in tight.stages.values())
+    assert plan_execution(paired_input_dir, None)["initialize_pairs"].mode == "memory"
+
+
+def test_partitions_grow_with_shrinking_budget():
+    estimate, output, rows = 8e9, 2e9, 10**8
+    counts = [
+        planner._choose("stage", estimate, output, budget, rows).partitions
+        for budget in np.geomspace(1e10, 1, 60)
+    ]
+    assert counts == sorted(counts)
+    assert counts[0] == 1 and counts[-1] == MAX_PARTITIONS
+    # Partitions keep at least ``MIN_PARTITION_ROWS`` rows.
+    small = planner._choose("stage", estimate, output, 1, 50_000)
+    assert small.partitions == 5
+
+
+def test_partitioned_stages_match_in_memory(tmp_path, paired_input_dir, monkeypatch):
+    monkeypatch.setattr(planner, "MIN_PARTITION_ROWS", 1)
+    main.classify_directory(paired_input_dir, tmp_path / "full")
+    main.classify_directory(paired_input_dir, tmp_path / "tight", max_memory=1)
+    full = {p.name: p.read_bytes() for p in (tmp_path / "full").glob("*.csv")}
+    tight = {p.name: p.read_bytes() for p in (tmp_path / "tight").glob("*.csv")}
+    assert full and tight == full
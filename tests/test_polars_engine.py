@@ -0,0 +1,75 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import main
+import pipeline
+import polars_engine
+from status_utils import StatusUtils
+
+pytest.importorskip("polars", minversion="2.0")
+
+
+def load_input(path: Path, status_path: Path | None = None):
+    status = StatusUtils(pd.read_csv(status_path or path / "status.csv"))
+    activities = pd.read_csv(path / "activities.csv")
+    pairs = pd.read_csv(path / "pairs.csv")
+    return status, activities, pairs
+
+
+def assert_tables_equal(expected, result):
+    assert list(result) == list(expected)
+    for name, df in expected.items():
+        pd.testing.assert_frame_equal(result[name], df, check_dtype=False)
+
+
+def test_classify_tables_matches_pandas(paired_input_dir):
+    status, activities, pairs = load_input(paired_input_dir)
+    expected = pipeline.classify_tables(activities, status, pairs)
+    assert_tables_equal(
+        expected, polars_engine.classify_tables(activities, status, pairs)
+    )
+
+
+def test_bundled_fixtures_match_pandas():
+    # The pandas pipeline raises on the fixtures; the engine must raise alike.
+    status = StatusUtils(pd.read_csv("tests/data/status.csv"))
+    activities = pd.read_csv("tests/data/activities.csv")
+    pairs = pd.read_csv("tests/data/pairs.csv")
+    with pytest.raises(ValueError) as expected:
+        pipeline.classify_tables(activities, status, pairs)
+    with pytest.raises(ValueError, match=str(expected.value)):
+        polars_engine.classify_tables(activities, status, pairs)
+
+
+@pytest.mark.parametrize("dataset", ["independent", "same_document"])
+def test_bundled_status_tables_match_pandas(paired_input_dir, dataset):
+    # ``data/input`` ships the status tables but not the activities or pairs.
+    status_path = Path(__file__).resolve().parents[1] / "data/input" / dataset
+    status, activities, pairs = load_input(paired_input_dir, status_path / "status.csv")
+    expected = pipeline.classify_tables(activities, status, pairs)
+    assert_tables_equal(
+        expected, polars_engine.classify_tables(activities, status, pairs)
+    )
+
+
+def test_selected_entities_and_orphans_match_pandas(paired_input_dir):
+    status, activities, pairs = load_input(paired_input_dir)
+    pairs = pd.concat([pairs, pairs.assign(activity_chembl_id2="missing")])
+    for kwargs in ({"entities": ["assay"]}, {"prune_orphans": True}):
+        expected = pipeline.classify_tables(activities, status, pairs, **kwargs)
+        result = polars_engine.classify_tables(activities, status, pairs, **kwargs)
+        assert_tables_equal(expected, result)
+
+
+def test_classify_directory_engine_parity(tmp_path, paired_input_dir):
+    main.classify_directory(paired_input_dir, tmp_path / "pandas")
+    main.classify_directory(paired_input_dir, tmp_path / "polars", engine="polars")
+    for path in sorted((tmp_path / "pandas").glob("*.csv")):
+        pd.testing.assert_frame_equal(
+            pd.read_csv(tmp_path / "polars" / path.name), pd.read_csv(path)
+        )
@@ -0,0 +1,91 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from pipeline import STATUS_FLAGS
+from service import ClassificationService, serve
+
+
+def activity(activity_id: str, **flags: bool) -> dict:
+    record = {
+        "activity_chembl_id": activity_id,
+        "assay_chembl_id": "ass1",
+        "document_chembl_id": "doc1",
+        "testitem_chembl_id": "t1",
+        "target_chembl_id": "tar1",
+        "mesurement_type": "type1",
+    }
+    record.update({flag: flags.get(flag, False) for flag in STATUS_FLAGS})
+    return record
+
+
+def test_classify_against_warm_snapshot(input_dir: Path) -> None:
+    service = ClassificationService(input_dir)
+    assert service.health()["pairs"] == 1
+
+    result = service.classify_activities(
+        [activity("a2", high_citation_rate=True), activity("new")]
+    )
+    init = {r["activity_chembl_id"]: r["Filtered.init"] for r in result["activities"]}
+    assert init == {"a2": "S1", "new": "no_issue"}
+    # Only ``a2`` takes part in a snapshot pair
+    assert [r["activity_chembl_id"] for r in result["resolved"]] == ["a2"]
+    assert result["resolved"][0]["Filtered"] == "S1"
+
+    pairs = pd.read_csv(input_dir / "pairs.csv").to_dict(orient="records")
+    result = service.classify_pairs(pairs)
+    assert result["pairs"][0]["Filtered"] == "S1"
+
+
+def test_http_roundtrip_and_reload(input_dir: Path) -> None:
+    service = ClassificationService(input_dir)
+
+    async def request(port: int, method: str, path: str, body: dict) -> tuple:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        data = json.dumps(body).encode()
+        writer.write(
+            f"{method} {path} HTTP/1.1\r\nContent-Length: {len(data)}\r\n\r\n".encode()
+            + data
+        )
+        await writer.drain()
+        raw = await reader.read()
+        writer.close()
+        head, _, payload = raw.partition(b"\r\n\r\n")
+        return int(head.split()[1]), json.loads(payload)
+
+    async def run() -> None:
+        server = await serve(service, port=0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            code, payload = await request(
+                port, "POST", "/classify/activities", {"activities": [activity("x")]}
+            )
+            assert code == 200
+            assert payload["activities"][0]["Filtered.init"] == "no_issue"
+
+            pd.read_csv(input_dir / "pairs.csv").iloc[:0].to_csv(
+                input_dir / "pairs.csv", index=False
+            )
+            code, payload = await request(port, "POST", "/reload", {})
+            assert (code, payload["pairs"]) == (200, 0)
+
+            code, _ = await request(port, "GET", "/missing", {})
+            assert code == 404
+
+    asyncio.run(run())
+
+
+def test_blank_pair_ids_are_skipped(input_dir: Path) -> None:
+    pairs = pd.read_csv(input_dir / "pairs.csv")
+    blank = pairs.assign(activity_chembl_id2=None)
+    pd.concat([pairs, blank]).to_csv(input_dir / "pairs.csv", index=False)
+
+    service = ClassificationService(input_dir)
+    assert service.health()["pairs"] == 2
+    result = service.classify_activities([activity("a2", high_citation_rate=True)])
+    assert [r["activity_chembl_id"] for r in result["resolved"]] == ["a2"]
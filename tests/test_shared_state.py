@@ -0,0 +1,71 @@
+import re
+import sys
+from multiprocessing import shared_memory
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from differential import random_case
+from parallel import LocalBackend, run_partitioned
+from pipeline import initialize_pairs, initialize_status
+from shared_state import attach, publish, shareable
+from status_api import StatusAPI
+
+
+def initialised(seed):
+    case = random_case(seed)
+    return case, initialize_status(case.activities, case.status, case.empty_fallback)
+
+
+def test_initialize_pairs_matches_pipeline():
+    checked = 0
+    for seed in range(60):
+        try:
+            case, init = initialised(seed)
+        except Exception:  # noqa: BLE001 - statuses not initialised
+            continue
+        if not shareable(case.pairs, init):
+            continue
+        with publish(init, case.status) as owner:
+            state = attach(owner.handle)
+            try:
+                expected = initialize_pairs(case.pairs, init, case.status)
+            except ValueError as exc:
+                with pytest.raises(ValueError, match=re.escape(str(exc))):
+                    state.initialize_pairs(case.pairs)
+                continue
+            result = state.initialize_pairs(case.pairs)
+            pd.testing.assert_frame_equal(result, expected, check_dtype=len(result))
+            checked += 1
+    assert checked
+
+
+def test_workers_view_the_segment():
+    case, init = initialised(1)
+    with publish(init, case.status) as owner:
+        state = attach(owner.handle)
+        assert not state.arrays["keys"].flags.owndata
+        assert isinstance(state.status, StatusAPI)
+        assert state.status.status_list == case.status.status_list
+        name = owner.handle.name
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+
+
+def test_non_unique_ids_are_not_shareable():
+    case, init = initialised(1)
+    doubled = pd.concat([init, init.head(1)])
+    assert not shareable(case.pairs, doubled)
+
+
+def test_partitions_match_shipped_state():
+    case, init = initialised(6)
+    with LocalBackend(2) as backend:
+        shared = run_partitioned(init, case.pairs, case.status, backend, shared=True)
+        shipped = run_partitioned(init, case.pairs, case.status, backend, shared=False)
+    assert list(shared) == list(shipped)
+    for name, df in shipped.items():
+        pd.testing.assert_frame_equal(shared[name], df)
@@ -0,0 +1,51 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from status_index import StatusIndex, build_status_index
+from status_utils import StatusUtils
+
+
+def make_outputs(path: Path) -> None:
+    pd.DataFrame(
+        {
+            "assay_chembl_id": ["ass1", "ass2", "ass3"],
+            "Filtered.new": ["S1", "S3", "no_issue"],
+            "independent_IC50": [1, 0, 2],
+        }
+    ).to_csv(path / "assay.csv", index=False)
+    pd.DataFrame(
+        {
+            "activity_chembl_id": [10, 11],
+            "Filtered.init": ["S2", "unknown"],
+        }
+    ).to_csv(path / "InitializeStatus.csv", index=False)
+
+
+def test_lookup_and_filter(tmp_path: Path) -> None:
+    status = StatusUtils(pd.read_csv("tests/data/status.csv"))
+    make_outputs(tmp_path)
+    index_path = build_status_index(tmp_path, tmp_path / "status.sqlite", status)
+
+    with StatusIndex(index_path) as index:
+        assert set(index.entities) == {"assay", "InitializeStatus"}
+
+        found = index.lookup("assay", ["ass3", "ass1", "missing"])
+        assert found["assay_chembl_id"].tolist() == ["ass1", "ass3"]
+        assert found["independent_IC50"].tolist() == [1, 2]
+
+        # IDs are matched as strings even for numeric activity keys
+        init = index.lookup("InitializeStatus", [11])
+        assert init["Filtered.init"].tolist() == ["unknown"]
+
+        ranked = index.filter_by_status("assay", "S3")
+        assert ranked["assay_chembl_id"].tolist() == ["ass2", "ass3"]
+
+        with pytest.raises(ValueError):
+            index.filter_by_status("assay", "bad")
+        with pytest.raises(KeyError):
+            index.lookup("target", ["tar1"])
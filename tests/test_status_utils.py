@@ -1,3 +1,4 @@
+import pickle
 import sys
 from pathlib import Path
 
@@ -6,6 +7,7 @@ import pytest
 
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
+from status_api import DEFAULT_PROFILE, load_status_profiles, split_status_profiles
 from status_utils import StatusUtils
 
 
@@ -41,3 +43,42 @@ def test_pair_unknown_status_handling():
     assert utils.pair(None, "S3") == "S3"
     assert utils.pair("S2", None) == "S2"
     assert utils.pair(None, None) is None
+
+
+def test_status_profiles_compiled_separately():
+    base = pd.read_csv("tests/data/status.csv")
+    swapped = base.assign(order=base["order"].to_numpy()[::-1])
+    combined = pd.concat(
+        [base.assign(profile="p1"), swapped.assign(profile="p2")], ignore_index=True
+    )
+    profiles = load_status_profiles(combined)
+    assert list(profiles) == ["p1", "p2"]
+    assert profiles["p1"].get_order("S1") == 1
+    assert profiles["p2"].get_order("S1") == 4
+    assert profiles["p2"].pair("S1", "S2") == "S2"
+
+    assert list(split_status_profiles(base)) == [DEFAULT_PROFILE]
+
+
+def test_lookup_memoisation():
+    utils = make_utils()
+    for _ in range(3):
+        assert utils.get_min(["review", "high_citation_rate"]) == "S1"
+        assert utils.pair("S2", float("nan")) == "S2"
+    assert utils.get_min(["high_citation_rate", "review"]) == "S1"
+    info = utils.cache_info()
+    assert (info["get_min"]["hits"], info["get_min"]["misses"]) == (3, 1)
+    assert (info["pair"]["hits"], info["pair"]["misses"]) == (2, 1)
+
+    # Errors are not cached and still surface on every call
+    with pytest.raises(ValueError):
+        utils.pair("x", "y")
+    with pytest.raises(ValueError):
+        utils.pair("x", "y")
+
+    clone = pickle.loads(pickle.dumps(utils))
+    assert clone.next("S1") == "S2"
+    assert clone.cache_info()["next"]["misses"] == 1
+
+    utils.cache_clear()
+    assert utils.cache_info()["get_min"]["currsize"] == 0
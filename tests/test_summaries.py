@@ -0,0 +1,68 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import yaml
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import main
+from pipeline import write_csv_with_meta
+from status_api import StatusAPI
+from summaries import SUMMARY_NAME, status_summary
+
+
+def make_status():
+    return StatusAPI(
+        pd.DataFrame(
+            {
+                "status": ["A", "B", "C"],
+                "condition_field": ["a", "b", "c"],
+                "condition_value": ["1", "1", "1"],
+                "order": [2, 1, 3],
+                "score": [0, 0, 0],
+            }
+        )
+    )
+
+
+def test_status_summary_counts_ranks_and_totals():
+    df = pd.DataFrame(
+        {
+            "assay_chembl_id": ["x", "y", "z", "w"],
+            "Filtered.new": ["A", "C", "A", "other"],
+            "independent_IC50": [1, 2, 3, 4],
+            "non_independent_Ki": [0.5, None, 1.0, 0.0],
+        }
+    )
+    summary = status_summary(df, make_status())
+    assert summary["rows"] == 4
+    assert list(summary["statuses"].items()) == [("B", 0), ("A", 2), ("C", 1)]
+    assert summary["unknown"] == 1
+    assert summary["counts"] == {"independent_IC50": 10, "non_independent_Ki": 1.5}
+
+
+def test_meta_keeps_status_rank_order(tmp_path):
+    df = pd.DataFrame({"assay_chembl_id": ["x"], "Filtered.new": ["C"]})
+    summary = status_summary(df, make_status())
+    write_csv_with_meta(
+        df, tmp_path / "assay.csv", [], "1.0", extra={"summary": summary}
+    )
+    meta = yaml.safe_load((tmp_path / "assay.meta.yaml").read_text())
+    assert list(meta["summary"]["statuses"]) == ["B", "A", "C"]
+
+
+def test_summaries_written_with_outputs(tmp_path, paired_input_dir):
+    out = tmp_path / "out"
+    main.classify_directory(paired_input_dir, out)
+    run = yaml.safe_load((out / SUMMARY_NAME).read_text())
+    assert set(run["tables"]) == set(main.ENTITY_KEYS)
+    for name, summary in run["tables"].items():
+        df = pd.read_csv(out / f"{name}.csv")
+        meta = yaml.safe_load((out / f"{name}.meta.yaml").read_text())
+        assert meta["summary"] == summary
+        assert summary["rows"] == len(df)
+        counts = df["Filtered.new"].value_counts().to_dict()
+        assert {s: n for s, n in summary["statuses"].items() if n} == counts
+        for col, total in summary["counts"].items():
+            assert df[col].sum() == total